@@ -0,0 +1,276 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from synthetic_data import synthetic_frames
+from chart_data import box_stats
+
+# 대시보드 탭 계산용 사전 집계 계층
+# 데이터 로드 시 한 번, 키워드별 부분 집계(합/개수/최소/최대/M2, 월별 버킷, 판매처/카테고리 개수,
+# 변수쌍별 공분산 모멘트)를 만들어 두고, 사이드바에서 고른 키워드 조합은 행을 다시 훑지 않고
+# 부분 집계를 병합해서 답한다.
+
+CORR_COLUMNS = ['lprice', 'title_length', 'mall_name_len', 'productType']
+
+
+def _moments(df, by, col):
+    # 그룹별 n, sum, min, max, M2(편차 제곱합)
+    g = df.groupby(by, observed=True)[col]
+    out = g.agg(n='count', total='sum', min='min', max='max', var='var').reset_index()
+    out['M2'] = out['var'].fillna(0) * (out['n'] - 1)
+    return out.drop(columns='var')
+
+
+def _pair_moments(df, key, x, y):
+    # 두 변수가 모두 있는 행만으로 키워드별 (n, 평균, M2, 공동 모멘트) — pandas .corr()의 pairwise 방식과 동일
+    mask = (df[x].notna() & df[y].notna()).to_numpy()
+    keys = df[key][mask]
+    xs = df[x].to_numpy(float)[mask]
+    ys = df[y].to_numpy(float)[mask]
+    g = pd.DataFrame({key: keys.values, 'x': xs, 'y': ys}).groupby(key, observed=True)
+    out = pd.DataFrame({'n': g.size(), 'mx': g['x'].mean(), 'my': g['y'].mean()})
+    dx = xs - out['mx'].reindex(keys).to_numpy()
+    dy = ys - out['my'].reindex(keys).to_numpy()
+    c = pd.DataFrame({key: keys.values, 'Cxy': dx * dy, 'M2x': dx * dx, 'M2y': dy * dy}).groupby(key, observed=True).sum()
+    out = out.join(c).reset_index()
+    out['x'], out['y'] = x, y
+    return out
+
+
+def build_aggregates(df_trend, df_shop, df_blog):
+    aggs = {}
+
+    # 트렌드: 키워드 그룹별 모멘트와 월별 버킷
+    # 레지스트리가 미리 만들어 둔 파생 컬럼이 있으면 그대로 사용
+    month = df_trend['month'] if 'month' in df_trend else df_trend['date'].dt.month.map('{:02d}'.format)
+    aggs['trend_moments'] = _moments(df_trend, 'keyword_group', 'ratio')
+    monthly = df_trend.assign(month=month).groupby(['month', 'keyword_group'], observed=True)['ratio']
+    aggs['trend_monthly'] = monthly.agg(total='sum', n='count').reset_index()
+
+    # 쇼핑: 결측치, 가격 통계, 판매처/카테고리 개수, 상관계수용 모멘트
+    shop = df_shop
+    if 'title_length' not in shop:
+        shop = shop.assign(title_length=shop['title'].str.len(),
+                           mall_name_len=shop['mallName'].astype('string').str.len())
+    aggs['shop_rows'] = shop.groupby('keyword', observed=True).size().rename('rows').reset_index()
+    aggs['shop_missing'] = (df_shop.drop(columns=['keyword', 'title_length', 'mall_name_len'], errors='ignore').isnull()
+                            .groupby(df_shop['keyword'], observed=True).sum().reset_index())
+    price = _moments(shop, 'keyword', 'lprice')
+    quantiles = (shop.groupby('keyword', observed=True)['lprice'].quantile([0.25, 0.5, 0.75])
+                 .unstack().rename(columns={0.25: '25%', 0.5: '50%', 0.75: '75%'}).reset_index())
+    aggs['shop_price'] = price.merge(quantiles, on='keyword')
+    # 키워드별 박스플롯(사분위수/수염/일부 이상치): 박스가 키워드마다 따로라 선택 시 그대로 골라 씀
+    aggs['shop_box'], aggs['shop_box_outliers'] = box_stats(shop, 'keyword', 'lprice')
+    aggs['shop_mall_price'] = (shop.groupby(['mallName', 'keyword'], observed=True)['lprice']
+                               .agg(total='sum', n='count').reset_index())
+    aggs['shop_category'] = (shop.groupby(['category3', 'keyword'], observed=True)
+                             .agg(items=('category3', 'size'), products=('productId', 'count')).reset_index())
+    # 동일 상품 묶음(product_clusters)이 붙어 있으면 (카테고리, 키워드, 묶음) 목록도 보관 -> 선택 키워드에 걸쳐 고유 상품 수
+    if 'cluster_id' in shop:
+        aggs['shop_category_clusters'] = (shop[['category3', 'keyword', 'cluster_id']]
+                                          .drop_duplicates().reset_index(drop=True))
+    numeric = shop[['keyword']].assign(**{c: pd.to_numeric(shop[c], errors='coerce') for c in CORR_COLUMNS})
+    pairs = [(x, y) for i, x in enumerate(CORR_COLUMNS) for y in CORR_COLUMNS[i:]]
+    aggs['shop_corr'] = pd.concat([_pair_moments(numeric, 'keyword', x, y) for x, y in pairs], ignore_index=True)
+
+    # 블로그: 일자별 포스팅 수, 블로거별 포스팅 수
+    blog = df_blog
+    if 'post_date_dt' not in blog:
+        blog = blog.assign(post_date_dt=pd.to_datetime(blog['postdate'], format='%Y%m%d'))
+    aggs['blog_daily'] = (blog
+                          .groupby(['post_date_dt', 'keyword'], observed=True).size()
+                          .reset_index(name='count'))
+    # first: 동률일 때 value_counts()처럼 먼저 등장한 블로거를 앞에 두기 위한 최초 행 위치
+    aggs['blog_bloggers'] = (df_blog.assign(first=np.arange(len(df_blog)))
+                             .groupby(['keyword', 'bloggername'], observed=True)['first']
+                             .agg(count='size', first='min').reset_index())
+    return aggs
+
+
+def _select(df, col, keywords):
+    return df[df[col].isin(keywords)]
+
+
+def merge_moments(parts):
+    # Chan의 병렬 알고리즘으로 (n, 평균, M2)를 합침
+    n = parts['n'].sum()
+    if n == 0:
+        return {'n': 0, 'mean': np.nan, 'std': np.nan, 'min': np.nan, 'max': np.nan}
+    mean = parts['total'].sum() / n
+    group_mean = parts['total'] / parts['n'].where(parts['n'] > 0)
+    m2 = parts['M2'].sum() + (parts['n'] * (group_mean - mean) ** 2).sum()
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    return {'n': n, 'mean': mean, 'std': std, 'min': parts['min'].min(), 'max': parts['max'].max()}
+
+
+def trend_summary(aggs, keywords):
+    # groupby('keyword_group')['ratio'].agg(['mean', 'max', 'std'])
+    parts = _select(aggs['trend_moments'], 'keyword_group', keywords)
+    rows = [{'keyword_group': k, **merge_moments(g)} for k, g in parts.groupby('keyword_group', observed=True)]
+    return pd.DataFrame(rows, columns=['keyword_group', 'n', 'mean', 'std', 'min', 'max'])[
+        ['keyword_group', 'mean', 'max', 'std']]
+
+
+def monthly_trend(aggs, keywords):
+    # groupby(['month', 'keyword_group'])['ratio'].mean()
+    parts = _select(aggs['trend_monthly'], 'keyword_group', keywords)
+    out = parts.assign(ratio=parts['total'] / parts['n'])[['month', 'keyword_group', 'ratio']]
+    return out.sort_values(['month', 'keyword_group']).reset_index(drop=True)
+
+
+def shop_missing(aggs, keywords):
+    # 선택된 키워드의 컬럼별 결측 개수와 비율(%)
+    rows = _select(aggs['shop_rows'], 'keyword', keywords)['rows'].sum()
+    counts = _select(aggs['shop_missing'], 'keyword', keywords).drop(columns='keyword').sum()
+    ratio = counts / rows * 100 if rows else counts * np.nan
+    return pd.DataFrame({'Column': counts.index, 'Count': counts.values, 'Ratio': ratio.values})
+
+
+def shop_describe(aggs, keywords):
+    # groupby('keyword')['lprice'].describe()
+    parts = _select(aggs['shop_price'], 'keyword', keywords)
+    out = parts.assign(count=parts['n'].astype(float), mean=parts['total'] / parts['n'],
+                       std=np.sqrt(parts['M2'] / (parts['n'] - 1)))
+    cols = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    return out.set_index('keyword')[cols].rename_axis('keyword')
+
+
+def shop_corr(aggs, keywords):
+    # 변수쌍별 모멘트를 키워드에 걸쳐 병합해 상관계수 행렬을 만듦 (pairwise complete)
+    parts = _select(aggs['shop_corr'], 'keyword', keywords)
+    corr = pd.DataFrame(np.nan, index=CORR_COLUMNS, columns=CORR_COLUMNS)
+    for (x, y), g in parts.groupby(['x', 'y'], sort=False):
+        n = g['n'].sum()
+        if n < 2:
+            continue
+        mx = (g['mx'] * g['n']).sum() / n
+        my = (g['my'] * g['n']).sum() / n
+        cxy = g['Cxy'].sum() + (g['n'] * (g['mx'] - mx) * (g['my'] - my)).sum()
+        m2x = g['M2x'].sum() + (g['n'] * (g['mx'] - mx) ** 2).sum()
+        m2y = g['M2y'].sum() + (g['n'] * (g['my'] - my) ** 2).sum()
+        value = cxy / np.sqrt(m2x * m2y) if m2x > 0 and m2y > 0 else np.nan
+        corr.loc[x, y] = corr.loc[y, x] = value
+    return corr
+
+
+def mall_price_pivot(aggs, keywords):
+    # pivot_table(index='mallName', columns='keyword', values='lprice', aggfunc='mean')
+    parts = _select(aggs['shop_mall_price'], 'keyword', keywords)
+    parts = parts[parts['n'] > 0]
+    out = parts.assign(lprice=parts['total'] / parts['n']).pivot(index='mallName', columns='keyword', values='lprice')
+    return out.sort_index()
+
+
+def category_counts(aggs, keywords, unique=False):
+    # df['category3'].value_counts().reset_index()
+    # unique: 판매처만 다른 동일 상품은 한 번만 (df.groupby('category3')['cluster_id'].nunique())
+    if unique and 'shop_category_clusters' in aggs:
+        parts = _select(aggs['shop_category_clusters'], 'keyword', keywords)
+        counts = parts.groupby('category3', observed=True)['cluster_id'].nunique().sort_values(ascending=False)
+    else:
+        parts = _select(aggs['shop_category'], 'keyword', keywords)
+        counts = parts.groupby('category3', observed=True)['items'].sum().sort_values(ascending=False)
+    return counts[counts > 0].rename('count').reset_index()
+
+
+def category_pivot(aggs, keywords, unique=False):
+    # pivot_table(index='category3', columns='keyword', values='productId', aggfunc='count', fill_value=0)
+    if unique and 'shop_category_clusters' in aggs:
+        parts = _select(aggs['shop_category_clusters'], 'keyword', keywords)
+        return parts.pivot_table(index='category3', columns='keyword', values='cluster_id', aggfunc='nunique',
+                                 fill_value=0, observed=True)
+    parts = _select(aggs['shop_category'], 'keyword', keywords)
+    return parts.pivot_table(index='category3', columns='keyword', values='products', aggfunc='sum',
+                             fill_value=0, observed=True)
+
+
+def avg_price(aggs, keywords):
+    # groupby('keyword')['lprice'].mean().reset_index()
+    parts = _select(aggs['shop_price'], 'keyword', keywords)
+    return parts.assign(lprice=parts['total'] / parts['n'])[['keyword', 'lprice']].reset_index(drop=True)
+
+
+def price_box(aggs, keywords):
+    # px.box(x='keyword', y='lprice', points="all") 대신 쓰는 (통계, 이상치)
+    return (_select(aggs['shop_box'], 'keyword', keywords).reset_index(drop=True),
+            _select(aggs['shop_box_outliers'], 'keyword', keywords).reset_index(drop=True))
+
+
+def blog_daily(aggs, keywords):
+    return _select(aggs['blog_daily'], 'keyword', keywords).reset_index(drop=True)
+
+
+def blogger_top(aggs, keywords, n=5):
+    # df['bloggername'].value_counts().head(n).reset_index()
+    parts = _select(aggs['blog_bloggers'], 'keyword', keywords)
+    counts = parts.groupby('bloggername', observed=True).agg(count=('count', 'sum'), first=('first', 'min'))
+    counts = counts.sort_values(['count', 'first'], ascending=[False, True])
+    return counts['count'].head(n).reset_index()
+
+
+def _direct(df_trend, df_shop, df_blog, keywords):
+    # app_dashboard.py의 기존 방식: 매 rerun마다 필터링된 행 전체를 다시 계산
+    t = df_trend[df_trend['keyword_group'].isin(keywords)]
+    s = df_shop[df_shop['keyword'].isin(keywords)]
+    b = df_blog[df_blog['keyword'].isin(keywords)]
+    t.groupby('keyword_group', observed=True)['ratio'].agg(['mean', 'max', 'std'])
+    month = t['date'].dt.strftime('%m')
+    t.groupby([month, 'keyword_group'], observed=True)['ratio'].mean()
+    s.isnull().sum()
+    s.groupby('keyword', observed=True)['lprice'].describe()
+    c = s.assign(title_length=s['title'].str.len(), mall_name_len=s['mallName'].astype('string').str.len())
+    c[CORR_COLUMNS].corr()
+    s.pivot_table(index='mallName', columns='keyword', values='lprice', aggfunc='mean', observed=True)
+    s['category3'].value_counts()
+    s.pivot_table(index='category3', columns='keyword', values='productId', aggfunc='count', fill_value=0,
+                  observed=True)
+    pd.to_datetime(b['postdate'], format='%Y%m%d')
+    b['bloggername'].value_counts().head(5)
+
+
+def _merged(aggs, keywords):
+    trend_summary(aggs, keywords)
+    monthly_trend(aggs, keywords)
+    shop_missing(aggs, keywords)
+    shop_describe(aggs, keywords)
+    shop_corr(aggs, keywords)
+    mall_price_pivot(aggs, keywords)
+    category_counts(aggs, keywords)
+    category_pivot(aggs, keywords)
+    blog_daily(aggs, keywords)
+    blogger_top(aggs, keywords)
+
+
+def benchmark(rows=1_000_000, selections=10):
+    df_trend, df_shop, df_blog, keywords = synthetic_frames(rows)
+    rng = np.random.default_rng(1)
+    subsets = [list(rng.choice(keywords, size=rng.integers(1, len(keywords) + 1), replace=False))
+               for _ in range(selections)]
+
+    started = time.perf_counter()
+    aggs = build_aggregates(df_trend, df_shop, df_blog)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for keywords_subset in subsets:
+        _direct(df_trend, df_shop, df_blog, keywords_subset)
+    direct = (time.perf_counter() - started) / selections
+
+    started = time.perf_counter()
+    for keywords_subset in subsets:
+        _merged(aggs, keywords_subset)
+    merged = (time.perf_counter() - started) / selections
+
+    print(f"rows={rows:,} keywords={len(keywords)}")
+    print(f"build (once per load): {build * 1000:.0f}ms")
+    print(f"per selection  direct: {direct * 1000:.1f}ms | merged partials: {merged * 1000:.1f}ms "
+          f"| x{direct / merged:.1f}")
+    return {"build": build, "direct": direct, "merged": merged}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="사전 집계 계층 벤치마크 (합성 데이터)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--selections", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.rows, args.selections)
@@ -1,12 +1,20 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import os
-import json
-import urllib.request
+import time
 from datetime import datetime
 from dotenv import load_dotenv
+from naver_api import NaverClient, iter_search_items
+from rate_limiter import INTERACTIVE
+from response_cache import ResponseCache
+from live_fetch import LiveFetcher, LIVE_TIMEOUTS, iter_ready
+import profiling
+from profiling import span
+# plotly.express, 누적 트렌드 저장소, 토픽/트렌드 분석 모듈은 처음 쓰는 구역에서 불러옴 (콜드 스타트 단축)
+
+# 세션 간에 공유되는 프레임을 읽기 전용으로 다루기 위해 Copy-on-Write 사용
+pd.set_option("mode.copy_on_write", True)
 
 # 1. 초기 설정 및 보안
 st.set_page_config(
@@ -15,12 +23,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# 데이터 폴더 자동 생성 로직
-DATA_DIR = "raw_data"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+# rerun별 구간 측정 (사이드바 맨 아래 체크박스로 켜고 끔, 꺼져 있으면 측정 비용 없음)
+profiling.instrument_streamlit(st)
+profiler = profiling.start_rerun(st, "app")
+
+def get_px():
+    # plotly.express는 첫 그림을 그릴 때 한 번만 불러오고 측정 대상으로 등록
+    import plotly.express as px
+    profiling.instrument_plotly(px)
+    return px
 
-# API 키 관리 (Streamlit Secrets 우선)
+# API 키 관리 (Streamlit Secrets 우선, .env 읽기는 프로세스당 한 번)
+@st.cache_resource
 def get_api_keys():
     try:
         if "NAVER_CLIENT_ID" in st.secrets:
@@ -43,48 +57,47 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 2. 실시간 Naver API 호출 함수
-def fetch_datalab_trend(keywords, group_name):
-    url = "https://openapi.naver.com/v1/datalab/search"
-    body = {
-        "startDate": "2025-01-01",
-        "endDate": datetime.now().strftime("%Y-%m-%d"),
-        "timeUnit": "date",
-        "keywordGroups": [{"groupName": group_name, "keywords": keywords}]
-    }
-    headers = {
-        "X-Naver-Client-Id": CLIENT_ID,
-        "X-Naver-Client-Secret": CLIENT_SECRET,
-        "Content-Type": "application/json"
-    }
-    try:
-        req = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), headers=headers)
-        response = urllib.request.urlopen(req)
-        res_body = json.loads(response.read().decode("utf-8"))
-        
-        data = []
-        for item in res_body['results'][0]['data']:
-            data.append({"date": item['period'], "ratio": item['ratio'], "group": group_name})
-        return pd.DataFrame(data)
-    except Exception as e:
-        st.error(f"Trend API Error: {e}")
-        return pd.DataFrame()
-
-def fetch_search_data(query, api_target="shop"):
-    # api_target: 'shop' or 'blog'
-    encText = urllib.parse.quote(query)
-    url = f"https://openapi.naver.com/v1/search/{api_target}.json?query={encText}&display=100"
-    headers = {
-        "X-Naver-Client-Id": CLIENT_ID,
-        "X-Naver-Client-Secret": CLIENT_SECRET
-    }
-    try:
-        req = urllib.request.Request(url, headers=headers)
-        response = urllib.request.urlopen(req)
-        res_body = json.loads(response.read().decode("utf-8"))
-        return pd.DataFrame(res_body['items'])
-    except Exception as e:
-        st.error(f"Search API ({api_target}) Error: {e}")
-        return pd.DataFrame()
+# 대시보드 호출은 INTERACTIVE 우선순위로 스케줄러를 거쳐 배치 수집보다 먼저 처리됨
+# 응답은 디스크 캐시에 남아 재시작 후에도 즉시 반환되고, TTL이 지나면 백그라운드에서 갱신됨
+@st.cache_resource
+def get_naver_client():
+    return NaverClient(CLIENT_ID, CLIENT_SECRET, priority=INTERACTIVE, cache=ResponseCache())
+
+# 아래 함수들은 백그라운드 스레드에서 실행되므로 st.* 를 호출하지 않고 예외를 그대로 올림
+def fetch_datalab_trend(client, choc, cook, ingrs):
+    # 누적 시계열에 마지막 저장일 이후 구간만 받아 이어 붙임 (겹침 구간으로 스케일 재조정)
+    # 그룹들은 한 요청(5개 초과 시 기준 그룹을 공유하는 최소 요청)으로 받아 서로 비교 가능한 스케일이 됨
+    from datalab_incremental import TrendSeriesStore
+    ing_list = [x.strip() for x in ingrs.split(",")]
+    df = TrendSeriesStore().update(client, [
+        {"groupName": "Chocolate", "keywords": [choc]},
+        {"groupName": "Cookie", "keywords": [cook]},
+        {"groupName": "Ingredients", "keywords": ing_list},
+    ], "2025-01-01", datetime.now().strftime("%Y-%m-%d"), label_col="group")
+    df_trend = df[['date', 'ratio', 'group']].copy()
+    df_trend['date'] = pd.to_datetime(df_trend['date'])
+    return df_trend
+
+def fetch_search_data(client, query, api_target="shop", max_items=100, sort="sim"):
+    # api_target: 'shop' or 'blog' / max_items: start 파라미터로 최대 1000건까지 페이지 수집
+    items = iter_search_items(client, api_target, query, sort=sort, max_items=max_items)
+    return pd.DataFrame(items)
+
+def fetch_shop(client, cook):
+    # 쇼핑 데이터 (쿠키 중심)
+    df_shop = fetch_search_data(client, cook, "shop")
+    if not df_shop.empty:
+        df_shop['lprice'] = pd.to_numeric(df_shop['lprice'], errors='coerce')
+        # 분석을 위한 가상 리뷰수/랭킹 데이터 (데모용)
+        df_shop['reviewCount'] = np.random.randint(0, 1500, size=len(df_shop))
+        df_shop['title_len'] = df_shop['title'].str.len()
+    return df_shop
+
+def fetch_blog(client, cook):
+    df_blog = fetch_search_data(client, cook, "blog")
+    if not df_blog.empty:
+        df_blog['title_clean'] = df_blog['title'].str.replace('<b>', '').str.replace('</b>', '')
+    return df_blog
 
 # 3. 사이드바 실시간 제어
 st.sidebar.title("🔍 실시간 데이터 설정")
@@ -95,164 +108,276 @@ with st.sidebar.form("api_call_form"):
     kw_ingredients = st.text_input("재료 키워드 (쉼표 구분)", "카다이프,피스타치오 스프레드")
     submit_btn = st.form_submit_button("실시간 API 호출 및 분석")
 
-# 데이터 캐싱 및 로드
-@st.cache_data
-def get_all_data(choc, cook, ingrs):
-    if not CLIENT_ID or "YOUR" in CLIENT_ID:
-        st.error("API 키가 설정되지 않았습니다. .env 또는 Secrets를 확인하세요.")
-        return None
-    
-    # 1. 트렌드 데이터
-    df_t1 = fetch_datalab_trend([choc], "Chocolate")
-    df_t2 = fetch_datalab_trend([cook], "Cookie")
-    ing_list = [x.strip() for x in ingrs.split(",")]
-    df_t3 = fetch_datalab_trend(ing_list, "Ingredients")
-    df_trend = pd.concat([df_t1, df_t2, df_t3])
-    df_trend['date'] = pd.to_datetime(df_trend['date'])
-    
-    # 2. 쇼핑 데이터 (쿠키 중심)
-    df_shop = fetch_search_data(cook, "shop")
-    if not df_shop.empty:
-        df_shop['lprice'] = pd.to_numeric(df_shop['lprice'], errors='coerce')
-        # 분석을 위한 가상 리뷰수/랭킹 데이터 (데모용)
-        import numpy as np
-        df_shop['reviewCount'] = np.random.randint(0, 1500, size=len(df_shop))
-        df_shop['title_len'] = df_shop['title'].str.len()
-        
-    # 3. 블로그 데이터
-    df_blog = fetch_search_data(cook, "blog")
-    
-    return df_trend, df_shop, df_blog
-
-if submit_btn or "df_trend" not in st.session_state:
-    with st.spinner("네이버 API에서 실시간 데이터를 수집 중입니다..."):
-        data = get_all_data(kw_chocolate, kw_cookie, kw_ingredients)
-        if data:
-            st.session_state.df_trend, st.session_state.df_shop, st.session_state.df_blog = data
-
-# 데이터가 있을 때만 렌더링
-if "df_trend" in st.session_state:
-    df_trend, df_shop, df_blog = st.session_state.df_trend, st.session_state.df_shop, st.session_state.df_blog
+@st.cache_resource
+def get_topic_matcher(lexicon_text):
+    from text_analytics import DEFAULT_TOPICS, TopicMatcher, parse_lexicon
+    return TopicMatcher(parse_lexicon(lexicon_text) or DEFAULT_TOPICS)
+
+# 실시간 조회 작업 (프로세스 전체 공유, 프로세스 캐시는 짧게 유지하고 그 아래 디스크 캐시가 갱신을 담당)
+# 같은 키워드를 조회한 세션들은 진행 중인 요청과 결과 프레임을 역직렬화 사본 없이 함께 사용
+@st.cache_resource
+def get_live_fetcher():
+    return LiveFetcher()
+
+# 가격 감시 통계 (수집기가 쌓은 키워드별 분포, 실시간 결과는 저장하지 않고 판정만)
+@st.cache_resource
+def get_price_monitor():
+    from price_monitor import PriceMonitor
+    return PriceMonitor()
+
+SOURCE_NAMES = {"trend": "검색어 트렌드", "shop": "쇼핑 검색", "blog": "블로그 검색"}
+
+# 교차/변곡점/시차 분석 (데이터가 바뀐 그룹만 다시 계산)
+@st.cache_resource
+def get_trend_analyzer():
+    from trend_analytics import TrendAnalyzer
+    profiling.instrument(TrendAnalyzer, ["update"], "trend")
+    return TrendAnalyzer()
+
+# 4. 탭 구역별 렌더링 (각 구역은 자기 소스 데이터가 도착하는 즉시 그려짐)
+@profiling.timed("section.trend_cross")
+def render_trend_cross(df_trend):
+    px = get_px()
+    from trend_analytics import pair_insights
+    df_tc = df_trend[df_trend['group'].isin(['Chocolate', 'Cookie'])]
+    fig_trend = px.line(df_tc, x='date', y='ratio', color='group',
+                       title="초콜릿 vs 쿠키 클릭 트렌드 비교",
+                       labels={'ratio': '클릭지수', 'date': '일자'},
+                       template="plotly_white")
+
+    # 평활 곡선의 교차 지점 표시
+    report = get_trend_analyzer().update(df_trend, group_col='group')
+    for cross_date in report.crossovers('Chocolate', 'Cookie')['date']:
+        fig_trend.add_vline(x=cross_date, line_dash="dot", line_color="gray")
+    st.plotly_chart(fig_trend, use_container_width=True)
+
+    st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
+    st.markdown("### � 트렌드 전이 분석")
+    insights = pair_insights(report, 'Chocolate', 'Cookie', {'Chocolate': kw_chocolate, 'Cookie': kw_cookie})
+    st.markdown("\n".join(insights) if insights else "교차/시차를 계산할 트렌드 데이터가 부족합니다.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@profiling.timed("section.ingredient_trend")
+def render_ingredient_trend(df_trend):
+    px = get_px()
+    df_ting = df_trend[df_trend['group'] == 'Ingredients']
+    fig_ing = px.area(df_ting, x='date', y='ratio', title="주요 재료(카다이프 등) 클릭 추이", color_discrete_sequence=['#ff9800'])
+    st.plotly_chart(fig_ing, use_container_width=True)
+
+@profiling.timed("section.price_box")
+def render_price_box(df_shop):
+    px = get_px()
+    fig_box_price = px.box(df_shop, y='lprice', points="all", title="현재 판매 상품 가격 분포 (lprice)", color_discrete_sequence=['#4caf50'])
+    st.plotly_chart(fig_box_price, use_container_width=True)
+
+@profiling.timed("section.shop_eda")
+def render_shop_eda(df_shop):
+    px = get_px()
+    # 1. 상관관계 히트맵
+    st.subheader("🔗 변수 간 상관관계 히트맵")
+    corr = df_shop[['lprice', 'reviewCount', 'title_len']].corr()
+    fig_heat = px.imshow(corr, text_auto=True, color_continuous_scale='RdBu_r', title="가격-리뷰수-랭킹 상관분석")
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+    col_pv1, col_pv2 = st.columns(2)
+    with col_pv1:
+        # 피벗 1: 판매처별
+        st.subheader("📊 판매처별 지표 요약 (Pivot)")
+        pv_mall = df_shop.pivot_table(index='mallName', values=['lprice', 'reviewCount'], aggfunc={'lprice': 'mean', 'reviewCount': 'sum'}).sort_values('reviewCount', ascending=False).head(10)
+        st.dataframe(pv_mall.style.format({'lprice': '{:,.0f}원', 'reviewCount': '{:,.0f}개'}))
+    with col_pv2:
+        # 피벗 2: 카테고리별
+        st.subheader("📂 카테고리별 상품 수 요약 (Pivot)")
+        pv_cat = df_shop['category3'].value_counts().reset_index()
+        st.dataframe(pv_cat)
+
+    st.subheader("🏆 리뷰 수 상위 Top 10 판매처")
+    top_malls = df_shop.groupby('mallName')['reviewCount'].sum().sort_values(ascending=False).head(10).reset_index()
+    fig_bar_top = px.bar(top_malls, x='reviewCount', y='mallName', orientation='h', color='reviewCount', title="리뷰 기반 시장 점유율")
+    st.plotly_chart(fig_bar_top, use_container_width=True)
+
+@profiling.timed("section.blog")
+def render_blog(df_blog):
+    px = get_px()
+    from text_analytics import DEFAULT_TOPICS, TopicCounter
+    profiling.instrument(TopicCounter, ["update", "totals", "daily"], "topics")
+    col_b1, col_b2 = st.columns([2, 1])
+    with col_b1:
+        st.subheader("블로그 데이터 요약")
+        df_blog_clean = df_blog[['postdate', 'title_clean', 'description', 'bloggername']].head(15)
+        st.dataframe(df_blog_clean.rename(columns={'title_clean': 'title'}), use_container_width=True)
+    with col_b2:
+        st.subheader("핵심 키워드 빈도")
+        # 제목+요약에서 토픽 사전의 단어를 한 번에 매칭 (줄마다 '토픽: 단어1, 단어2')
+        lexicon_text = st.text_area("토픽 사전", "\n".join(DEFAULT_TOPICS), height=180)
+        matcher = get_topic_matcher(lexicon_text)
+        counter = TopicCounter(matcher)
+        counter.update(df_blog)
+        df_kw_cnt = counter.totals().rename(columns={'topic': 'Keyword', 'mentions': 'Count'})
+        fig_pie = px.pie(df_kw_cnt, values='Count', names='Keyword', title="블로그 주요 토픽 비중")
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    st.subheader("일자별 토픽 언급 게시글 수")
+    df_topic_daily = counter.daily().reset_index().melt(id_vars='date', var_name='topic', value_name='posts')
+    fig_topic = px.line(df_topic_daily, x='date', y='posts', color='topic')
+    st.plotly_chart(fig_topic, use_container_width=True)
+
+    st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
+    st.markdown("### 💡 여론 변화 인사이트")
+    st.markdown("""
+    - 초기 블로그 포스팅은 **'레시피/만들기'** 중심의 정보 공유가 주를 이루었으나, 
+    - 현재는 **'리뷰/내돈내산/편의점'** 등 구매 인증과 비교 후기 중심으로 여론이 전이되었습니다.
+    """)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@profiling.timed("section.quality")
+def render_quality(df_shop):
+    px = get_px()
+    # 1. 결측치 분석
+    st.subheader("🔍 컬럼별 결측치 비율")
+    missing = df_shop.isnull().sum() / len(df_shop) * 100
+    df_miss = pd.DataFrame({'Column': missing.index, 'Ratio': missing.values})
+    fig_miss = px.bar(df_miss, x='Column', y='Ratio', text_auto='.1f', title="쇼핑 데이터 결측치 현황 (%)", color_discrete_sequence=['#e91e63'])
+    st.plotly_chart(fig_miss, use_container_width=True)
+
+    # 2. 이상치 정제 로직
+    st.subheader("🧹 광고성 저가 상품 정제 결과")
+    raw_count = len(df_shop)
+    # 키워드 가격 분포(수집 때마다 누적한 중앙값/MAD)에서 크게 벗어난 저가 상품과 1,000원 미만 상품을 미끼로 보고 제거
+    df_flag = get_price_monitor().flag(df_shop, keyword=cook)
+    df_shop_clean = df_flag[df_flag['price_alert'] != 'bait']
+    cleaned_count = len(df_shop_clean)
+
+    c_m1, c_m2, c_m3 = st.columns(3)
+    c_m1.metric("데이터 총수", f"{raw_count}개")
+    c_m2.metric("정제 후 (미끼 상품 제외)", f"{cleaned_count}개", delta=f"{cleaned_count - raw_count}")
+    c_m3.metric("가격 이상 표시", f"{df_flag['price_alert'].notna().sum()}개")
+
+    flagged = df_flag[df_flag['price_alert'].notna()]
+    if not flagged.empty:
+        st.write("가격 이상 상품 (bait: 미끼 저가, high: 이상 고가, spike/drop: 직전 수집가 대비 급등/급락)")
+        st.dataframe(flagged[['price_alert', 'price_z', 'lprice', 'title', 'mallName']].sort_values('price_z'),
+                     hide_index=True, use_container_width=True)
+
+    st.write("정제 데이터 샘플 (상위 10개)")
+    st.dataframe(df_shop_clean.sort_values('lprice').head(10))
+
+# 세션에는 조회 조건만 보관하고, 데이터는 rerun마다 공유 작업에서 참조
+if submit_btn or "query" not in st.session_state:
+    st.session_state.query = (kw_chocolate, kw_cookie, kw_ingredients)
+
+if not CLIENT_ID or "YOUR" in CLIENT_ID:
+    st.error("API 키가 설정되지 않았습니다. .env 또는 Secrets를 확인하세요.")
+else:
+    run_started = time.time()
+    choc, cook, ingrs = st.session_state.query
+    client = get_naver_client()
+    fetcher = get_live_fetcher()
+    # 세 소스를 동시에 요청 (같은 조건으로 진행 중이거나 TTL 안에 받은 작업은 재사용)
+    with span("live.submit"):
+        jobs = {
+            "trend": fetcher.submit("trend", fetch_datalab_trend, client, choc, cook, ingrs),
+            "shop": fetcher.submit("shop", fetch_shop, client, cook),
+            "blog": fetcher.submit("blog", fetch_blog, client, cook),
+        }
 
     st.title("📈 K-디저트 트렌드 실시간 인사이트")
     st.subheader("두바이 초콜릿에서 두쫀쿠까지: 유행의 진화와 시장 분석")
 
-    tabs = st.tabs(["🚀 유행의 시작", "� 가격 & 재료", "�️ 쇼핑 EDA", "� 여론 분석", "�️ 품질관리"])
+    # st.tabs는 보이지 않는 탭까지 모두 그리므로, 선택한 탭의 구역만 그리고 나머지 소스는 백그라운드에서 미리 받아 둠
+    TABS = {"start": "🚀 유행의 시작", "price": "💰 가격 & 재료", "shop": "🛍️ 쇼핑 EDA",
+            "blog": "📝 여론 분석", "quality": "🛠️ 품질관리"}
+    active_tab = st.radio("탭", list(TABS), format_func=TABS.get, horizontal=True, key="active_tab",
+                          label_visibility="collapsed")
+
+    # 탭 구조는 먼저 그리고, 데이터가 필요한 구역은 자리만 잡아 둠
+    slots = {source: [] for source in jobs}
+
+    def slot(source, render):
+        placeholder = st.empty()
+        placeholder.info(f"{SOURCE_NAMES[source]} 데이터를 수집 중입니다...")
+        slots[source].append((placeholder, render))
 
     # --- Tab 1: 유행의 시작 & 트렌드 전이 ---
-    with tabs[0]:
+    if active_tab == "start":
         st.header("1. 트렌드 교차 및 변곡점 포착")
-        df_tc = df_trend[df_trend['group'].isin(['Chocolate', 'Cookie'])]
-        fig_trend = px.line(df_tc, x='date', y='ratio', color='group',
-                           title="초콜릿 vs 쿠키 클릭 트렌드 비교",
-                           labels={'ratio': '클릭지수', 'date': '일자'},
-                           template="plotly_white")
-        
-        # 교차 지점 분석 (간단 로직)
-        st.plotly_chart(fig_trend, use_container_width=True)
-        
-        st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
-        st.markdown("### � 트렌드 전이 분석")
-        st.markdown(f"""
-        - **트렌드 교차**: 초콜릿의 검색량이 정점을 찍고 하락하는 시점에 **{kw_cookie}**의 검색량이 급증하는 양상이 발견됩니다.
-        - **변곡점**: 쿠키 유행의 본격적인 시작은 초콜릿 열풍 약 2~3개월 후 발생한 것으로 추정됩니다.
-        """)
-        st.markdown("</div>", unsafe_allow_html=True)
+        slot("trend", render_trend_cross)
 
     # --- Tab 2: 가격 & 재료 시장 ---
-    with tabs[1]:
+    elif active_tab == "price":
         st.header("2. 판매가 변화 및 재료 수요 분석")
         c1, c2 = st.columns(2)
         with c1:
             st.subheader("재료 키워드 수요 변화")
-            df_ting = df_trend[df_trend['group'] == 'Ingredients']
-            fig_ing = px.area(df_ting, x='date', y='ratio', title="주요 재료(카다이프 등) 클릭 추이", color_discrete_sequence=['#ff9800'])
-            st.plotly_chart(fig_ing, use_container_width=True)
+            slot("trend", render_ingredient_trend)
         with c2:
             st.subheader("쇼핑 상품 가격 분포")
-            fig_box_price = px.box(df_shop, y='lprice', points="all", title="현재 판매 상품 가격 분포 (lprice)", color_discrete_sequence=['#4caf50'])
-            st.plotly_chart(fig_box_price, use_container_width=True)
-            
-        st.info("� 재료 수요의 급증은 원가 상승으로 이어지며, 이는 최종 디저트 판매가가 '작은 사치' 수준(6,000~8,000원)을 유지하게 만드는 요인이 됩니다.")
+            slot("shop", render_price_box)
+
+        st.info("💡 재료 수요의 급증은 원가 상승으로 이어지며, 이는 최종 디저트 판매가가 '작은 사치' 수준(6,000~8,000원)을 유지하게 만드는 요인이 됩니다.")
 
     # --- Tab 3: 쇼핑 EDA (기술 요건) ---
-    with tabs[2]:
+    elif active_tab == "shop":
         st.header("3. 쇼핑 시장 상관관계 및 피벗 분석")
-        
-        # 1. 상관관계 히트맵
-        st.subheader("🔗 변수 간 상관관계 히트맵")
-        corr = df_shop[['lprice', 'reviewCount', 'title_len']].corr()
-        fig_heat = px.imshow(corr, text_auto=True, color_continuous_scale='RdBu_r', title="가격-리뷰수-랭킹 상관분석")
-        st.plotly_chart(fig_heat, use_container_width=True)
-
-        col_pv1, col_pv2 = st.columns(2)
-        with col_pv1:
-            # 피벗 1: 판매처별
-            st.subheader("📊 판매처별 지표 요약 (Pivot)")
-            pv_mall = df_shop.pivot_table(index='mallName', values=['lprice', 'reviewCount'], aggfunc={'lprice': 'mean', 'reviewCount': 'sum'}).sort_values('reviewCount', ascending=False).head(10)
-            st.dataframe(pv_mall.style.format({'lprice': '{:,.0f}원', 'reviewCount': '{:,.0f}개'}))
-        with col_pv2:
-            # 피벗 2: 카테고리별
-            st.subheader("📂 카테고리별 상품 수 요약 (Pivot)")
-            pv_cat = df_shop['category3'].value_counts().reset_index()
-            st.dataframe(pv_cat)
-
-        st.subheader("🏆 리뷰 수 상위 Top 10 판매처")
-        top_malls = df_shop.groupby('mallName')['reviewCount'].sum().sort_values(ascending=False).head(10).reset_index()
-        fig_bar_top = px.bar(top_malls, x='reviewCount', y='mallName', orientation='h', color='reviewCount', title="리뷰 기반 시장 점유율")
-        st.plotly_chart(fig_bar_top, use_container_width=True)
+        slot("shop", render_shop_eda)
 
     # --- Tab 4: 여론 분석 ---
-    with tabs[3]:
+    elif active_tab == "blog":
         st.header("4. 블로그 여론 및 키워드 분석")
-        col_b1, col_b2 = st.columns([2, 1])
-        with col_b1:
-            st.subheader("블로그 데이터 요약")
-            df_blog_clean = df_blog[['postdate', 'title', 'description', 'bloggername']].copy()
-            df_blog_clean['title'] = df_blog_clean['title'].str.replace('<b>', '').str.replace('</b>', '')
-            st.dataframe(df_blog_clean.head(15), use_container_width=True)
-        with col_b2:
-            st.subheader("핵심 키워드 빈도")
-            # 제목에서 키워드 추출 (간이)
-            titles = " ".join(df_blog['title'].tolist())
-            kws = ["만들기", "레시피", "리뷰", "내돈내산", "선물", "편의점", "맛집"]
-            counts = {k: titles.count(k) for k in kws}
-            df_kw_cnt = pd.DataFrame(list(counts.items()), columns=['Keyword', 'Count'])
-            fig_pie = px.pie(df_kw_cnt, values='Count', names='Keyword', title="블로그 주요 토픽 비중")
-            st.plotly_chart(fig_pie, use_container_width=True)
-            
-        st.markdown("<div class='insight-box'>", unsafe_allow_html=True)
-        st.markdown("### 💡 여론 변화 인사이트")
-        st.markdown("""
-        - 초기 블로그 포스팅은 **'레시피/만들기'** 중심의 정보 공유가 주를 이루었으나, 
-        - 현재는 **'리뷰/내돈내산/편의점'** 등 구매 인증과 비교 후기 중심으로 여론이 전이되었습니다.
-        """)
-        st.markdown("</div>", unsafe_allow_html=True)
+        slot("blog", render_blog)
 
     # --- Tab 5: 품질 관리 (기술 요건) ---
-    with tabs[4]:
+    else:
         st.header("5. 데이터 품질 및 이상치 처리")
-        
-        # 1. 결측치 분석
-        st.subheader("🔍 컬럼별 결측치 비율")
-        missing = df_shop.isnull().sum() / len(df_shop) * 100
-        df_miss = pd.DataFrame({'Column': missing.index, 'Ratio': missing.values})
-        fig_miss = px.bar(df_miss, x='Column', y='Ratio', text_auto='.1f', title="쇼핑 데이터 결측치 현황 (%)", color_discrete_sequence=['#e91e63'])
-        st.plotly_chart(fig_miss, use_container_width=True)
-        
-        # 2. 이상치 정제 로직
-        st.subheader("🧹 광고성 저가 상품 정제 결과")
-        raw_count = len(df_shop)
-        # 1,000원 미만의 광고용 미끼 상품 제거
-        df_shop_clean = df_shop[df_shop['lprice'] >= 1000]
-        cleaned_count = len(df_shop_clean)
-        
-        c_m1, c_m2 = st.columns(2)
-        c_m1.metric("데이터 총수", f"{raw_count}개")
-        c_m2.metric("정제 후 (1,000원 이상)", f"{cleaned_count}개", delta=f"{cleaned_count - raw_count}")
-        
-        st.write("정제 데이터 샘플 (상위 10개)")
-        st.dataframe(df_shop_clean.sort_values('lprice').head(10))
+        slot("shop", render_quality)
+
+    # 끝나는 순서대로 해당 소스의 구역을 채움. 한 소스의 실패/지연은 그 소스의 구역에만 표시
+    timings = []
+    first_chart = None
+    # 현재 탭이 쓰는 소스만 기다림 (다른 소스는 탭을 바꿨을 때 진행 중/완료된 작업을 재사용)
+    waiting = {source: job for source, job in jobs.items() if slots[source]}
+    for source, job, timed_out in iter_ready(waiting, LIVE_TIMEOUTS, run_started):
+        waited = time.time() - run_started
+        if timed_out:
+            status = "timeout"
+            for placeholder, _ in slots[source]:
+                placeholder.warning(f"{SOURCE_NAMES[source]} 응답이 {LIVE_TIMEOUTS[source]:g}초 안에 오지 않았습니다. "
+                                    "백그라운드에서 계속 수집 중이니 잠시 후 다시 확인하세요.")
+        elif job["future"].exception() is not None:
+            status = "error"
+            for placeholder, _ in slots[source]:
+                placeholder.error(f"{SOURCE_NAMES[source]} API Error: {job['future'].exception()}")
+        elif job["future"].result().empty:
+            status = "empty"
+            for placeholder, _ in slots[source]:
+                placeholder.warning(f"{SOURCE_NAMES[source]} 결과가 없습니다.")
+        else:
+            status = "ok"
+            df = job["future"].result()
+            for placeholder, render in slots[source]:
+                with placeholder.container():
+                    render(df)
+            if first_chart is None:
+                first_chart = time.time() - run_started
+        fetch_s = job["finished"] - job["submitted"] if job["finished"] else None
+        timings.append({"source": source, "status": status, "reused": job["submitted"] < run_started,
+                        "fetch_s": round(fetch_s, 3) if fetch_s is not None else None,
+                        "waited_s": round(waited, 3)})
+    total_latency = time.time() - run_started
+
+    # 디버그 패널: 첫 차트까지 걸린 시간과 전체 지연, 소스별 요청 시간 (reused = 진행 중/캐시된 작업 재사용)
+    with st.sidebar.expander("🛠 로딩 시간 (디버그)"):
+        d1, d2 = st.columns(2)
+        d1.metric("첫 차트까지", f"{first_chart:.2f}s" if first_chart is not None else "-")
+        d2.metric("전체", f"{total_latency:.2f}s")
+        st.dataframe(pd.DataFrame(timings), hide_index=True, use_container_width=True)
+        # 응답 캐시 카운터 (이 레플리카 기준, coalesced = 진행 중인 같은 요청에 합류해 upstream 호출을 생략한 수)
+        cache_stats = client.cache.stats()
+        st.caption(f"응답 캐시: 메모리 적중 {cache_stats['memory_hits']} · 공유 적중 {cache_stats['shared_hits']} · "
+                   f"stale {cache_stats['stale_hits']} · 미스 {cache_stats['misses']} · "
+                   f"합류 {cache_stats['coalesced']} · API 호출 {cache_stats['loads'] + cache_stats['refreshes']}")
 
 st.markdown("---")
 st.caption("Produced by Antigravity © 2026 | Naver API Real-time Dashboard")
+
+profiling.render_panel(st, profiler)
@@ -1,13 +1,32 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import os
 from datetime import datetime
+import storage
+import aggregates
+import chart_data
+import profiling
+from profiling import span
+from data_registry import DatasetRegistry
+from item_history import HISTORY_DB
+from product_clusters import CLUSTER_DB
+from price_monitor import PRICE_DB
+# plotly.express, 데이터 원본/이력/세그먼트/트렌드 분석 모듈은 해당 탭을 처음 그릴 때 불러옴 (콜드 스타트 단축)
+
+# 세션 간에 공유되는 레지스트리 프레임을 읽기 전용으로 다루기 위해 Copy-on-Write 사용
+pd.set_option("mode.copy_on_write", True)
 
 # 페이지 설정
 st.set_page_config(page_title="Naver API Trend Dashboard", layout="wide")
 
+# rerun별 구간 측정 (사이드바 맨 아래 체크박스로 켜고 끔, 꺼져 있으면 측정 비용 없음)
+profiling.instrument_streamlit(st)
+profiling.instrument(aggregates, ["build_aggregates", "trend_summary", "monthly_trend", "shop_missing",
+                                  "shop_describe", "shop_corr", "mall_price_pivot", "category_counts",
+                                  "category_pivot", "avg_price", "price_box", "blog_daily", "blogger_top"], "aggregates")
+profiling.instrument(storage, ["read"], "storage")
+profiler = profiling.start_rerun(st, "dashboard")
+
 # 스타일링
 st.markdown("""
 <style>
@@ -23,36 +42,114 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 데이터 로드 함수
-@st.cache_data
+def get_px():
+    # plotly.express는 첫 그림을 그릴 때 한 번만 불러오고 측정 대상으로 등록
+    import plotly.express as px
+    profiling.instrument_plotly(px)
+    return px
+
+# 데이터 로드 함수 (캐시는 아래 레지스트리가 담당)
+# 데이터셋 -> 기존 CSV 스냅샷 파일 이름에 들어가는 문자열
+CSV_NAMES = {"trend": "dubai_search_trend_2025", "blog": "dubai_blog_latest", "shop": "dubai_shop_latest"}
+
+@profiling.timed("load.data")
 def load_data():
+    # 컬럼형 저장소에 있는 데이터셋은 최신 수집분만 필요한 타입으로 읽고, 없는 데이터셋은 기존 CSV 스냅샷을 읽음
+    return tuple(load_dataset(name) for name in ["trend", "blog", "shop"])
+
+def load_dataset(name):
+    if os.path.isdir(storage.STORE_DIR):
+        df = storage.read(name, latest=True)
+        if df is not None:
+            return df.drop(columns=["collected"])
+
     raw_path = "raw_data/"
-    files = os.listdir(raw_path)
-    
-    # 최근 파일 찾기 로직
-    search_trend_file = sorted([f for f in files if "dubai_search_trend_2025" in f])[-1]
-    blog_file = sorted([f for f in files if "dubai_blog_latest" in f])[-1]
-    shop_file = sorted([f for f in files if "dubai_shop_latest" in f])[-1]
-    
-    df_trend = pd.read_csv(os.path.join(raw_path, search_trend_file))
-    df_blog = pd.read_csv(os.path.join(raw_path, blog_file))
-    df_shop = pd.read_csv(os.path.join(raw_path, shop_file))
-    
+    files = sorted(f for f in os.listdir(raw_path) if CSV_NAMES[name] in f) if os.path.isdir(raw_path) else []
+    if not files:
+        raise FileNotFoundError(f"'{name}' 데이터가 저장소와 {raw_path}에 없습니다. collect_data.py로 먼저 수집하세요.")
+
+    # 최근 파일
+    with span("load.csv_parse"):
+        df = pd.read_csv(os.path.join(raw_path, files[-1]))
+
     # 전처리
-    df_trend['date'] = pd.to_datetime(df_trend['date'])
-    df_shop['lprice'] = pd.to_numeric(df_shop['lprice'], errors='coerce')
-    
-    return df_trend, df_blog, df_shop
+    if name == "trend":
+        df['date'] = pd.to_datetime(df['date'])
+    elif name == "shop":
+        df['lprice'] = pd.to_numeric(df['lprice'], errors='coerce')
+    return df
 
-try:
+# 모든 세션이 공유하는 불변 데이터셋 (세션은 선택 키워드만 보유하고 공유 프레임의 뷰를 읽음)
+@st.cache_resource
+def get_registry():
     df_trend, df_blog, df_shop = load_data()
+    # 동일 상품 묶음 색인이 있으면 상품마다 묶음 번호를 붙임 (판매처 간 중복 집계 방지, 가격 차이 분석)
+    if os.path.exists(CLUSTER_DB):
+        from product_clusters import ProductClusters, with_clusters
+        with span("load.product_clusters"):
+            df_shop = with_clusters(df_shop, ProductClusters().assignments())
+    with span("load.registry_build"):
+        return DatasetRegistry({"trend": (df_trend, "keyword_group"),
+                                "shop": (df_shop, "keyword"),
+                                "blog": (df_blog, "keyword")})
+
+# 탭 계산용 키워드별 부분 집계 (데이터 로드당 한 번만 계산, 키워드 선택은 병합으로 응답)
+@st.cache_resource
+def load_aggregates():
+    registry = get_registry()
+    with span("load.aggregates_build"):
+        return aggregates.build_aggregates(registry.frame("trend"), registry.frame("shop"), registry.frame("blog"))
+
+# 트렌드 교차/변곡점/시차 분석 (선택 키워드가 바뀌어도 이미 계산한 그룹/쌍은 재사용)
+@st.cache_resource
+def get_trend_analyzer():
+    from trend_analytics import TrendAnalyzer
+    profiling.instrument(TrendAnalyzer, ["update"], "trend")
+    return TrendAnalyzer()
+
+# 데이터 원본 탭의 페이지 조회 소스 (저장소가 있으면 필터/정렬을 저장소에서 처리, 정렬 순서 캐시는 세션 간 공유)
+@st.cache_resource
+def get_browser_source(name):
+    import data_browser
+    key_col = "keyword_group" if name == "trend" else "keyword"
+    if os.path.isdir(storage.dataset_path(name)):
+        return data_browser.StoreSource(name, key_col, latest=True)
+    return data_browser.FrameSource(name, get_registry().frame(name), key_col)
+
+# 쇼핑인사이트 구간별 월 집계 (원본 행 대신 수집 시 미리 집계한 segment_monthly만 읽음)
+@st.cache_resource
+def load_segments():
+    if not os.path.isdir(storage.dataset_path("segment_monthly")):
+        return None
+    return storage.read("segment_monthly", latest=True).drop(columns=["collected"])
+
+# 키워드 일괄 비교 결과 (keyword_batch.py가 미리 계산한 순위표만 읽음, 새 배치는 이름이 달라 캐시를 다시 채움)
+@st.cache_resource
+def load_leaderboard(batch):
+    import keyword_batch
+    board = keyword_batch.leaderboard(batch)
+    trend = storage.read("batch_trend", filters=[("batch", "=", batch)], latest=True)
+    return board, trend
+
+def get_aggs():
+    # 집계가 필요한 탭(트렌드/쇼핑/블로그)에서만 처음 한 번 생성
+    try:
+        with span("load.aggregates"):
+            return load_aggregates()
+    except Exception as e:
+        st.error(f"데이터 로드 중 오류 발생: {e}")
+        st.stop()
+
+try:
+    with span("load.registry"):
+        registry = get_registry()
 except Exception as e:
     st.error(f"데이터 로드 중 오류 발생: {e}")
     st.stop()
 
 # 사이드바 구성
 st.sidebar.title("🔍 검색 옵션")
-keywords = df_trend['keyword_group'].unique().tolist()
+keywords = registry.keywords("trend")
 selected_keywords = st.sidebar.multiselect("분석 키워드 선택", keywords, default=keywords)
 
 st.sidebar.markdown("---")
@@ -62,43 +159,91 @@ st.sidebar.info("이 대시보드는 Naver API를 통해 수집된 2025년 트
 st.title("🍫 두바이 쿠키 & 초콜릿 트렌드 분석 대시보드")
 st.markdown(f"**기준일**: {datetime.now().strftime('%Y-%m-%d')}")
 
-# 데이터 필터링
-df_trend_filtered = df_trend[df_trend['keyword_group'].isin(selected_keywords)]
-df_blog_filtered = df_blog[df_blog['keyword'].isin(selected_keywords)]
-df_shop_filtered = df_shop[df_shop['keyword'].isin(selected_keywords)]
+# 데이터 필터링 (공유 프레임의 복사 없는 뷰)
+with span("filter"):
+    df_trend_filtered = registry.view("trend", selected_keywords)
+    df_blog_filtered = registry.view("blog", selected_keywords)
+    df_shop_filtered = registry.view("shop", selected_keywords)
 
-# 탭 구성
-tab1, tab2, tab3, tab4 = st.tabs(["📈 트렌드 분석", "🛍️ 쇼핑 EDA", "📝 블로그 인사이트", "📊 데이터 원본"])
+# 탭 구성: st.tabs는 보이지 않는 탭까지 모두 계산하므로, 선택한 탭 하나만 계산해서 그림
+TABS = {"trend": "📈 트렌드 분석", "shop": "🛍️ 쇼핑 EDA", "blog": "📝 블로그 인사이트",
+        "segments": "🧭 세그먼트 비교", "batch": "🏁 키워드 비교", "raw": "📊 데이터 원본"}
+active_tab = st.radio("탭", list(TABS), format_func=TABS.get, horizontal=True, key="active_tab",
+                      label_visibility="collapsed")
 
 # Tab 1: 트렌드 분석
-with tab1:
+@profiling.timed("tab.trend")
+def render_trend_tab():
+    px = get_px()
+    aggs = get_aggs()
+    from trend_analytics import pair_insights
     st.header("2025년 검색 트렌드 비교")
     
     # 그래프 1: 시계열 트렌드 (Plotly)
-    fig_line = px.line(df_trend_filtered, x='date', y='ratio', color='keyword_group',
+    # 보이는 기간을 고르면 그 구간만, 점 수가 예산을 넘으면 키워드별 LTTB로 줄여서 전송
+    trend_range = None
+    if not df_trend_filtered.empty:
+        date_min = df_trend_filtered['date'].min().date()
+        date_max = df_trend_filtered['date'].max().date()
+        if date_min < date_max:
+            trend_range = st.slider("표시 기간", min_value=date_min, max_value=date_max,
+                                    value=(date_min, date_max), format="YYYY-MM-DD")
+    df_trend_chart, trend_note = chart_data.series_for_chart(df_trend_filtered, 'date', 'ratio', 'keyword_group',
+                                                             *(trend_range or (None, None)))
+    fig_line = px.line(df_trend_chart, x='date', y='ratio', color='keyword_group',
                       title="2025년 일별 검색 추이 (상대 비중)",
                       labels={'ratio': '검색 비중 (%)', 'date': '일자'},
                       template="plotly_white")
     st.plotly_chart(fig_line, use_container_width=True)
+    st.caption(f"표시: {trend_note}")
     
     col1, col2 = st.columns(2)
     with col1:
         # 표 1: 키워드별 평균/최대 비율 요약
         st.subheader("키워드별 트렌드 요약")
-        trend_summary = df_trend_filtered.groupby('keyword_group')['ratio'].agg(['mean', 'max', 'std']).reset_index()
+        trend_summary = aggregates.trend_summary(aggs, selected_keywords)
         trend_summary.columns = ['키워드', '평균 비중', '최대 비중', '표준편차']
         st.table(trend_summary.style.format({'평균 비중': '{:.2f}', '최대 비중': '{:.2f}', '표준편차': '{:.2f}'}))
         
     with col2:
         # 그래프 2: 월별 추이 (Bar)
-        df_trend_filtered['month'] = df_trend_filtered['date'].dt.strftime('%m')
-        monthly_trend = df_trend_filtered.groupby(['month', 'keyword_group'])['ratio'].mean().reset_index()
+        monthly_trend = aggregates.monthly_trend(aggs, selected_keywords)
         fig_bar = px.bar(monthly_trend, x='month', y='ratio', color='keyword_group', barmode='group',
                         title="월별 평균 검색 트렌드", labels={'ratio': '평균 비중', 'month': '월'})
         st.plotly_chart(fig_bar, use_container_width=True)
 
+    # 교차/변곡점/시차 (평활 곡선 기준으로 계산한 값)
+    st.subheader("트렌드 교차 · 변곡점 · 시차")
+    trend_report = get_trend_analyzer().update(df_trend_filtered)
+    if trend_report.groups.empty:
+        st.info("분석할 트렌드 데이터가 없습니다.")
+    else:
+        df_points = trend_report.groups[['group', 'onset_date', 'rise_date', 'peak_date', 'fall_date', 'growth_last']]
+        df_points = df_points.sort_values('peak_date')
+        df_points.columns = ['키워드', '상승 시작', '급증(변곡점)', '정점', '급감(변곡점)', '최근 증가율']
+        st.dataframe(df_points.style.format({'최근 증가율': '{:+.0%}', '상승 시작': '{:%Y-%m-%d}',
+                                             '급증(변곡점)': '{:%Y-%m-%d}', '정점': '{:%Y-%m-%d}',
+                                             '급감(변곡점)': '{:%Y-%m-%d}'}, na_rep='-'),
+                     use_container_width=True, hide_index=True)
+        if len(trend_report.groups) >= 2:
+            c1, c2 = st.columns(2)
+            # 정점이 빠른 순으로 기본 선택 (먼저 유행한 키워드 -> 뒤따른 키워드)
+            order = list(df_points['키워드'])
+            pair_a = c1.selectbox("먼저 유행한 키워드", order, index=0)
+            pair_b = c2.selectbox("비교 키워드", [k for k in order if k != pair_a], index=0)
+            st.markdown("\n".join(pair_insights(trend_report, pair_a, pair_b)))
+            df_pairs = trend_report.pairs.sort_values('corr', ascending=False).head(20)
+            df_pairs = df_pairs[['leader', 'a', 'b', 'lead_days', 'corr', 'crossovers', 'last_cross']]
+            df_pairs.columns = ['선행 키워드', '키워드 A', '키워드 B', 'A 선행 일수', '상호상관', '교차 횟수', '마지막 교차']
+            st.caption("상관이 높은 키워드 쌍 (A 선행 일수 > 0: A의 흐름이 B보다 앞섬)")
+            st.dataframe(df_pairs.style.format({'상호상관': '{:.2f}', '마지막 교차': '{:%Y-%m-%d}'}, na_rep='-'),
+                         use_container_width=True, hide_index=True)
+
 # Tab 2: 쇼핑 EDA (심화 분석 포함)
-with tab2:
+@profiling.timed("tab.shop")
+def render_shop_tab():
+    px = get_px()
+    aggs = get_aggs()
     st.header("🛒 쇼핑 데이터 심화 탐색 (Advanced EDA)")
     
     # 2.1 결측치 분석 섹션
@@ -106,9 +251,7 @@ with tab2:
     col_missing1, col_missing2 = st.columns([2, 1])
     with col_missing1:
         # 결측값 개수 및 비율 시각화
-        missing_values = df_shop_filtered.isnull().sum()
-        missing_ratio = (missing_values / len(df_shop_filtered)) * 100
-        df_missing = pd.DataFrame({'Column': missing_values.index, 'Count': missing_values.values, 'Ratio': missing_ratio.values})
+        df_missing = aggregates.shop_missing(aggs, selected_keywords)
         df_missing = df_missing[df_missing['Count'] > 0].sort_values('Ratio', ascending=False)
         
         if not df_missing.empty:
@@ -132,14 +275,17 @@ with tab2:
     st.subheader("2. 가격 이상치 및 분포 분석")
     col_box1, col_box2 = st.columns([2, 1])
     with col_box1:
-        # 이상치 시각화: 박스플롯
-        fig_box = px.box(df_shop_filtered, x='keyword', y='lprice', color='keyword',
-                        points="all", title="키워드별 가격 분포 및 이상치(Outlier) 확인",
-                        labels={'lprice': '가격(원)', 'keyword': '키워드'})
+        # 이상치 시각화: 박스플롯 (로드 시 계산한 사분위수/수염 + 극단 이상치만 전송)
+        box_stats, box_outliers = aggregates.price_box(aggs, selected_keywords)
+        fig_box = chart_data.box_figure(box_stats, box_outliers, 'keyword', 'lprice',
+                                        title="키워드별 가격 분포 및 이상치(Outlier) 확인",
+                                        labels={'lprice': '가격(원)', 'keyword': '키워드'})
         st.plotly_chart(fig_box, use_container_width=True)
+        st.caption(f"상품 {int(box_stats['n'].sum()):,}개 · 이상치 {int(box_stats['outliers'].sum()):,}개 중 "
+                   f"{len(box_outliers):,}개 표시")
     with col_box2:
         st.markdown("**기초 통계값 요약**")
-        st.write(df_shop_filtered.groupby('keyword')['lprice'].describe())
+        st.write(aggregates.shop_describe(aggs, selected_keywords))
         st.info("💡 박스플롯의 수염(Whisker)을 벗어나는 점들은 세트 상품이나 대용량 구성 등 가격 편차가 큰 이상치를 나타냅니다.")
 
     st.markdown("---")
@@ -147,14 +293,8 @@ with tab2:
     # 2.3 상관관계 및 히트맵
     st.subheader("3. 변수 간 상관관계 및 분석 (Heatmap)")
     
-    # 상관관계 분석을 위한 수치형 데이터 생성 (예: 제목 길이, 키워드 비중 등 추출)
-    df_corr = df_shop_filtered.copy()
-    df_corr['title_length'] = df_corr['title'].str.len()
-    df_corr['mall_name_len'] = df_corr['mallName'].str.len()
-    
-    # 히트맵 1: 쇼핑 데이터 수치 변수 상관관계
-    numerical_cols = ['lprice', 'title_length', 'mall_name_len', 'productType']
-    corr_matrix = df_corr[numerical_cols].corr()
+    # 히트맵 1: 쇼핑 데이터 수치 변수(가격, 제목 길이, 판매처명 길이, 상품 유형) 상관관계
+    corr_matrix = aggregates.shop_corr(aggs, selected_keywords)
     
     col_heat1, col_heat2 = st.columns(2)
     with col_heat1:
@@ -165,8 +305,8 @@ with tab2:
 
     with col_heat2:
         # 히트맵 2: 월별-키워드별 검색 비중 히트맵 (df_trend 활용)
-        df_trend_filtered['month'] = df_trend_filtered['date'].dt.strftime('%m')
-        pivot_trend = df_trend_filtered.pivot_table(index='month', columns='keyword_group', values='ratio', aggfunc='mean')
+        monthly_trend = aggregates.monthly_trend(aggs, selected_keywords)
+        pivot_trend = monthly_trend.pivot(index='month', columns='keyword_group', values='ratio')
         fig_heat2 = px.imshow(pivot_trend, text_auto=True, color_continuous_scale='Viridis',
                              title="월별-키워드별 평균 검색 비중 히트맵")
         st.plotly_chart(fig_heat2, use_container_width=True)
@@ -177,16 +317,18 @@ with tab2:
     # 2.4 피벗테이블 및 막대그래프
     st.subheader("4. 심화 피벗 분석 및 시각화")
     
+    has_clusters = 'cluster_id' in df_shop_filtered
+    unique_products = has_clusters and st.checkbox("판매처만 다른 동일 상품은 한 번만 세기", value=True)
     col_pv1, col_pv2 = st.columns(2)
     with col_pv1:
         # 피벗테이블 1: 몰별-키워드별 평균 가격
         st.markdown("**[표] 판매처별 키워드 평균가 피벗**")
-        pv_mall_price = df_shop_filtered.pivot_table(index='mallName', columns='keyword', values='lprice', aggfunc='mean').head(15)
+        pv_mall_price = aggregates.mall_price_pivot(aggs, selected_keywords).head(15)
         st.dataframe(pv_mall_price.style.format('{:,.0f}'), use_container_width=True)
         
         # 막대그래프 1: 카테고리별 상품 수
         st.markdown("**[그래프] 카테고리별 등록 상품 수**")
-        cat_counts = df_shop_filtered['category3'].value_counts().reset_index()
+        cat_counts = aggregates.category_counts(aggs, selected_keywords, unique=unique_products)
         fig_bar_cat = px.bar(cat_counts, x='category3', y='count', text_auto=True,
                             title="카테고리별 상품 유통 현황", color='category3')
         st.plotly_chart(fig_bar_cat, use_container_width=True)
@@ -194,32 +336,130 @@ with tab2:
     with col_pv2:
         # 피벗테이블 2: 카테고리별-키워드별 상품 수
         st.markdown("**[표] 카테고리별 키워드 상품 비중**")
-        pv_cat_count = df_shop_filtered.pivot_table(index='category3', columns='keyword', values='productId', aggfunc='count', fill_value=0)
+        pv_cat_count = aggregates.category_pivot(aggs, selected_keywords, unique=unique_products)
         st.dataframe(pv_cat_count, use_container_width=True)
 
         # 막대그래프 2: 키워드별 평균 배송비/가격 등 (현재 데이터 기준 가격 비교)
         st.markdown("**[그래프] 키워드별 가격 데이터 요약**")
-        avg_price = df_shop_filtered.groupby('keyword')['lprice'].mean().reset_index()
+        avg_price = aggregates.avg_price(aggs, selected_keywords)
         fig_bar_price = px.bar(avg_price, x='keyword', y='lprice', color='keyword',
                               title="키워드별 평균 판매가 비교", text_auto='.0f')
         st.plotly_chart(fig_bar_price, use_container_width=True)
 
+    # 2.5 판매처 간 동일 상품 가격 차이 (product_clusters 색인 기준)
+    st.markdown("---")
+    st.subheader("5. 판매처별 동일 상품 가격 차이")
+    if not has_clusters:
+        st.info("동일 상품 색인이 없습니다. `python product_clusters.py build`로 만드세요.")
+    else:
+        import plotly.graph_objects as go
+        from product_clusters import price_spread
+        df_spread = price_spread(df_shop_filtered)
+        listings = len(df_shop_filtered)
+        st.caption(f"상품 {listings:,}건 → 동일 상품 {df_shop_filtered['cluster_id'].nunique():,}개, "
+                   f"판매처 2곳 이상에 올라온 상품 {len(df_spread):,}개")
+        if not df_spread.empty:
+            top = df_spread.head(15)
+            fig_spread = go.Figure()
+            fig_spread.add_trace(go.Bar(y=top['product'].str.slice(0, 30), x=top['spread'], base=top['min_price'],
+                                        orientation='h', name='최저가~최고가',
+                                        customdata=top[['malls', 'cheapest_mall']],
+                                        hovertemplate="%{base:,.0f}원 ~ %{x:,.0f}원 차이<br>판매처 %{customdata[0]}곳, "
+                                                      "최저가 %{customdata[1]}<extra></extra>"))
+            fig_spread.add_trace(go.Scatter(y=top['product'].str.slice(0, 30), x=top['median_price'], mode='markers',
+                                            name='중앙값', marker=dict(color='black', symbol='line-ns-open', size=14)))
+            fig_spread.update_layout(title="판매처 간 가격 범위 (상위 15개 상품)", xaxis_title="가격(원)",
+                                     yaxis=dict(autorange='reversed'), height=500)
+            st.plotly_chart(fig_spread, use_container_width=True)
+            st.dataframe(df_spread[['product', 'keyword', 'malls', 'listings', 'min_price', 'median_price', 'max_price',
+                                    'spread_pct', 'cheapest_mall']]
+                         .rename(columns={'product': '상품(정규화 제목)', 'keyword': '키워드', 'malls': '판매처 수',
+                                          'listings': '등록 수', 'min_price': '최저가', 'median_price': '중앙값',
+                                          'max_price': '최고가', 'spread_pct': '가격 차이(%)',
+                                          'cheapest_mall': '최저가 판매처'})
+                         .style.format({'최저가': '{:,.0f}', '중앙값': '{:,.0f}', '최고가': '{:,.0f}',
+                                        '가격 차이(%)': '{:.0f}%'}),
+                         use_container_width=True, hide_index=True)
+
+    # 2.6 상품 이력 (수집 실행 간 변경된 가격/순위만 기록된 이력 DB 조회)
+    if os.path.exists(HISTORY_DB):
+        st.markdown("---")
+        st.subheader("6. 상품 가격 이력 및 신규 상품")
+        from item_history import ItemHistory
+        profiling.instrument(ItemHistory, ["price_history", "new_since"], "history")
+        history = ItemHistory()
+        col_h1, col_h2 = st.columns(2)
+        with col_h1:
+            product_titles = dict(zip(df_shop_filtered['productId'].astype(str),
+                                      df_shop_filtered['title'].str.replace('<b>', '').str.replace('</b>', '')))
+            if product_titles:
+                selected_product = st.selectbox("상품 선택", list(product_titles.keys()),
+                                                format_func=lambda pid: f"{product_titles[pid]} ({pid})")
+                df_price_hist = history.price_history(selected_product)
+                fig_hist = px.line(df_price_hist, x='run_date', y='lprice', markers=True, line_shape='hv',
+                                   title="수집일별 최저가 변화", labels={'run_date': '수집일', 'lprice': '최저가(원)'})
+                st.plotly_chart(fig_hist, use_container_width=True)
+        with col_h2:
+            since = st.date_input("기준일 이후 처음 수집된 상품", value=datetime.now().date().replace(day=1))
+            df_new = history.new_since('shop', since.strftime('%Y-%m-%d'))
+            df_new = df_new[df_new['keyword'].isin(selected_keywords)]
+            st.metric("신규 상품 수", f"{len(df_new)}개")
+            st.dataframe(df_new[['first_seen', 'keyword', 'title', 'mall_name', 'last_lprice']].head(20),
+                         use_container_width=True)
+
+    # 2.7 가격 감시 알림 (수집 배치마다 증분 갱신되는 키워드별 분포 통계와 알림 테이블 조회)
+    if os.path.exists(PRICE_DB):
+        st.markdown("---")
+        st.subheader("7. 가격 감시 알림")
+        from price_monitor import PriceMonitor
+        monitor = PriceMonitor()
+        df_stats = monitor.stats("keyword")
+        df_stats = df_stats[df_stats['group_key'].isin(selected_keywords)]
+        alert_kinds = {"bait": "미끼 저가", "high": "이상 고가", "spike": "급등", "drop": "급락"}
+        col_p1, col_p2 = st.columns([1, 2])
+        with col_p1:
+            st.markdown("**키워드별 가격 분포 (누적 추정)**")
+            st.dataframe(df_stats[['group_key', 'count', 'q1_price', 'median_price', 'q3_price']]
+                         .rename(columns={'group_key': '키워드', 'count': '관측 수', 'q1_price': '1사분위',
+                                          'median_price': '중앙값', 'q3_price': '3사분위'})
+                         .style.format({'1사분위': '{:,.0f}', '중앙값': '{:,.0f}', '3사분위': '{:,.0f}'}),
+                         use_container_width=True, hide_index=True)
+        with col_p2:
+            kinds = st.multiselect("알림 종류", list(alert_kinds), default=list(alert_kinds), format_func=alert_kinds.get)
+            alert_since = st.date_input("알림 기준일", value=datetime.now().date().replace(day=1), key="alert_since")
+            df_alerts = monitor.alerts(alert_since.strftime('%Y-%m-%d'), selected_keywords, kinds, limit=500)
+            st.metric("알림 수", f"{len(df_alerts):,}건" + (" (최근 500건)" if len(df_alerts) == 500 else ""))
+            st.dataframe(df_alerts[['run_date', 'kind', 'scope', 'keyword', 'title', 'mall_name', 'lprice',
+                                    'reference', 'score']]
+                         .rename(columns={'run_date': '수집일', 'kind': '종류', 'scope': '기준', 'keyword': '키워드',
+                                          'title': '상품명', 'mall_name': '판매처', 'lprice': '가격',
+                                          'reference': '기준가', 'score': '점수'}),
+                         use_container_width=True, hide_index=True)
+        st.caption("기준가: 분포 판정은 그룹 중앙값, 급등/급락은 직전 수집가. 점수: 로그 가격의 수정 z 점수 "
+                   "(급등/급락은 가격 비율)")
+
 # Tab 3: 블로그 인사이트
-with tab3:
+@profiling.timed("tab.blog")
+def render_blog_tab():
+    px = get_px()
+    aggs = get_aggs()
     st.header("블로그 검색 인사이트")
     
     # 그래프 6: 블로그 포스팅 날짜 분포
-    df_blog_filtered['post_date_dt'] = pd.to_datetime(df_blog_filtered['postdate'], format='%Y%m%d')
-    blog_daily = df_blog_filtered.groupby(['post_date_dt', 'keyword']).size().reset_index(name='count')
-    fig_blog = px.line(blog_daily, x='post_date_dt', y='count', color='keyword',
+    # 일자별 건수는 급증한 날이 빠지지 않도록 구간별 최소/최대로 축소
+    blog_daily = aggregates.blog_daily(aggs, selected_keywords)
+    blog_chart, blog_note = chart_data.series_for_chart(blog_daily, 'post_date_dt', 'count', 'keyword',
+                                                        method="minmax")
+    fig_blog = px.line(blog_chart, x='post_date_dt', y='count', color='keyword',
                       markers=True, title="최근 블로그 포스팅 빈도 추이")
     st.plotly_chart(fig_blog, use_container_width=True)
+    st.caption(f"표시: {blog_note}")
     
     col_x, col_y = st.columns([1, 2])
     with col_x:
         # 표 4: 블로거 활동 Top 5
         st.subheader("주요 활동 블로거")
-        blogger_top = df_blog_filtered['bloggername'].value_counts().head(5).reset_index()
+        blogger_top = aggregates.blogger_top(aggs, selected_keywords)
         st.table(blogger_top)
         
     with col_y:
@@ -228,17 +468,125 @@ with tab3:
         st.dataframe(df_blog_filtered[['postdate', 'title', 'bloggername', 'link']].sort_values('postdate', ascending=False).head(10),
                     use_container_width=True)
 
+# 세그먼트 비교: 쇼핑인사이트 기기/성별/연령 구간별 클릭 비중
+@profiling.timed("tab.segments")
+def render_segments_tab():
+    px = get_px()
+    from shopping_insight import SEGMENT_LABELS
+    st.header("쇼핑인사이트 구간별 비교")
+    df_seg = load_segments()
+    if df_seg is None or df_seg.empty:
+        st.info("구간별 데이터가 없습니다. `python collect_data.py --segments`로 수집하세요.")
+    else:
+        dimension_names = {"device": "기기", "gender": "성별", "age": "연령"}
+        col_s1, col_s2, col_s3 = st.columns(3)
+        with col_s1:
+            seg_category = st.selectbox("쇼핑 분야", sorted(df_seg['category'].unique()))
+        df_cat = df_seg[df_seg['category'] == seg_category]
+        seg_keywords = sorted(k for k in df_cat.loc[df_cat['dimension'] != 'keywords', 'keyword'].unique() if k)
+        with col_s2:
+            seg_target = st.selectbox("비교 대상", ["분야 전체"] + seg_keywords)
+        with col_s3:
+            seg_dimension = st.radio("구간", list(dimension_names), format_func=dimension_names.get, horizontal=True)
+
+        labels = SEGMENT_LABELS[seg_dimension]
+        df_dim = df_cat[df_cat['dimension'] == seg_dimension].copy()
+        df_dim['구간'] = df_dim['segment'].astype(str).map(labels).fillna(df_dim['segment'].astype(str))
+        df_dim['대상'] = df_dim['keyword'].astype(str).replace('', '분야 전체')
+
+        # 그래프: 선택 대상의 월별 구간 비중
+        df_target = df_dim[df_dim['대상'] == seg_target]
+        fig_share = px.area(df_target, x='month', y='share', color='구간',
+                            title=f"{seg_target} - 월별 {dimension_names[seg_dimension]} 비중",
+                            labels={'share': '비중', 'month': '월'}, category_orders={'구간': list(labels.values())})
+        st.plotly_chart(fig_share, use_container_width=True)
+
+        # 그래프: 분야 전체와 키워드들의 평균 구간 비중 비교
+        df_cmp = df_dim.groupby(['대상', '구간'], observed=True)['share'].mean().reset_index()
+        fig_cmp = px.bar(df_cmp, x='구간', y='share', color='대상', barmode='group',
+                         title=f"대상별 평균 {dimension_names[seg_dimension]} 비중",
+                         labels={'share': '평균 비중'}, category_orders={'구간': list(labels.values())})
+        st.plotly_chart(fig_cmp, use_container_width=True)
+
+        # 그래프: 분야 안 키워드별 클릭 추이 (같은 스케일)
+        df_kw = df_cat[df_cat['dimension'] == 'keywords']
+        if not df_kw.empty:
+            fig_kw = px.line(df_kw, x='month', y='ratio_mean', color='segment', markers=True,
+                             title="분야 내 키워드별 월평균 클릭 추이",
+                             labels={'ratio_mean': '평균 비율', 'month': '월', 'segment': '키워드'})
+            st.plotly_chart(fig_kw, use_container_width=True)
+
+# 키워드 일괄 비교: 50~200개 키워드의 증가율/검색량/가격대/블로그 화제성 순위표
+@profiling.timed("tab.batch")
+def render_batch_tab():
+    px = get_px()
+    import keyword_batch
+    from trend_analytics import GROWTH_DAYS
+    st.header("키워드 일괄 비교")
+    batch_names = keyword_batch.batches()
+    if not batch_names:
+        st.info("비교 결과가 없습니다. `python keyword_batch.py run --keywords-file keywords.txt`로 실행하세요.")
+        return
+    batch = st.selectbox("배치", batch_names)
+    board, df_batch_trend = load_leaderboard(batch)
+    status = board['status'].value_counts()
+    col_b1, col_b2, col_b3 = st.columns(3)
+    col_b1.metric("키워드 수", f"{len(board):,}")
+    col_b2.metric("분석 완료", f"{status.get('ok', 0):,}")
+    col_b3.metric("데이터 없음/실패", f"{len(board) - status.get('ok', 0):,}")
+
+    # 종합 점수: 증가율/검색량/블로그 화제성 백분위 평균 (가격대는 순위만 표시)
+    top_n = st.slider("상위 키워드 수", 5, min(50, max(len(board), 5)), min(20, max(len(board), 5)))
+    df_top = board.dropna(subset=['score']).head(top_n)
+    fig_score = px.bar(df_top.iloc[::-1], x='score', y='keyword', orientation='h', color='trend_growth',
+                       color_continuous_scale='RdYlGn', title=f"종합 점수 상위 {top_n}개",
+                       labels={'score': '종합 점수', 'keyword': '키워드', 'trend_growth': '증가율'})
+    st.plotly_chart(fig_score, use_container_width=True)
+
+    col_c1, col_c2 = st.columns(2)
+    with col_c1:
+        df_scatter = board.dropna(subset=['trend_growth', 'trend_volume'])
+        fig_map = px.scatter(df_scatter, x='trend_volume', y='trend_growth',
+                             size=df_scatter['blog_recent'].fillna(0).clip(lower=1), color='price_median',
+                             hover_name='keyword', title="검색량 대비 증가율 (크기: 최근 블로그 글 수, 색: 중앙 가격)",
+                             labels={'trend_volume': f'최근 {keyword_batch.VOLUME_DAYS}일 평균 검색 비율',
+                                     'trend_growth': '증가율', 'price_median': '중앙 가격'})
+        st.plotly_chart(fig_map, use_container_width=True)
+    with col_c2:
+        if df_batch_trend is not None and not df_batch_trend.empty:
+            top_keywords = list(df_top['keyword'].head(5))
+            df_lines = df_batch_trend[df_batch_trend['keyword'].isin(top_keywords)]
+            fig_lines = px.line(df_lines, x='date', y='ratio', color='keyword',
+                                title="상위 5개 키워드 검색 추이 (한 스케일)")
+            st.plotly_chart(fig_lines, use_container_width=True)
+
+    columns = {'keyword': '키워드', 'status': '상태', 'score': '종합 점수', 'trend_growth': '증가율',
+               'trend_volume': '검색량', 'price_median': '중앙 가격', 'bait_share': '미끼 저가 비율',
+               'shop_items': '상품 수', 'blog_recent': '최근 블로그 글', 'buzz_growth': '화제성 증가율',
+               'rank_growth': '증가율 순위', 'rank_volume': '검색량 순위', 'rank_price': '가격 순위',
+               'rank_buzz': '화제성 순위', 'trend_peak': '정점일', 'error': '오류'}
+    st.dataframe(board[list(columns)].rename(columns=columns)
+                 .style.format({'종합 점수': '{:.1f}', '증가율': '{:+.1%}', '검색량': '{:.1f}',
+                                '중앙 가격': '{:,.0f}', '미끼 저가 비율': '{:.1%}', '화제성 증가율': '{:+.1%}'},
+                               na_rep='-'),
+                 use_container_width=True, hide_index=True)
+    st.caption(f"증가율: 평활 검색 비율의 {GROWTH_DAYS}일 전 대비 변화, "
+               f"화제성: 최근 {keyword_batch.BUZZ_DAYS}일 블로그 글 수의 직전 {keyword_batch.BUZZ_DAYS}일 대비 변화")
+
 # Tab 4: 데이터 원본
-with tab4:
+@profiling.timed("tab.raw")
+def render_raw_tab():
+    import data_browser
     st.header("수집 데이터 상세보기")
     data_choice = st.selectbox("표시할 데이터를 선택하세요", ["검색 트렌드", "쇼핑 상품", "블로그 게시물"])
-    
-    if data_choice == "검색 트렌드":
-        st.dataframe(df_trend_filtered, use_container_width=True)
-    elif data_choice == "쇼핑 상품":
-        st.dataframe(df_shop_filtered, use_container_width=True)
-    else:
-        st.dataframe(df_blog_filtered, use_container_width=True)
+    dataset = {"검색 트렌드": "trend", "쇼핑 상품": "shop", "블로그 게시물": "blog"}[data_choice]
+    # 전체 프레임 대신 검색/필터/정렬을 서버에서 적용한 현재 페이지만 전송
+    data_browser.render(st, get_browser_source(dataset), f"raw_{dataset}", keywords=selected_keywords)
+
+{"trend": render_trend_tab, "shop": render_shop_tab, "blog": render_blog_tab,
+ "segments": render_segments_tab, "batch": render_batch_tab, "raw": render_raw_tab}[active_tab]()
 
 st.markdown("---")
 st.caption("Produced by Antigravity © 2026 | Naver API Project")
+
+profiling.render_panel(st, profiler)
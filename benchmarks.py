@@ -0,0 +1,319 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import storage
+import aggregates
+from settings import DATA_DIR
+from synthetic_data import write as write_synthetic, keyword_list
+from data_registry import DatasetRegistry
+from text_analytics import TopicMatcher, TopicCounter
+
+# 수집/대시보드 파이프라인 벤치마크 모음
+# 합성 데이터(synthetic_data.py)를 행 수별로 한 번 만들어 두고 단계별 시간을 잰 뒤,
+# 결과를 raw_data/benchmarks.jsonl에 한 줄씩 쌓아 같은 머신의 이전 실행과 비교한다.
+#   load       저장소/CSV 로드 + 레지스트리(정렬, 파생 컬럼)
+#   filter     사이드바 키워드 선택 -> 공유 프레임 뷰
+#   aggregate  키워드별 부분 집계 생성 + 선택 병합(요약/월별/기술통계)
+#   pivot      판매처 x 키워드 가격, 카테고리 x 키워드 개수
+#   corr       상관계수 행렬
+#   text       블로그 토픽 매칭 (전체 + 일자별)
+#   collect    스텁 서버에서 검색 API 페이지 수집 -> 저장소/이력/동일 상품 색인/가격 감시 기록 (행 수와 무관)
+#   startup    새 프로세스에서 Streamlit 앱의 최상위 import, 첫 화면(콜드 스타트), rerun 시간
+#              (대시보드는 행 수별 합성 저장소, 실시간 앱은 스텁 서버 사용)
+
+HISTORY_FILE = os.path.join(DATA_DIR, "benchmarks.jsonl")
+BENCH_DIR = os.path.join(tempfile.gettempdir(), "naver_bench")
+CASES = ["load", "filter", "aggregate", "pivot", "corr", "text", "collect", "startup"]
+STARTUP_APPS = {"dashboard": "app_dashboard.py", "app": "app.py"}
+DEFAULT_ROWS = [1_000, 100_000]
+REGRESSION_THRESHOLD = 0.2
+BASELINE_RUNS = 5
+
+
+def _timeit(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {"median_ms": round(timings[len(timings) // 2] * 1000, 3), "min_ms": round(timings[0] * 1000, 3)}
+
+
+def prepare(rows, bench_dir=BENCH_DIR, seed=0):
+    # 행 수/시드별 합성 데이터 (이미 만들어 둔 것은 재사용)
+    path = os.path.join(bench_dir, f"rows={rows}-seed={seed}")
+    if not os.path.exists(os.path.join(path, "done")):
+        shutil.rmtree(path, ignore_errors=True)
+        started = time.perf_counter()
+        write_synthetic(rows, os.path.join(path, "store"), os.path.join(path, "csv"), seed=seed)
+        open(os.path.join(path, "done"), "w").close()
+        print(f"Generated {rows:,} rows in {time.perf_counter() - started:.1f}s -> {path}")
+    return os.path.join(path, "store"), os.path.join(path, "csv")
+
+
+def _selections(keywords, n=5, seed=1):
+    rng = np.random.default_rng(seed)
+    return [keywords] + [list(rng.choice(keywords, size=rng.integers(1, 4), replace=False)) for _ in range(n - 1)]
+
+
+def data_cases(rows, repeat=5, seed=0, cases=None):
+    cases = cases or CASES
+    store_dir, csv_dir = prepare(rows, seed=seed)
+    df_trend, df_blog, df_shop = storage._load_store_path(store_dir)
+    frames = {"trend": (df_trend.drop(columns=["collected"]), "keyword_group"),
+              "shop": (df_shop.drop(columns=["collected"]), "keyword"),
+              "blog": (df_blog.drop(columns=["collected"]), "keyword")}
+    registry = DatasetRegistry(frames)
+    aggs = aggregates.build_aggregates(registry.frame("trend"), registry.frame("shop"), registry.frame("blog"))
+    selections = _selections(keyword_list(20))
+
+    def each(fn):
+        return lambda: [fn(keywords) for keywords in selections]
+
+    bench = {}
+    if "load" in cases:
+        bench["load.store"] = lambda: storage._load_store_path(store_dir)
+        bench["load.csv"] = lambda: storage._load_csv_path(csv_dir)
+        bench["load.registry"] = lambda: DatasetRegistry(frames)
+    if "filter" in cases:
+        bench["filter.view"] = each(lambda kws: [registry.view(name, kws) for name in frames])
+        bench["filter.isin"] = each(lambda kws: [df[df[col].isin(kws)] for df, col in frames.values()])
+    if "aggregate" in cases:
+        bench["aggregate.build"] = lambda: aggregates.build_aggregates(
+            registry.frame("trend"), registry.frame("shop"), registry.frame("blog"))
+        bench["aggregate.select"] = each(lambda kws: (aggregates.trend_summary(aggs, kws),
+                                                      aggregates.monthly_trend(aggs, kws),
+                                                      aggregates.shop_describe(aggs, kws),
+                                                      aggregates.blog_daily(aggs, kws)))
+    if "pivot" in cases:
+        bench["pivot.merged"] = each(lambda kws: (aggregates.mall_price_pivot(aggs, kws),
+                                                  aggregates.category_pivot(aggs, kws)))
+    if "corr" in cases:
+        bench["corr.merged"] = each(lambda kws: aggregates.shop_corr(aggs, kws))
+        bench["corr.direct"] = lambda: registry.frame("shop")[aggregates.CORR_COLUMNS].corr()
+    if "text" in cases:
+        matcher = TopicMatcher()
+
+        def _topics():
+            counter = TopicCounter(matcher)
+            counter.update(registry.frame("blog"))
+            return counter.totals(), counter.daily()
+        bench["text.topics"] = _topics
+
+    results = {}
+    for name, fn in bench.items():
+        # 대용량에서는 반복 횟수를 줄임
+        results[name] = _timeit(fn, repeat if rows <= 1_000_000 else 1)
+        print(f"  rows={rows:>10,} {name:<18} median {results[name]['median_ms']:10.1f}ms")
+    return results
+
+
+def collect_case(keywords=2, latency=0.01, repeat=3):
+    # 스텁 서버에서 키워드 x (blog, shop) x 1000건 윈도우를 수집해 저장소/이력에 기록하는 처리량
+    # 호출 한도의 초당 허용량은 풀어서 파이프라인 자체의 처리 시간만 잰다
+    from mock_naver_server import start_mock_server
+    from naver_api import NaverClient, iter_search_items
+    from rate_limiter import RequestScheduler, DailyUsage, QUOTA_GROUPS
+    from ingest import save_search
+
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_mock_server(latency=latency)
+    groups = {name: dict(cfg, per_sec=1000, daily=10 ** 9) for name, cfg in QUOTA_GROUPS.items()}
+    client = NaverClient("test", "test", base_url=base_url,
+                         scheduler=RequestScheduler(groups, DailyUsage(os.path.join(workdir, "usage.sqlite"))))
+    items_total = []
+
+    def _items(api_type):
+        for kw in keyword_list(keywords):
+            for item in iter_search_items(client, api_type, kw):
+                item['keyword'] = kw
+                yield item
+
+    def _collect():
+        for api_type in ["blog", "shop"]:
+            items_total.append(save_search(api_type, _items(api_type), store_dir=os.path.join(workdir, "store"),
+                                           history_path=os.path.join(workdir, "history.sqlite"),
+                                           cluster_path=os.path.join(workdir, "clusters.sqlite"),
+                                           price_path=os.path.join(workdir, "prices.sqlite")))
+
+    before = server.request_count
+    result = _timeit(_collect, repeat)
+    requests = (server.request_count - before) // repeat
+    items = sum(items_total) // repeat
+    result.update(requests=requests, items=items,
+                  items_per_s=round(items / (result["median_ms"] / 1000), 1))
+    server.shutdown()
+    client.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"  collect: {requests} requests, {items} items, median {result['median_ms']:.1f}ms "
+          f"({result['items_per_s']:,.0f} items/s)")
+    return {"collect.search": result}
+
+
+def startup_run(app):
+    # startup_case가 띄우는 새 프로세스 안에서 실행됨: streamlit 로드 후 앱 최상위 import, 첫 실행, rerun을 잼
+    import ast
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), STARTUP_APPS[app])
+    sys.path.insert(0, os.path.dirname(path))
+    from streamlit.testing.v1 import AppTest
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    imports = ast.Module([node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))], [])
+    server = None
+    if app == "app":
+        from mock_naver_server import start_mock_server
+        server, base_url = start_mock_server()
+        os.environ["NAVER_API_BASE_URL"] = base_url
+
+    started = time.perf_counter()
+    exec(compile(imports, path, "exec"), {})
+    imported = time.perf_counter()
+    at = AppTest.from_file(path, default_timeout=600)
+    if app == "app":
+        at.secrets["NAVER_CLIENT_ID"] = "test"
+        at.secrets["NAVER_CLIENT_SECRET"] = "test"
+    at.run()
+    first = time.perf_counter()
+    at.run()
+    rerun = time.perf_counter()
+    if server:
+        server.shutdown()
+    errors = [str(e.value) for e in list(at.exception) + list(at.error)]
+    return {"import_ms": (imported - started) * 1000, "first_ms": (first - imported) * 1000,
+            "rerun_ms": (rerun - first) * 1000, "errors": errors}
+
+
+def startup_case(app, rows=None, repeat=3, seed=0):
+    # 앱마다 새 프로세스를 repeat번 띄워 모듈 캐시/st.cache가 비어 있는 콜드 스타트를 잰다
+    env = dict(os.environ)
+    workdir = tempfile.mkdtemp()
+    env["NAVER_STATE_DIR"] = os.path.join(workdir, "state")
+    env["NAVER_DATA_DIR"] = os.path.dirname(prepare(rows, seed=seed)[0]) if app == "dashboard" else os.path.join(workdir, "data")
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "startup-run", "--app", app],
+                              capture_output=True, text=True, env=env, cwd=workdir)
+        if proc.returncode != 0:
+            raise RuntimeError(f"startup-run {app} failed: {proc.stderr[-2000:]}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        if runs[-1]["errors"]:
+            raise RuntimeError(f"startup-run {app} raised: {runs[-1]['errors']}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {}
+    for step in ["import", "first", "rerun"]:
+        timings = sorted(r[f"{step}_ms"] for r in runs)
+        results[f"startup.{app}.{step}"] = {"median_ms": round(timings[len(timings) // 2], 3),
+                                            "min_ms": round(timings[0], 3)}
+    label = f"rows={rows:>10,} " if rows is not None else ""
+    print(f"  {label}startup.{app}: import {results[f'startup.{app}.import']['median_ms']:.0f}ms, "
+          f"first {results[f'startup.{app}.first']['median_ms']:.0f}ms, "
+          f"rerun {results[f'startup.{app}.rerun']['median_ms']:.0f}ms")
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def machine():
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}cpu|py{platform.python_version()}"
+
+
+def run(rows_list=None, cases=None, repeat=5, seed=0, history_file=HISTORY_FILE):
+    cases = cases or CASES
+    results = {}
+    for rows in rows_list or DEFAULT_ROWS:
+        print(f"[rows={rows:,}]")
+        # 대시보드와 같은 조건(Copy-on-Write)에서 측정
+        with pd.option_context("mode.copy_on_write", True):
+            for name, r in data_cases(rows, repeat, seed, cases).items():
+                results[f"{name}@{rows}"] = r
+        if "startup" in cases:
+            for name, r in startup_case("dashboard", rows, seed=seed).items():
+                results[f"{name}@{rows}"] = r
+    if "collect" in cases:
+        for name, r in collect_case().items():
+            results[name] = r
+    if "startup" in cases:
+        for name, r in startup_case("app").items():
+            results[name] = r
+    record = {"ts": datetime.now().isoformat(timespec="seconds"), "commit": _commit(), "machine": machine(),
+              "pandas": pd.__version__, "results": results}
+    if history_file:
+        os.makedirs(os.path.dirname(history_file) or ".", exist_ok=True)
+        with open(history_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+
+def load_history(history_file=HISTORY_FILE):
+    if not os.path.exists(history_file):
+        return []
+    with open(history_file, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare(record, history, threshold=REGRESSION_THRESHOLD, baseline_runs=BASELINE_RUNS):
+    # 같은 머신의 직전 baseline_runs번 실행 중앙값 대비 threshold 이상 느려진 항목을 회귀로 표시
+    previous = [h for h in history if h["machine"] == record["machine"] and h["ts"] < record["ts"]]
+    previous = previous[-baseline_runs:]
+    regressions = []
+    print(f"\n{'case':<34}{'median ms':>12}{'baseline':>12}{'change':>9}")
+    for name, r in record["results"].items():
+        base = [h["results"][name]["median_ms"] for h in previous if name in h["results"]]
+        if not base:
+            print(f"{name:<34}{r['median_ms']:>12.1f}{'-':>12}{'new':>9}")
+            continue
+        baseline = float(np.median(base))
+        change = r["median_ms"] / baseline - 1 if baseline else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<34}{r['median_ms']:>12.1f}{baseline:>12.1f}{change:>+8.0%}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="수집/대시보드 파이프라인 벤치마크 (합성 데이터)")
+    parser.add_argument("command", choices=["run", "history", "startup-run"], nargs="?", default="run")
+    parser.add_argument("--app", choices=list(STARTUP_APPS), default="dashboard", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS,
+                        help="데이터셋별 행 수 (예: 1000 100000 10000000)")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"쉼표 구분 ({','.join(CASES)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--history-file", default=HISTORY_FILE)
+    parser.add_argument("--no-save", action="store_true", help="결과를 이력에 기록하지 않음")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "startup-run":
+        print(json.dumps(startup_run(args.app)))
+        sys.exit(0)
+    history = load_history(args.history_file)
+    if args.command == "history":
+        for h in history:
+            print(h["ts"], h["commit"], h["machine"], f"{len(h['results'])} cases")
+        sys.exit(0)
+    record = run(args.rows, args.cases.split(","), args.repeat,
+                 history_file=None if args.no_save else args.history_file)
+    regressions = compare(record, history, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
@@ -0,0 +1,182 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# 차트 데이터 축소 계층
+# 브라우저로 원본 행을 그대로 보내지 않고 서버에서 점 수를 줄인다.
+# - 시계열: 그룹별 LTTB(Largest-Triangle-Three-Buckets) 또는 구간별 최소/최대 다운샘플링 (봉우리 유지)
+# - 박스플롯: 그룹별 사분위수/수염 위치를 미리 계산하고 이상치만 일부 점으로 전달
+# - 보이는 구간(기간 슬라이더)을 먼저 자르고, 그 안의 점 수가 예산(POINT_BUDGET)을 넘을 때만 축소한다.
+#   짧은 구간을 고르면 원본 해상도(일 단위)로 돌아간다.
+
+POINT_BUDGET = 2000
+MAX_OUTLIERS = 50
+
+
+def lttb(x, y, n_out):
+    # x는 정렬된 수치 배열. 첫/마지막 점을 유지하고 구간마다 삼각형 넓이가 가장 큰 점 하나를 고른 인덱스
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # 다음 구간의 평균점
+        nxt_start, nxt_end = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[nxt_start:nxt_end].mean()
+        avg_y = y[nxt_start:nxt_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x, y, n_out):
+    # 구간마다 최소/최대 점 두 개 (합계가 n_out 이하), 급등/급락 값을 빠뜨리지 않음
+    n = len(x)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    n_buckets = n_out // 2
+    bucket = np.minimum((np.arange(n) * n_buckets) // n, n_buckets - 1)
+    order = np.lexsort((y, bucket))
+    bounds = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[bounds[1:], n] - 1
+    return np.unique(np.r_[order[bounds], order[ends]])
+
+
+METHODS = {"lttb": lttb, "minmax": minmax}
+
+
+def _numeric(values):
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def downsample(df, x, y, group=None, budget=POINT_BUDGET, method="lttb"):
+    # 그룹(선)마다 예산을 나눠 점 수를 줄임. 반환: (축소된 DataFrame, 원본 점 수)
+    n = len(df)
+    if n <= budget:
+        return df, n
+    groups = [(None, df)] if group is None else list(df.groupby(group, observed=True, sort=False))
+    per_group = max(4, budget // max(1, len(groups)))
+    parts = []
+    for _, part in groups:
+        part = part.sort_values(x)
+        values = part[y].to_numpy(float)
+        idx = METHODS[method](_numeric(part[x].to_numpy()), values, per_group)
+        # 그룹의 최고/최저점은 항상 포함
+        if len(values):
+            idx = np.union1d(idx, [np.nanargmax(values), np.nanargmin(values)])
+        parts.append(part.iloc[idx])
+    return pd.concat(parts, ignore_index=True), n
+
+
+def visible(df, x, start=None, end=None):
+    # 기간 슬라이더로 고른 보이는 구간
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df[x] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df[x] <= pd.Timestamp(end)).to_numpy()
+    return df[mask]
+
+
+def series_for_chart(df, x, y, group=None, start=None, end=None, budget=POINT_BUDGET, method="lttb"):
+    # 보이는 구간을 자른 뒤 예산 안으로 축소. 반환: (DataFrame, 설명 문자열)
+    view = visible(df, x, start, end)
+    reduced, n = downsample(view, x, y, group, budget, method)
+    note = f"{len(reduced):,}/{n:,}개 점" + (f" ({method.upper()})" if len(reduced) < n else "")
+    return reduced, note
+
+
+def box_stats(df, group, value, max_outliers=MAX_OUTLIERS):
+    # 그룹별 사분위수와 1.5 IQR 수염(범위 안의 가장 먼 실제 값), 이상치는 위/아래 극단값부터 최대 max_outliers개
+    stats, outliers = [], []
+    for key, values in df.groupby(group, observed=True)[value]:
+        v = np.sort(values.dropna().to_numpy(float))
+        if not len(v):
+            continue
+        q1, median, q3 = np.quantile(v, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = v[(v >= q1 - 1.5 * iqr) & (v <= q3 + 1.5 * iqr)]
+        lower, upper = (inside[0], inside[-1]) if len(inside) else (v[0], v[-1])
+        out = v[(v < lower) | (v > upper)]
+        if len(out) > max_outliers:
+            # 양 끝 극단값 위주로 남김
+            half = max_outliers // 2
+            out = np.r_[out[:half], out[-(max_outliers - half):]]
+        stats.append({group: key, "n": len(v), "q1": q1, "median": median, "q3": q3, "lowerfence": lower,
+                      "upperfence": upper, "mean": v.mean(), "outliers": int(((v < lower) | (v > upper)).sum())})
+        outliers += [{group: key, value: o} for o in out]
+    columns = [group, "n", "q1", "median", "q3", "lowerfence", "upperfence", "mean", "outliers"]
+    return pd.DataFrame(stats, columns=columns), pd.DataFrame(outliers, columns=[group, value])
+
+
+def box_figure(stats, outliers, group, value, title=None, labels=None):
+    # 미리 계산한 통계로 그리는 박스플롯 (px.box(points="all")와 같은 모양, 이상치만 점으로 표시)
+    import plotly.graph_objects as go
+    from plotly.colors import qualitative
+    labels = labels or {}
+    fig = go.Figure()
+    palette = qualitative.Plotly
+    for i, row in enumerate(stats.itertuples(index=False)):
+        key = getattr(row, group)
+        color = palette[i % len(palette)]
+        fig.add_trace(go.Box(x=[key], q1=[row.q1], median=[row.median], q3=[row.q3],
+                             lowerfence=[row.lowerfence], upperfence=[row.upperfence], mean=[row.mean],
+                             name=str(key), marker_color=color, boxpoints=False))
+        pts = outliers[outliers[group] == key][value]
+        if len(pts):
+            fig.add_trace(go.Scatter(x=[key] * len(pts), y=pts, mode="markers", name=f"{key} 이상치",
+                                     marker=dict(color=color, size=5, opacity=0.6), showlegend=False))
+    fig.update_layout(title=title, xaxis_title=labels.get(group, group), yaxis_title=labels.get(value, value))
+    return fig
+
+
+def payload_bytes(fig):
+    # 브라우저로 보내는 그림 JSON 크기
+    return len(fig.to_json())
+
+
+def benchmark(rows=1_000_000, keywords=40, budget=POINT_BUDGET):
+    # 합성 데이터로 원본 그대로 그린 그림과 축소한 그림의 JSON 크기와 봉우리 유지 여부 비교
+    import plotly.express as px
+    from synthetic_data import trend_frame, shop_frame, keyword_list
+    kws = keyword_list(keywords)
+    trend = trend_frame(rows, kws)
+    shop = shop_frame(min(rows, 200_000), kws)
+    print(f"trend rows={len(trend):,} groups={trend['keyword_group'].nunique()} | shop rows={len(shop):,}")
+
+    started = time.perf_counter()
+    reduced, _ = downsample(trend, "date", "ratio", "keyword_group", budget)
+    reduce_s = time.perf_counter() - started
+    raw_size = payload_bytes(px.line(trend, x="date", y="ratio", color="keyword_group"))
+    small_size = payload_bytes(px.line(reduced, x="date", y="ratio", color="keyword_group"))
+    peaks_kept = (trend.groupby("keyword_group", observed=True)["ratio"].max()
+                  .eq(reduced.groupby("keyword_group", observed=True)["ratio"].max())).mean()
+    print(f"[line] {len(trend):,} -> {len(reduced):,} points | payload {raw_size / 1e6:.1f}MB -> "
+          f"{small_size / 1e6:.2f}MB (x{raw_size / small_size:.0f}) | peaks kept {peaks_kept:.0%} | "
+          f"LTTB {reduce_s * 1000:.0f}ms")
+
+    started = time.perf_counter()
+    stats, outliers = box_stats(shop, "keyword", "lprice")
+    box_s = time.perf_counter() - started
+    raw_size = payload_bytes(px.box(shop, x="keyword", y="lprice", color="keyword", points="all"))
+    small_size = payload_bytes(box_figure(stats, outliers, "keyword", "lprice"))
+    print(f"[box] {len(shop):,} points -> {len(stats)} boxes + {len(outliers)} outliers | payload "
+          f"{raw_size / 1e6:.1f}MB -> {small_size / 1e6:.3f}MB (x{raw_size / small_size:.0f}) | "
+          f"stats {box_s * 1000:.0f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="차트 데이터 축소 벤치마크 (합성 데이터)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--keywords", type=int, default=40)
+    parser.add_argument("--budget", type=int, default=POINT_BUDGET)
+    args = parser.parse_args()
+    benchmark(args.rows, args.keywords, args.budget)
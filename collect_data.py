@@ -1,9 +1,17 @@
 import os
-import json
-import urllib.request
+import argparse
 import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
+from naver_api import (get_client, search_path, endpoint_name, iter_search_items,
+                       SEARCH_SORTS, SEARCH_ITEM_KEYS)
+from datalab_incremental import update_trend
+from datalab_planner import (trend_calls, shopping_calls, stitch_responses, fetch_trend,
+                             fetch_shopping_categories)
+from ingest import SearchIngest, save_search, search_page_parser, iter_search_pages
+from shopping_insight import collect_segments, save_segments
+import storage
+from settings import DATA_DIR
 
 # .env 파일 로드
 load_dotenv()
@@ -11,116 +19,201 @@ load_dotenv()
 CLIENT_ID = os.getenv("NAVER_CLIENT_ID")
 CLIENT_SECRET = os.getenv("NAVER_CLIENT_SECRET")
 
-def get_header():
-    return {
-        "X-Naver-Client-Id": CLIENT_ID,
-        "X-Naver-Client-Secret": CLIENT_SECRET,
-        "Content-Type": "application/json"
-    }
-
-def save_to_csv(data_list, filename_prefix):
-    timestamp = datetime.now().strftime("%Y%m%d")
-    filename = f"raw_data/{filename_prefix}_{timestamp}.csv"
-    if not data_list:
-        print(f"No data to save for {filename_prefix}")
-        return
-    df = pd.DataFrame(data_list)
-    df.to_csv(filename, index=False, encoding="utf-8-sig")
-    print(f"Saved: {filename}")
+def save_snapshot(data_list, dataset):
+    # 컬럼형 저장소(raw_data/store)에 수집일 파티션으로 추가
+    storage.append(dataset, data_list)
+
+def save_search_results(items, api_type):
+    # 스냅샷 저장 + productId/link 기준 이력 갱신 (변경된 값만 기록) + 동일 상품 색인
+    # items는 반복자여도 됨: 묶음(ingest.BATCH_ROWS) 단위로 나눠 저장하므로 전체를 리스트로 들고 있지 않음
+    save_search(api_type, items)
+
+def load_latest_csv(filename_prefix):
+    # DATA_DIR(기본 raw_data/)에서 해당 접두어의 가장 최근 스냅샷
+    if not os.path.isdir(DATA_DIR):
+        return None
+    files = sorted(f for f in os.listdir(DATA_DIR) if f.startswith(filename_prefix + "_"))
+    if not files:
+        return None
+    return pd.read_csv(os.path.join(DATA_DIR, files[-1]))
+
+def load_latest(dataset):
+    # 저장소의 최신 수집분, 저장소가 비어 있으면 이전 CSV 스냅샷
+    df = storage.read(dataset, latest=True)
+    if df is None:
+        return load_latest_csv(storage.DATASETS[dataset]["prefix"])
+    return df.drop(columns=["collected"])
+
+TREND_KEYWORD_GROUPS = [
+    {"groupName": "두바이 쫀득쿠키", "keywords": ["두바이 쫀득쿠키", "두바이쿠키"]},
+    {"groupName": "두바이 초콜릿", "keywords": ["두바이 초콜릿", "두바이초코"]}
+]
+TREND_START_DATE = "2025-01-01"
+SHOPPING_CATEGORIES = [{"name": "식품", "param": ["50000006"]}]
+# 쇼핑인사이트 구간별 수집 대상 키워드 (분야 코드별)
+SHOPPING_KEYWORDS = {"50000006": ["두바이 쫀득쿠키", "두바이 초콜릿"]}
+
+# 요청 정의 (엔진에 넘길 path/params/body)
+# DataLab/쇼핑인사이트는 planner가 나눈 묶음 요청 목록과 기준 그룹 이름 (응답은 stitch_responses로 합침)
+def datalab_search_calls():
+    return trend_calls(TREND_KEYWORD_GROUPS, TREND_START_DATE, "2025-12-31")
 
-def collect_datalab_search():
+def shopping_insight_calls():
+    # 식품(50000006)으로 테스트
+    return shopping_calls(SHOPPING_CATEGORIES, "2025-01-01", "2025-12-31")
+
+def search_call(api_type, kw):
+    return {"path": search_path(api_type), "params": {"query": kw, "display": 100}}
+
+def collect_datalab_search(client=None, incremental=False):
     print("Collecting Datalab Search Trends...")
-    url = "https://openapi.naver.com/v1/datalab/search"
-    body = {
-        "startDate": "2025-01-01",
-        "endDate": "2025-12-31",
-        "timeUnit": "date",
-        "keywordGroups": [
-            {"groupName": "두바이 쫀득쿠키", "keywords": ["두바이 쫀득쿠키", "두바이쿠키"]},
-            {"groupName": "두바이 초콜릿", "keywords": ["두바이 초콜릿", "두바이초코"]}
-        ]
-    }
-    
-    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), headers=get_header())
+    client = client or get_client()
     try:
-        response = urllib.request.urlopen(request)
-        res_body = json.loads(response.read().decode("utf-8"))
-        
-        results = []
-        for group in res_body['results']:
-            title = group['title']
-            for item in group['data']:
-                results.append({
-                    "date": item['period'],
-                    "keyword_group": title,
-                    "ratio": item['ratio']
-                })
-        save_to_csv(results, "dubai_search_trend_2025")
+        if incremental:
+            collect_datalab_search_incremental(client)
+            return
+        # 그룹이 많으면 기준 그룹을 공유하는 최소 개수의 요청으로 나눠 받음
+        df = fetch_trend(client, TREND_KEYWORD_GROUPS, TREND_START_DATE, "2025-12-31")
+        save_snapshot(df, "trend")
     except Exception as e:
         print(f"Error in Datalab Search: {e}")
 
-def collect_shopping_insight():
+def collect_datalab_search_incremental(client):
+    # 마지막 스냅샷 이후 날짜(+재스케일용 겹침 구간)만 요청해 기존 시계열에 이어 붙임
+    existing = load_latest("trend")
+    end_date = datetime.now().strftime("%Y-%m-%d")
+    df, fetched = update_trend(client, TREND_KEYWORD_GROUPS, existing, TREND_START_DATE, end_date)
+    if fetched is None:
+        print("Datalab Search Trends already up to date.")
+        return
+    print(f"Fetched {fetched[0]} ~ {fetched[1]}")
+    save_snapshot(df, "trend")
+
+def collect_shopping_insight(client=None):
     print("Collecting Shopping Insight...")
-    url = "https://openapi.naver.com/v1/datalab/shopping/categories"
-    # 식품(50000006)으로 테스트
-    body = {
-        "startDate": "2025-01-01",
-        "endDate": "2025-12-31",
-        "timeUnit": "date",
-        "category": [
-            {"name": "식품", "param": ["50000006"]}
-        ]
-    }
-    
-    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), headers=get_header())
+    client = client or get_client()
     try:
-        response = urllib.request.urlopen(request)
-        res_body = json.loads(response.read().decode("utf-8"))
-        
-        results = []
-        for group in res_body['results']:
-            title = group['title']
-            for item in group['data']:
-                results.append({
-                    "date": item['period'],
-                    "category": title,
-                    "ratio": item['ratio']
-                })
-        save_to_csv(results, "dubai_shopping_trend_2025")
+        df = fetch_shopping_categories(client, SHOPPING_CATEGORIES, "2025-01-01", "2025-12-31")
+        save_snapshot(df, "shopping")
     except Exception as e:
         print(f"Error in Shopping Insight: {e}")
 
-def collect_search_api(api_type, keywords):
+def collect_shopping_segments(client=None):
+    # 분야/키워드 x 기기·성별·연령 구간 추이를 동시에 수집해 long format으로 저장
+    print("Collecting Shopping Insight segments...")
+    client = client or get_client()
+    try:
+        categories = [c["param"][0] for c in SHOPPING_CATEGORIES]
+        df = collect_segments(client, categories, SHOPPING_KEYWORDS, "2025-01-01", "2025-12-31")
+        save_segments(df, save_snapshot)
+    except Exception as e:
+        print(f"Error in Shopping Insight segments: {e}")
+
+def collect_search_api(api_type, keywords, client=None):
     print(f"Collecting Search API ({api_type})...")
-    
-    all_results = []
-    for kw in keywords:
-        encText = urllib.parse.quote(kw)
-        url = f"https://openapi.naver.com/v1/search/{api_type}.json?query={encText}&display=100"
-        
-        request = urllib.request.Request(url)
-        request.add_header("X-Naver-Client-Id", CLIENT_ID)
-        request.add_header("X-Naver-Client-Secret", CLIENT_SECRET)
-        
-        try:
-            response = urllib.request.urlopen(request)
-            res_body = json.loads(response.read().decode("utf-8"))
-            
-            for item in res_body['items']:
-                item['keyword'] = kw
-                all_results.append(item)
-        except Exception as e:
-            print(f"Error in Search {api_type} for {kw}: {e}")
-            
-    save_to_csv(all_results, f"dubai_{api_type}_latest")
+    client = client or get_client()
+    # 응답을 스트리밍으로 파싱한 페이지 버퍼를 받는 대로 적재
+    save_search_results(iter_search_pages(client, api_type, keywords), api_type)
+
+def crawl_search_api(api_type, keywords, sorts=None, client=None):
+    # 키워드 x 정렬 모드별로 start 1~1000 윈도우 전체를 페이지 병렬로 수집해 바로 저장소/이력에 흘려보냄
+    # 정렬 모드끼리 겹치는 아이템은 (키워드, 아이템 키)당 첫 관측만 저장 (상주 수집기와 같은 규칙)
+    print(f"Crawling Search API ({api_type})...")
+    client = client or get_client()
+    sorts = sorts or SEARCH_SORTS[api_type]
+    key_field = SEARCH_ITEM_KEYS[api_type]
+
+    def _items():
+        for kw in keywords:
+            seen = set()
+            for sort in sorts:
+                n = 0
+                try:
+                    for item in iter_search_items(client, api_type, kw, sort=sort):
+                        n += 1
+                        if item.get(key_field) in seen:
+                            continue
+                        seen.add(item.get(key_field))
+                        # rank는 iter_search_items가 응답의 start 기준으로 넣은 값을 그대로 사용
+                        item.update(keyword=kw, sort=sort)
+                        yield item
+                except Exception as e:
+                    print(f"Error in Search {api_type} for {kw} ({sort}): {e}")
+                print(f"  {kw} [{sort}]: {n} items")
+
+    save_search_results(_items(), api_type)
+
+def collect_all(keywords, client=None, incremental=False):
+    # 검색/DataLab/쇼핑인사이트 요청을 한 번에 팬아웃한 뒤 데이터셋별로 저장
+    client = client or get_client()
+    plans = {"shopping": shopping_insight_calls()}
+    if not incremental:
+        plans["trend"] = datalab_search_calls()
+    jobs = [(dataset, None, call) for dataset, (calls, _) in plans.items() for call in calls]
+    for api_type in ["blog", "shop"]:
+        # 검색 응답은 스트리밍으로 파싱해 페이지 버퍼로 받음 (dict 리스트를 만들지 않음)
+        jobs += [(api_type, kw, dict(search_call(api_type, kw), parse=search_page_parser(api_type, kw)))
+                 for kw in keywords]
+
+    print(f"Collecting {len(jobs)} requests (concurrency={client.concurrency})...")
+    bodies = {dataset: [] for dataset in plans}
+    failed = set()
+    ingests = {"blog": SearchIngest("blog"), "shop": SearchIngest("shop")}
+    try:
+        for (dataset, kw, call), (result, error) in zip(jobs, client.iter_all([call for _, _, call in jobs])):
+            if error is not None:
+                print(f"Error in {endpoint_name(call['path'])} ({kw or dataset}): {error}")
+                failed.add(dataset)
+                continue
+            if dataset in plans:
+                bodies[dataset].append(result)
+            else:
+                ingests[dataset].add(result[0])
+
+        if incremental:
+            collect_datalab_search(client, incremental=True)
+        # 묶음 요청 중 하나라도 실패하면 기준 그룹으로 스케일을 맞출 수 없으므로 해당 데이터셋은 저장하지 않음
+        for dataset, label_col in [("trend", "keyword_group"), ("shopping", "category")]:
+            if dataset not in plans:
+                continue
+            if dataset in failed:
+                print(f"Skipping {dataset}: some batched requests failed")
+                continue
+            try:
+                df = stitch_responses(bodies[dataset], plans[dataset][1], label_col)
+            except ValueError as e:
+                # 기준 그룹이 0뿐이면 기준을 바꿔 다시 계획하는 단독 수집으로 넘김
+                print(f"Re-collecting {dataset}: {e}")
+                fallback = collect_datalab_search if dataset == "trend" else collect_shopping_insight
+                fallback(client)
+                continue
+            save_snapshot(df, dataset)
+    finally:
+        for ingest in ingests.values():
+            ingest.close()
+    collect_shopping_segments(client)
 
 if __name__ == "__main__":
     if not CLIENT_ID or "YOUR" in CLIENT_ID:
         print("!!! ERROR: API keys are not set in .env file. Please update .env with valid credentials.")
     else:
+        parser = argparse.ArgumentParser(description="Naver API 데이터 수집")
+        parser.add_argument("--concurrency", type=int, default=None, help="동시 요청 수")
+        parser.add_argument("--deep", action="store_true", help="검색 API를 1000건 윈도우 전체로 페이지 수집")
+        parser.add_argument("--incremental", action="store_true", help="DataLab 트렌드를 마지막 저장일 이후만 수집")
+        parser.add_argument("--segments", action="store_true", help="쇼핑인사이트 구간별 추이만 수집")
+        args = parser.parse_args()
+
         keywords = ["두바이 쫀득쿠키", "두바이 초콜릿"]
-        collect_datalab_search()
-        collect_shopping_insight()
-        collect_search_api("blog", keywords)
-        collect_search_api("shop", keywords)
+        client = get_client(concurrency=args.concurrency)
+        if args.segments:
+            collect_shopping_segments(client)
+        elif args.deep:
+            crawl_search_api("blog", keywords, client=client)
+            crawl_search_api("shop", keywords, client=client)
+        else:
+            collect_all(keywords, client, incremental=args.incremental)
+        client.print_stats()
+        print(f"Remaining daily quota: {client.scheduler.remaining()}")
+        client.close()
         print("Data collection completed.")
@@ -0,0 +1,655 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from naver_api import (get_client, NaverClient, search_path, search_page_starts, SEARCH_ITEM_KEYS,
+                       SEARCH_MAX_DISPLAY)
+from rate_limiter import QuotaExceeded, RequestScheduler, DailyUsage, KST
+from datalab_incremental import update_trend
+from datalab_planner import fetch_shopping_categories
+from shopping_insight import plan_segment_tasks, run_segment_task, check_quota, save_segments, SEGMENT_COLUMNS
+from item_history import HISTORY_DB
+from product_clusters import CLUSTER_DB
+from price_monitor import PRICE_DB
+from ingest import save_search
+from settings import STATE_DIR
+import storage
+
+# 상주 수집기
+# - 작업 명세(collector_jobs.json)의 cron 일정에 맞춰 검색/DataLab/쇼핑인사이트 작업을 실행
+# - 페이지(요청) 하나가 끝날 때마다 응답을 체크포인트 DB에 기록하므로, 프로세스가 죽거나
+#   일일 한도에 걸려 멈춘 실행은 다음 틱에 남은 페이지부터 이어서 수집한다.
+# - 모든 작업(task)이 끝나면 체크포인트에 모인 결과를 저장소/아이템 이력에 한 번에 반영
+
+JOBS_FILE = os.getenv("NAVER_COLLECTOR_JOBS", "collector_jobs.json")
+CHECKPOINT_DB = os.path.join(STATE_DIR, "collector.sqlite")
+TICK_SECONDS = 30
+# 한도 외 오류로 멈춘 실행을 몇 번까지 다시 시도할지
+MAX_ATTEMPTS = 5
+OPEN_STATUSES = ("running", "paused")
+
+
+class CronSchedule:
+    # "분 시 일 월 요일" 5필드 cron 식 (*, */n, a-b, a-b/n, a,b 지원. 요일 0/7=일요일)
+    RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expr):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse(field, lo, hi) for field, (lo, hi) in zip(fields, self.RANGES)]
+        if 7 in self.weekdays:
+            self.weekdays = self.weekdays | {0}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field, lo, hi):
+        values = set()
+        for part in field.split(","):
+            part, _, step = part.partition("/")
+            if part == "*":
+                start, end = lo, hi
+            elif "-" in part:
+                start, end = (int(x) for x in part.split("-"))
+            else:
+                start = end = int(part)
+                if step:
+                    end = hi
+            if start < lo or end > hi:
+                raise ValueError(f"cron field out of range: {field!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def day_matches(self, dt):
+        if dt.month not in self.months:
+            return False
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        # cron 관례: 일/요일이 모두 지정되면 둘 중 하나만 맞아도 실행
+        if self.any_day:
+            return weekday_ok
+        if self.any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def latest(self, now):
+        # now 이전(포함) 가장 최근 실행 시각. 1년 안에 없으면 None
+        t = now.replace(second=0, microsecond=0)
+        limit = t - timedelta(days=366)
+        while t > limit:
+            if not self.day_matches(t):
+                t = t.replace(hour=0, minute=0) - timedelta(minutes=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) - timedelta(minutes=1)
+            elif t.minute not in self.minutes:
+                t -= timedelta(minutes=1)
+            else:
+                return t
+        return None
+
+
+def load_jobs(path=JOBS_FILE):
+    with open(path, encoding="utf-8") as f:
+        jobs = json.load(f)
+    for job in jobs:
+        job["cron"] = CronSchedule(job["schedule"])
+    return {job["name"]: job for job in jobs}
+
+
+def job_tasks(job):
+    # 작업 하나를 체크포인트 단위(task)로 분해. 순서가 곧 실행 순서
+    if job["kind"] == "search":
+        return [{"task": f"{api_type}:{sort}:{kw}", "api_type": api_type, "keyword": kw, "sort": sort}
+                for api_type in job["api_types"] for kw in job["keywords"] for sort in job.get("sorts", ["sim"])]
+    if job["kind"] == "shopping_segments":
+        return plan_segment_tasks(job["categories"], job.get("keywords"), job.get("dimensions"))
+    return [{"task": job["kind"]}]
+
+
+class Checkpoints:
+    # 실행/작업/페이지 단위 진행 상황과 받아 둔 응답
+    def __init__(self, path=CHECKPOINT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT, job TEXT, scheduled TEXT,
+                    started REAL, finished REAL, status TEXT, error TEXT, attempts INTEGER DEFAULT 0,
+                    busy_seconds REAL DEFAULT 0, requests INTEGER DEFAULT 0, items INTEGER DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS tasks (
+                    run_id INTEGER, task TEXT, total INTEGER, done INTEGER DEFAULT 0,
+                    PRIMARY KEY (run_id, task)
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    run_id INTEGER, task TEXT, start INTEGER, rows TEXT,
+                    PRIMARY KEY (run_id, task, start)
+                );
+                CREATE TABLE IF NOT EXISTS sinks (
+                    run_id INTEGER, sink TEXT, PRIMARY KEY (run_id, sink)
+                );
+                CREATE TABLE IF NOT EXISTS schedule (job TEXT PRIMARY KEY, last_slot TEXT);
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    return conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+
+    def start_run(self, job, scheduled):
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    cur = conn.execute("INSERT INTO runs (job, scheduled, started, status) VALUES (?, ?, ?, 'running')",
+                                       (job, scheduled, time.time()))
+                    return cur.lastrowid
+            finally:
+                conn.close()
+
+    def open_runs(self):
+        marks = ",".join("?" * len(OPEN_STATUSES))
+        return self._execute(f"SELECT run_id, job, scheduled, attempts FROM runs WHERE status IN ({marks}) "
+                             f"ORDER BY run_id", OPEN_STATUSES)
+
+    def set_status(self, run_id, status, error=None, busy=0.0, failed_attempt=False):
+        finished = time.time() if status in ("done", "failed") else None
+        self._execute("UPDATE runs SET status = ?, error = ?, busy_seconds = busy_seconds + ?, "
+                      "attempts = attempts + ?, finished = COALESCE(?, finished) WHERE run_id = ?",
+                      (status, error, busy, int(failed_attempt), finished, run_id))
+
+    def task_state(self, run_id, task):
+        rows = self._execute("SELECT total, done FROM tasks WHERE run_id = ? AND task = ?", (run_id, task))
+        return rows[0] if rows else (None, 0)
+
+    def page_starts(self, run_id, task):
+        return {r[0] for r in self._execute("SELECT start FROM pages WHERE run_id = ? AND task = ?", (run_id, task))}
+
+    def save_page(self, run_id, task, start, rows, total=None):
+        # 페이지 응답 기록 + 작업 진행 상황 + 실행 카운터를 한 트랜잭션으로
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                                 (run_id, task, start, json.dumps(rows, ensure_ascii=False, default=str)))
+                    conn.execute("INSERT INTO tasks (run_id, task, total) VALUES (?, ?, ?) "
+                                 "ON CONFLICT (run_id, task) DO UPDATE SET total = COALESCE(tasks.total, excluded.total)",
+                                 (run_id, task, total))
+                    conn.execute("UPDATE runs SET requests = requests + 1, items = items + ? WHERE run_id = ?",
+                                 (len(rows), run_id))
+            finally:
+                conn.close()
+
+    def finish_task(self, run_id, task):
+        self._execute("INSERT INTO tasks (run_id, task, done) VALUES (?, ?, 1) "
+                      "ON CONFLICT (run_id, task) DO UPDATE SET done = 1", (run_id, task))
+
+    def task_rows(self, run_id, task):
+        return list(self.iter_task_rows(run_id, task))
+
+    def iter_task_rows(self, run_id, task):
+        # 페이지 하나씩 읽어 디코드해 흘려보냄 (작업 전체 행을 한꺼번에 올리지 않음)
+        for start in sorted(self.page_starts(run_id, task)):
+            for (data,) in self._execute("SELECT rows FROM pages WHERE run_id = ? AND task = ? AND start = ?",
+                                         (run_id, task, start)):
+                yield from json.loads(data)
+
+    def sink_done(self, run_id, sink):
+        return bool(self._execute("SELECT 1 FROM sinks WHERE run_id = ? AND sink = ?", (run_id, sink)))
+
+    def finish_sink(self, run_id, sink):
+        self._execute("INSERT OR IGNORE INTO sinks VALUES (?, ?)", (run_id, sink))
+
+    def finish_run(self, run_id, busy):
+        # 저장이 끝난 실행은 받아 둔 응답을 지운다
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute("UPDATE runs SET status = 'done', error = NULL, finished = ?, "
+                                 "busy_seconds = busy_seconds + ? WHERE run_id = ?", (time.time(), busy, run_id))
+                    conn.execute("DELETE FROM pages WHERE run_id = ?", (run_id,))
+                    conn.execute("DELETE FROM sinks WHERE run_id = ?", (run_id,))
+            finally:
+                conn.close()
+
+    def last_slot(self, job):
+        rows = self._execute("SELECT last_slot FROM schedule WHERE job = ?", (job,))
+        return rows[0][0] if rows else None
+
+    def set_slot(self, job, slot):
+        self._execute("INSERT OR REPLACE INTO schedule VALUES (?, ?)", (job, slot))
+
+    def runs(self, job=None, limit=20):
+        sql = "SELECT * FROM runs"
+        params = ()
+        if job is not None:
+            sql += " WHERE job = ?"
+            params = (job,)
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(r) for r in conn.execute(sql + " ORDER BY run_id DESC LIMIT ?", params + (limit,))]
+        finally:
+            conn.close()
+
+
+class StoreSink:
+    # 완료된 실행 결과를 저장소, 아이템 이력, 동일 상품 색인, 가격 감시 통계에 반영
+    def __init__(self, store_dir=storage.STORE_DIR, history_path=HISTORY_DB, cluster_path=CLUSTER_DB,
+                 price_path=PRICE_DB):
+        self.store_dir = store_dir
+        self.history_path = history_path
+        self.cluster_path = cluster_path
+        self.price_path = price_path
+
+    def load_latest(self, dataset):
+        df = storage.read(dataset, latest=True, store_dir=self.store_dir)
+        return None if df is None else df.drop(columns=["collected"])
+
+    def save(self, dataset, rows, collected=None):
+        return storage.append(dataset, rows, collected=collected, store_dir=self.store_dir)
+
+    def save_search(self, api_type, items, collected=None):
+        # items: 아이템 반복자. 묶음 단위로 저장소/이력/색인에 나눠 반영 (ingest.save_search)
+        return save_search(api_type, items, collected, self.store_dir, self.history_path, self.cluster_path,
+                           price_path=self.price_path)
+
+
+class CollectorDaemon:
+    def __init__(self, jobs, client=None, checkpoints=None, sink=None, tick=TICK_SECONDS):
+        self.jobs = jobs
+        self.client = client or get_client()
+        self.checkpoints = checkpoints or Checkpoints()
+        self.sink = sink or StoreSink()
+        self.tick = tick
+        self._stop = threading.Event()
+
+    # --- 일정 ---
+    def due_jobs(self, now=None):
+        # 마지막 실행 이후 새 cron 시각이 지난 작업 (처음 보는 작업은 바로 한 번 실행)
+        now = now or datetime.now(KST)
+        due = []
+        for name, job in self.jobs.items():
+            slot = job["cron"].latest(now)
+            if slot is None:
+                continue
+            last = self.checkpoints.last_slot(name)
+            if last is None or slot.isoformat() > last:
+                due.append((name, slot.isoformat()))
+        return due
+
+    def run_pending(self, now=None):
+        # 멈춰 있던 실행을 먼저 이어서 처리한 뒤, 새로 도래한 일정을 시작
+        open_jobs = set()
+        for run_id, name, scheduled, attempts in self.checkpoints.open_runs():
+            job = self.jobs.get(name)
+            if job is None:
+                self.checkpoints.set_status(run_id, "failed", "job removed from spec")
+                continue
+            if not self.run(run_id, job):
+                open_jobs.add(name)
+        for name, slot in self.due_jobs(now):
+            if name in open_jobs:
+                # 이전 실행이 아직 끝나지 않았으면 새 실행을 겹쳐 시작하지 않음
+                continue
+            self.checkpoints.set_slot(name, slot)
+            run_id = self.checkpoints.start_run(name, slot)
+            self.run(run_id, self.jobs[name])
+
+    def serve_forever(self):
+        print(f"Collector daemon started ({len(self.jobs)} jobs, tick={self.tick}s)")
+        while not self._stop.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"Error in collector loop: {e}")
+            self._stop.wait(self.tick)
+
+    def stop(self):
+        self._stop.set()
+
+    # --- 실행 ---
+    def run(self, run_id, job):
+        # 실행이 끝나면 True, 멈추면(한도 초과/오류) False. 어느 쪽이든 진행 상황은 보존된다
+        started = time.perf_counter()
+        self.checkpoints.set_status(run_id, "running")
+        try:
+            if job["kind"] == "shopping_segments":
+                self._run_segment_tasks(run_id, job)
+            for task in job_tasks(job):
+                total, done = self.checkpoints.task_state(run_id, task["task"])
+                if done:
+                    continue
+                if job["kind"] == "search":
+                    self._run_search_task(run_id, job, task, total)
+                elif job["kind"] == "datalab":
+                    self._run_datalab_task(run_id, job, task)
+                else:
+                    self._run_shopping_insight_task(run_id, job, task)
+                self.checkpoints.finish_task(run_id, task["task"])
+            self._finalize(run_id, job)
+        except QuotaExceeded as e:
+            self.checkpoints.set_status(run_id, "paused", str(e), time.perf_counter() - started)
+            print(f"[{job['name']}] run {run_id} paused: {e}")
+            return False
+        except Exception as e:
+            attempts = next((a for r, _, _, a in self.checkpoints.open_runs() if r == run_id), 0) + 1
+            status = "failed" if attempts >= MAX_ATTEMPTS else "paused"
+            self.checkpoints.set_status(run_id, status, f"{type(e).__name__}: {e}",
+                                        time.perf_counter() - started, failed_attempt=True)
+            print(f"[{job['name']}] run {run_id} {status} (attempt {attempts}/{MAX_ATTEMPTS}): {e}")
+            return status == "failed"
+        self.checkpoints.finish_run(run_id, time.perf_counter() - started)
+        print(f"[{job['name']}] run {run_id} done")
+        return True
+
+    def _run_search_task(self, run_id, job, task, total):
+        # 페이지를 동시성 단위(wave)로 요청하고, 응답이 오는 대로 페이지별로 기록
+        max_items = job.get("max_items", SEARCH_MAX_DISPLAY)
+        display = min(SEARCH_MAX_DISPLAY, max_items)
+        done_starts = self.checkpoints.page_starts(run_id, task["task"])
+        starts = [s for s in search_page_starts(max_items, display) if s not in done_starts]
+        while starts:
+            if total is not None:
+                starts = [s for s in starts if s <= total]
+            wave = starts[:1] if total is None else starts[:max(1, self.client.concurrency)]
+            if not wave:
+                return
+            calls = [{"path": search_path(task["api_type"]),
+                      "params": {"query": task["keyword"], "display": display, "start": start, "sort": task["sort"]}}
+                     for start in wave]
+            error, last_page = None, False
+            for start, (res_body, err) in zip(wave, self.client.run_all(calls)):
+                if err is not None:
+                    error = error or err
+                    continue
+                if total is None:
+                    total = int(res_body.get("total", 0))
+                items = res_body.get("items") or []
+                for rank, item in enumerate(items, start=start):
+                    item.update(keyword=task["keyword"], rank=rank, sort=task["sort"])
+                self.checkpoints.save_page(run_id, task["task"], start, items, total)
+                if len(items) < display:
+                    last_page = True
+            if error is not None:
+                raise error
+            if last_page:
+                return
+            starts = starts[len(wave):]
+
+    def _run_datalab_task(self, run_id, job, task):
+        # 기존 시계열에 이어 붙이는 증분 수집, 결과 시계열 전체를 한 페이지로 기록
+        end_date = datetime.now(KST).strftime("%Y-%m-%d")
+        existing = self.sink.load_latest("trend")
+        df, fetched = update_trend(self.client, job["keyword_groups"], existing, job["start_date"], end_date)
+        rows = [] if fetched is None else df.assign(date=df['date'].dt.strftime("%Y-%m-%d")).to_dict("records")
+        self.checkpoints.save_page(run_id, task["task"], 1, rows)
+
+    def _run_shopping_insight_task(self, run_id, job, task):
+        # 분야가 3개를 넘으면 기준 분야를 공유하는 여러 요청으로 나눠 하나의 스케일로 받음
+        df = fetch_shopping_categories(self.client, job["categories"], job["start_date"],
+                                       datetime.now(KST).strftime("%Y-%m-%d"), time_unit=job.get("time_unit", "date"))
+        self.checkpoints.save_page(run_id, task["task"], 1,
+                                   df.assign(date=df['date'].dt.strftime("%Y-%m-%d")).to_dict("records"))
+
+    def _run_segment_tasks(self, run_id, job):
+        # 구간 요청은 서로 독립이므로 남은 작업을 동시에 보내고 끝나는 대로 하나씩 기록
+        end_date = datetime.now(KST).strftime("%Y-%m-%d")
+        pending = [t for t in job_tasks(job) if not self.checkpoints.task_state(run_id, t["task"])[1]]
+        if not pending:
+            return
+        check_quota(self.client, pending)
+
+        def _run(task):
+            try:
+                rows = run_segment_task(self.client, task, job["start_date"], end_date, job.get("time_unit", "date"))
+                self.checkpoints.save_page(run_id, task["task"], 1, rows)
+                self.checkpoints.finish_task(run_id, task["task"])
+                return None
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.client.concurrency, len(pending)))) as executor:
+            errors = [e for e in executor.map(_run, pending) if e is not None]
+        if errors:
+            raise next((e for e in errors if isinstance(e, QuotaExceeded)), errors[0])
+
+    def _finalize(self, run_id, job):
+        # 저장 단위(데이터셋)마다 끝났음을 기록하고, 재시도 때는 이미 반영한 단위를 건너뜀
+        # (검색 결과를 두 번 넣으면 아이템 이력/가격 감시 통계가 중복 반영됨)
+        if job["kind"] == "search":
+            by_type = {}
+            for task in job_tasks(job):
+                by_type.setdefault(task["api_type"], []).append(task["task"])
+            for api_type, tasks in by_type.items():
+                self._save_once(run_id, api_type,
+                                lambda: self.sink.save_search(api_type, self._unique_rows(run_id, api_type, tasks)))
+        elif job["kind"] == "datalab":
+            rows = self.checkpoints.task_rows(run_id, "datalab")
+            if rows:
+                self._save_once(run_id, "trend", lambda: self.sink.save("trend", rows))
+            else:
+                print(f"[{job['name']}] trend already up to date")
+        elif job["kind"] == "shopping_segments":
+            rows = [row for task in job_tasks(job) for row in self.checkpoints.task_rows(run_id, task["task"])]
+            save_segments(pd.DataFrame(rows, columns=SEGMENT_COLUMNS),
+                          lambda data, dataset: self._save_once(run_id, dataset, lambda: self.sink.save(dataset, data)))
+        else:
+            self._save_once(run_id, "shopping",
+                            lambda: self.sink.save("shopping", self.checkpoints.task_rows(run_id, "shopping_insight")))
+
+    def _save_once(self, run_id, sink, save):
+        if self.checkpoints.sink_done(run_id, sink):
+            print(f"run {run_id}: {sink} already saved, skipping")
+            return
+        save()
+        self.checkpoints.finish_sink(run_id, sink)
+
+    def _unique_rows(self, run_id, api_type, tasks):
+        # 정렬 모드가 여러 개면 같은 아이템이 겹치므로 (키워드, 아이템 키)당 첫 관측만 흘려보냄
+        key_field = SEARCH_ITEM_KEYS[api_type]
+        seen = set()
+        for task in tasks:
+            for item in self.checkpoints.iter_task_rows(run_id, task):
+                key = (item.get("keyword"), item.get(key_field))
+                if key not in seen:
+                    seen.add(key)
+                    yield item
+
+    # --- 지표 ---
+    def metrics(self, now=None):
+        # 작업별 최근 실행 지연시간/처리량과 남은 작업량(backlog)
+        due = {name for name, _ in self.due_jobs(now)}
+        open_runs = {name: run_id for run_id, name, _, _ in self.checkpoints.open_runs()}
+        result = {}
+        for name, job in self.jobs.items():
+            last_done = next(iter(r for r in self.checkpoints.runs(name, limit=20) if r["status"] == "done"), None)
+            entry = {"due": name in due, "open_run": open_runs.get(name), "backlog_requests": 0}
+            if last_done:
+                busy = last_done["busy_seconds"] or 0.0
+                entry.update({
+                    "last_run": last_done["scheduled"],
+                    "latency_s": round(last_done["finished"] - last_done["started"], 3),
+                    "busy_s": round(busy, 3),
+                    "requests": last_done["requests"],
+                    "items": last_done["items"],
+                    "requests_per_sec": round(last_done["requests"] / busy, 2) if busy else 0.0,
+                    "items_per_sec": round(last_done["items"] / busy, 2) if busy else 0.0,
+                })
+            if name in open_runs:
+                entry["backlog_requests"] = self._pending_requests(open_runs[name], job)
+            elif name in due:
+                entry["backlog_requests"] = self._pending_requests(None, job)
+            result[name] = entry
+        result["_client"] = self.client.stats_report()
+        return result
+
+    def _pending_requests(self, run_id, job):
+        pending = 0
+        for task in job_tasks(job):
+            total, done = self.checkpoints.task_state(run_id, task["task"]) if run_id else (None, 0)
+            if done:
+                continue
+            if job["kind"] != "search":
+                pending += task.get("requests", 1)
+                continue
+            max_items = job.get("max_items", SEARCH_MAX_DISPLAY)
+            display = min(SEARCH_MAX_DISPLAY, max_items)
+            starts = search_page_starts(max_items, display)
+            if total is not None:
+                starts = [s for s in starts if s <= total]
+            fetched = self.checkpoints.page_starts(run_id, task["task"]) if run_id else set()
+            pending += len([s for s in starts if s not in fetched])
+        return pending
+
+
+def start_metrics_server(daemon, port):
+    # GET /metrics -> 작업별 지표 JSON
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            data = json.dumps(daemon.metrics(), ensure_ascii=False, indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def selftest():
+    # 스텁 서버를 상대로 한 종단 간 점검: 한도 초과로 중간에 멈춘 실행이 받은 페이지를 다시 받지 않고 끝나는지 확인
+    from mock_naver_server import start_mock_server, SEARCH_TOTAL
+
+    workdir = tempfile.mkdtemp(prefix="collector_selftest_")
+    server, base_url = start_mock_server(latency=0.01)
+    jobs = {
+        "search": {"name": "search", "kind": "search", "api_types": ["blog", "shop"], "keywords": ["두바이 쫀득쿠키"],
+                   "sorts": ["sim", "date"], "max_items": 500, "cron": CronSchedule("* * * * *")},
+        "trend": {"name": "trend", "kind": "datalab", "start_date": "2025-01-01", "cron": CronSchedule("* * * * *"),
+                  "keyword_groups": [{"groupName": "두바이 쫀득쿠키", "keywords": ["두바이 쫀득쿠키"]}]},
+        "insight": {"name": "insight", "kind": "shopping_insight", "start_date": "2025-01-01",
+                    "categories": [{"name": "식품", "param": ["50000006"]}], "cron": CronSchedule("* * * * *")},
+        "segments": {"name": "segments", "kind": "shopping_segments", "start_date": "2025-01-01",
+                     "categories": ["50000006"], "keywords": {"50000006": ["두바이 쫀득쿠키"]},
+                     "cron": CronSchedule("* * * * *")},
+    }
+    # 검색 2종 x 정렬 2종 x 5페이지 + DataLab 1 + 분야 1 + 구간(분야 3 + 키워드 3 + 키워드 비교 1)
+    pages_needed = 2 * 2 * len(search_page_starts(min(500, SEARCH_TOTAL))) + 2 + 7
+    checkpoints = Checkpoints(os.path.join(workdir, "collector.sqlite"))
+    sink = StoreSink(os.path.join(workdir, "store"), os.path.join(workdir, "item_history.sqlite"),
+                     os.path.join(workdir, "product_clusters.sqlite"), os.path.join(workdir, "price_monitor.sqlite"))
+
+    def make_daemon(search_daily):
+        groups = {"search": {"daily": search_daily, "per_sec": 100},
+                  "datalab": {"daily": 100, "per_sec": 100},
+                  "shopping_insight": {"daily": 100, "per_sec": 100}}
+        usage = DailyUsage(os.path.join(workdir, f"usage_{search_daily}.sqlite"))
+        client = NaverClient("test", "test", base_url=base_url, concurrency=4,
+                             scheduler=RequestScheduler(groups, usage))
+        return CollectorDaemon(jobs, client, checkpoints, sink)
+
+    # 1회차: 검색 한도 7건 -> 검색 작업이 중간에 멈춤
+    now = datetime.now(KST)
+    first = make_daemon(search_daily=7)
+    first.run_pending(now)
+    paused = first.metrics(now)
+    after_first = server.request_count
+    # 2회차: 한도 회복 후 남은 페이지만 요청 (같은 시각이므로 새 실행은 시작되지 않음)
+    second = make_daemon(search_daily=1000)
+    second.run_pending(now)
+    final = second.metrics(now)
+
+    print(f"after pause : requests={after_first}, search backlog={paused['search']['backlog_requests']}")
+    print(f"after resume: requests={server.request_count} (needed {pages_needed})")
+    for name in jobs:
+        print(f"  {name}: {final[name]}")
+    rows = {d: len(storage.read(d, store_dir=sink.store_dir))
+            for d in ("blog", "shop", "trend", "shopping", "segments", "segment_monthly")}
+    print(f"stored rows : {rows}")
+    ok = server.request_count == pages_needed and all(final[name].get("items") for name in jobs)
+
+    # 3회차: 쇼핑 저장이 한 번 실패한 실행은 재시도 때 이미 저장한 블로그를 다시 넣지 않음
+    class FlakySink(StoreSink):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.saved = []
+
+        def save_search(self, api_type, items, collected=None):
+            if api_type == "shop" and "shop" not in self.saved:
+                self.saved.append("shop")
+                raise RuntimeError("shop sink failed")
+            self.saved.append(api_type)
+            return super().save_search(api_type, items, collected)
+
+    flaky = FlakySink(sink.store_dir, sink.history_path, sink.cluster_path, sink.price_path)
+    retry = CollectorDaemon(jobs, second.client, checkpoints, flaky)
+    run_id = checkpoints.start_run("search", "sink-retry")
+    finished = [retry.run(run_id, jobs["search"]), retry.run(run_id, jobs["search"])]
+    print(f"sink retry  : finished={finished}, saves={flaky.saved}")
+    ok = ok and finished == [False, True] and flaky.saved == ["blog", "shop", "shop"]
+    server.shutdown()
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="상주 수집기 (일정 실행 + 체크포인트 재개)")
+    parser.add_argument("command", choices=["run", "status", "selftest"], nargs="?", default="run")
+    parser.add_argument("--jobs", default=JOBS_FILE, help="작업 명세 JSON")
+    parser.add_argument("--tick", type=int, default=TICK_SECONDS, help="일정 확인 주기(초)")
+    parser.add_argument("--concurrency", type=int, default=None, help="동시 요청 수")
+    parser.add_argument("--once", action="store_true", help="밀린 작업만 처리하고 종료")
+    parser.add_argument("--metrics-port", type=int, default=None, help="GET /metrics 지표 서버 포트")
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        sys.exit(0 if selftest() else 1)
+
+    daemon = CollectorDaemon(load_jobs(args.jobs), get_client(concurrency=args.concurrency), tick=args.tick)
+    if args.command == "status":
+        print(json.dumps(daemon.metrics(), ensure_ascii=False, indent=2))
+    elif args.once:
+        daemon.run_pending()
+        daemon.client.print_stats()
+    else:
+        if args.metrics_port:
+            start_metrics_server(daemon, args.metrics_port)
+            print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.client.close()
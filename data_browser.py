@@ -0,0 +1,400 @@
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import storage
+
+# 서버 측 페이지 단위 데이터 브라우저
+# 원본 프레임 전체를 st.dataframe으로 보내지 않고, 검색/컬럼 필터/정렬을 서버에서 적용한 뒤 보이는 페이지만 전송한다.
+# - StoreSource: Parquet 저장소에 필터를 밀어 넣어(pyarrow dataset) 필요한 행/컬럼만 읽음.
+#   정렬은 정렬 컬럼 하나만 읽어 순서(인덱스)를 만들고, 페이지 행만 take()로 가져온다.
+# - FrameSource: 이미 메모리에 있는 프레임(CSV 폴백, app.py 실시간 데이터)에 같은 질의를 적용.
+# - 조건별 순서는 소스 객체에 LRU로 보관해 페이지 이동 시 다시 정렬하지 않는다.
+# - 내보내기는 필터된 결과를 배치 단위로 CSV/Parquet 파일에 흘려 쓴다 (저장 순서, 전체를 메모리에 만들지 않음).
+
+PAGE_SIZES = [25, 50, 100, 200]
+EXPORT_BATCH_ROWS = 50_000
+MAX_CACHED_ORDERS = 16
+# 텍스트 검색 대상 컬럼 (링크/이미지 URL은 제외)
+SEARCH_COLUMNS = {
+    "trend": ["keyword_group"],
+    "shop": ["title", "mallName", "brand", "maker", "category3", "category4", "keyword"],
+    "blog": ["title", "description", "bloggername", "keyword"],
+}
+
+
+def make_query(keywords=None, search="", filters=None, sort=None, ascending=True):
+    # keywords: 키워드 컬럼 값 목록, search: 텍스트 컬럼 부분 일치(대소문자 무시),
+    # filters: [(컬럼, "range", (최소, 최대)) | (컬럼, "contains", 문자열)], sort: 정렬 컬럼
+    return (tuple(keywords) if keywords is not None else None, search.strip(), tuple(filters or ()),
+            sort, bool(ascending))
+
+
+def _kind(arrow_type):
+    if pa.types.is_dictionary(arrow_type):
+        return "text"
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        return "number"
+    if pa.types.is_date(arrow_type) or pa.types.is_timestamp(arrow_type):
+        return "date"
+    return "text"
+
+
+class _OrderCache:
+    def __init__(self):
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._orders:
+                self._orders.move_to_end(key)
+                return self._orders[key]
+        value = build()
+        with self._lock:
+            self._orders[key] = value
+            while len(self._orders) > MAX_CACHED_ORDERS:
+                self._orders.popitem(last=False)
+        return value
+
+
+class StoreSource:
+    def __init__(self, dataset, key_col, latest=True, store_dir=storage.STORE_DIR):
+        self.name = dataset
+        self.key_col = key_col
+        self.latest = latest
+        self.store_dir = store_dir
+        self._lock = threading.Lock()
+        self.data = storage.open_dataset(dataset, store_dir)
+        self.columns = [f.name for f in self.data.schema if f.name != "collected"]
+        self.kinds = {f.name: _kind(f.type) for f in self.data.schema}
+        self.search_columns = [c for c in SEARCH_COLUMNS.get(dataset, self.columns) if c in self.columns]
+        self.state = self._load()
+
+    def _load(self):
+        # 조회 대상 파일 조각, 조각별 시작 행 번호(행 번호 = 조각 순서대로 이어 붙인 위치), 정렬 순서 캐시
+        data = storage.open_dataset(self.name, self.store_dir)
+        base = storage.latest_expression(self.name, self.store_dir) if self.latest else None
+        fragments = list(data.get_fragments(filter=base)) if base is not None else list(data.get_fragments())
+        starts = np.cumsum([0] + [f.count_rows() for f in fragments])
+        return {"data": data, "files": sorted(data.files), "base": base, "fragments": fragments, "starts": starts,
+                "orders": _OrderCache()}
+
+    def _current(self, reload=False):
+        # 같은 날 재수집(storage.append)은 이전 실행 파일을 지우고 새 파일을 쓰므로, 파일 목록이 바뀌었으면 다시 구성
+        # 세션들이 공유하는 객체라 조회 하나는 처음 받은 상태(state)만 사용
+        with self._lock:
+            data = storage.open_dataset(self.name, self.store_dir)
+            if reload or data is None or sorted(data.files) != self.state["files"]:
+                if data is not None:
+                    self.state = self._load()
+            return self.state
+
+    def _retry(self, fn):
+        # 목록 확인 뒤 읽는 사이에 파일이 지워졌으면 한 번 다시 구성해서 읽음
+        try:
+            return fn(self._current())
+        except FileNotFoundError:
+            return fn(self._current(reload=True))
+
+    def _expr(self, query):
+        keywords, search, filters, _, _ = query
+        expr = None
+        conds = []
+        if keywords is not None:
+            conds.append(ds.field(self.key_col).cast(pa.string()).isin(list(keywords)))
+        if search:
+            match = None
+            for col in self.search_columns:
+                m = pc.match_substring(ds.field(col).cast(pa.string()), search, ignore_case=True)
+                match = m if match is None else match | m
+            if match is not None:
+                conds.append(match)
+        for col, op, value in filters:
+            if op == "range":
+                lo, hi = value
+                if self.kinds[col] == "date":
+                    lo, hi = pa.scalar(pd.Timestamp(lo).date()), pa.scalar(pd.Timestamp(hi).date())
+                conds.append((ds.field(col) >= lo) & (ds.field(col) <= hi))
+            elif op == "contains" and value:
+                conds.append(pc.match_substring(ds.field(col).cast(pa.string()), value, ignore_case=True))
+        for c in conds:
+            expr = c if expr is None else expr & c
+        return expr
+
+    def _needed(self, query):
+        keywords, search, filters, sort, _ = query
+        cols = ([self.key_col] if keywords is not None else []) + (self.search_columns if search else [])
+        cols += [col for col, _, _ in filters] + ([sort] if sort else [])
+        return list(dict.fromkeys(cols))
+
+    def _order(self, state, query):
+        # (조건에 맞는 행 번호를 정렬 순서대로, 또는 조건/정렬이 없으면 None) - 필요한 컬럼만 읽어 계산
+        def build():
+            expr, sort, ascending = self._expr(query), query[3], query[4]
+            if expr is None and not sort:
+                return None
+            columns = self._needed(query)
+            table = pa.concat_tables([f.to_table(columns=columns, schema=self.data.schema)
+                                      for f in state["fragments"]]) if state["fragments"] else None
+            if table is None:
+                return np.empty(0, dtype=np.int64)
+            table = table.append_column("__row", pa.array(np.arange(table.num_rows)))
+            if expr is not None:
+                table = ds.dataset(table).to_table(filter=expr)
+            rows = table.column("__row").to_numpy()
+            if sort:
+                column = table.column(sort)
+                if pa.types.is_dictionary(column.type):
+                    column = column.cast(pa.string())
+                order = pc.array_sort_indices(column, order="ascending" if ascending else "descending",
+                                              null_placement="at_end")
+                rows = rows[order.to_numpy()]
+            return rows
+        return state["orders"].get(query, build)
+
+    def count(self, query):
+        def run(state):
+            rows = self._order(state, query)
+            return int(state["starts"][-1]) if rows is None else len(rows)
+        return self._retry(run)
+
+    def page(self, query, page, page_size):
+        return self._retry(lambda state: self._page(state, query, page, page_size))
+
+    def _page(self, state, query, page, page_size):
+        rows = self._order(state, query)
+        starts = state["starts"]
+        start = page * page_size
+        if rows is None:
+            rows = np.arange(start, min(start + page_size, int(starts[-1])))
+        else:
+            rows = rows[start:start + page_size]
+        if not len(rows):
+            return pd.DataFrame(columns=self.columns)
+        # 행 번호 -> (조각, 조각 안 위치). 페이지 행이 있는 조각에서 해당 행만 읽음
+        owner = np.searchsorted(starts, rows, side="right") - 1
+        parts, positions = [], []
+        for i in np.unique(owner):
+            picked = np.flatnonzero(owner == i)
+            local = rows[picked] - starts[i]
+            table = state["fragments"][i].scanner(schema=self.data.schema, columns=self.columns).take(pa.array(local))
+            parts.append(table.to_pandas(date_as_object=False))
+            positions.append(picked)
+        df = pd.concat(parts, ignore_index=True)
+        return df.iloc[np.argsort(np.concatenate(positions))].reset_index(drop=True)
+
+    def batches(self, query):
+        # 필터된 결과를 저장 순서대로 배치 단위로 (내보내기 도중 파일이 바뀌어도 시작할 때의 조각 목록을 끝까지 사용)
+        expr = self._expr(query)
+        for fragment in self._current()["fragments"]:
+            for batch in fragment.to_batches(schema=self.data.schema, columns=self.columns, filter=expr,
+                                             batch_size=EXPORT_BATCH_ROWS):
+                if batch.num_rows:
+                    yield batch
+
+    def value_range(self, column):
+        def run(state):
+            values = state["data"].to_table(columns=[column], filter=state["base"]).column(column)
+            result = pc.min_max(values)
+            return result["min"].as_py(), result["max"].as_py()
+        return self._retry(run)
+
+
+class FrameSource:
+    def __init__(self, name, df, key_col=None):
+        self.name = name
+        self.df = df
+        self.key_col = key_col
+        self.columns = list(df.columns)
+        self.kinds = {}
+        for col in self.columns:
+            dtype = df[col].dtype
+            if pd.api.types.is_datetime64_any_dtype(dtype):
+                self.kinds[col] = "date"
+            elif pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                self.kinds[col] = "number"
+            else:
+                self.kinds[col] = "text"
+        self.search_columns = [c for c in SEARCH_COLUMNS.get(name, self.columns)
+                               if c in self.columns and self.kinds[c] == "text"]
+        self._orders = _OrderCache()
+
+    def _mask(self, query):
+        keywords, search, filters, _, _ = query
+        df = self.df
+        mask = np.ones(len(df), dtype=bool)
+        if keywords is not None and self.key_col:
+            mask &= df[self.key_col].isin(keywords).to_numpy()
+        if search:
+            match = np.zeros(len(df), dtype=bool)
+            for col in self.search_columns:
+                match |= df[col].astype("string").str.contains(search, case=False, regex=False).fillna(False).to_numpy(bool)
+            mask &= match
+        for col, op, value in filters:
+            if op == "range":
+                lo, hi = value
+                values = df[col]
+                if self.kinds[col] == "date":
+                    lo, hi = pd.Timestamp(lo), pd.Timestamp(hi)
+                mask &= ((values >= lo) & (values <= hi)).fillna(False).to_numpy(bool)
+            elif op == "contains" and value:
+                mask &= df[col].astype("string").str.contains(value, case=False, regex=False).fillna(False).to_numpy(bool)
+        return mask
+
+    def _order(self, query):
+        def build():
+            rows = np.flatnonzero(self._mask(query))
+            sort, ascending = query[3], query[4]
+            if sort:
+                values = self.df[sort].iloc[rows]
+                if isinstance(values.dtype, pd.CategoricalDtype):
+                    values = values.astype("string")
+                rank = values.reset_index(drop=True).sort_values(ascending=ascending, na_position="last",
+                                                                 kind="stable").index.to_numpy()
+                rows = rows[rank]
+            return rows, len(rows)
+        return self._orders.get(query, build)
+
+    def count(self, query):
+        return self._order(query)[1]
+
+    def page(self, query, page, page_size):
+        rows, n = self._order(query)
+        return self.df.iloc[rows[page * page_size:(page + 1) * page_size]]
+
+    def batches(self, query):
+        rows = np.flatnonzero(self._mask(query))
+        # 배치마다 타입이 달라지지 않도록 전체 프레임 기준 스키마로 변환
+        schema = pa.Schema.from_pandas(self.df, preserve_index=False)
+        for start in range(0, len(rows), EXPORT_BATCH_ROWS):
+            chunk = self.df.iloc[rows[start:start + EXPORT_BATCH_ROWS]]
+            yield pa.RecordBatch.from_pandas(chunk, schema=schema, preserve_index=False)
+
+    def value_range(self, column):
+        values = self.df[column]
+        return values.min(), values.max()
+
+
+def _plain(batch):
+    # CSV 기록용: 사전 인코딩 컬럼을 문자열로
+    arrays = [col.cast(pa.string()) if pa.types.is_dictionary(col.type) else col for col in batch.columns]
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names)
+
+
+def export(source, query, sink, fmt="csv"):
+    # sink: 경로 또는 쓰기 가능한 바이너리 파일. 반환: 기록한 행 수
+    writer = None
+    rows = 0
+    try:
+        for batch in source.batches(query):
+            if fmt == "csv":
+                batch = _plain(batch)
+                if writer is None:
+                    writer = pacsv.CSVWriter(sink, batch.schema)
+            elif writer is None:
+                writer = pq.ParquetWriter(sink, batch.schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def export_file(source, query, fmt="csv"):
+    # 다운로드 버튼용: 임시 파일에 흘려 쓴 뒤 읽기 모드로 다시 열어 반환
+    f = tempfile.TemporaryFile()
+    export(source, query, f, fmt)
+    f.seek(0)
+    return f
+
+
+def render(st, source, key, keywords=None, default_sort=None, default_ascending=True):
+    # 검색/컬럼 필터/정렬/페이지 이동 UI. 현재 페이지 행만 st.dataframe으로 보냄
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    search = c1.text_input("검색", key=f"{key}_search", placeholder="텍스트 컬럼 부분 일치")
+    columns = source.columns
+    sort = c2.selectbox("정렬", ["(저장 순서)"] + columns, key=f"{key}_sort",
+                        index=columns.index(default_sort) + 1 if default_sort in columns else 0)
+    ascending = c3.radio("방향", ["오름차순", "내림차순"], key=f"{key}_dir",
+                         index=0 if default_ascending else 1) == "오름차순"
+    page_size = c4.selectbox("행 수", PAGE_SIZES, key=f"{key}_size")
+
+    filters = []
+    f1, f2 = st.columns([1, 3])
+    filter_col = f1.selectbox("컬럼 필터", ["(없음)"] + columns, key=f"{key}_fcol")
+    if filter_col != "(없음)":
+        kind = source.kinds.get(filter_col, "text")
+        if kind in ("number", "date"):
+            lo, hi = source.value_range(filter_col)
+            if lo is not None and hi is not None and lo < hi:
+                if kind == "date":
+                    lo, hi = pd.Timestamp(lo).date(), pd.Timestamp(hi).date()
+                else:
+                    lo, hi = float(lo), float(hi)
+                filters.append((filter_col, "range", f2.slider(filter_col, lo, hi, (lo, hi),
+                                                               key=f"{key}_frange_{filter_col}")))
+        else:
+            filters.append((filter_col, "contains", f2.text_input(f"{filter_col} 포함", key=f"{key}_ftext")))
+
+    query = make_query(keywords, search, filters, None if sort == "(저장 순서)" else sort, ascending)
+    total = source.count(query)
+    pages = max(1, -(-total // page_size))
+    p1, p2 = st.columns([1, 4])
+    page = p1.number_input("페이지", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page") - 1
+    page = min(page, pages - 1)
+    df_page = source.page(query, page, page_size)
+    p2.caption(f"{total:,}행 중 {page * page_size + 1 if total else 0:,}–{page * page_size + len(df_page):,} "
+               f"(페이지 {page + 1}/{pages})")
+    st.dataframe(df_page, use_container_width=True, hide_index=True)
+
+    d1, d2, _ = st.columns([1, 1, 3])
+    d1.download_button("CSV 내보내기", lambda: export_file(source, query, "csv"),
+                       file_name=f"{source.name}.csv", mime="text/csv", key=f"{key}_csv")
+    d2.download_button("Parquet 내보내기", lambda: export_file(source, query, "parquet"),
+                       file_name=f"{source.name}.parquet", mime="application/octet-stream", key=f"{key}_parquet")
+    return query, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="저장소 데이터 검색/내보내기 (페이지 단위)")
+    parser.add_argument("command", choices=["page", "export"])
+    parser.add_argument("dataset", choices=["trend", "shop", "blog"])
+    parser.add_argument("--store-dir", default=storage.STORE_DIR)
+    parser.add_argument("--keywords", nargs="*", default=None)
+    parser.add_argument("--search", default="")
+    parser.add_argument("--sort", default=None)
+    parser.add_argument("--desc", action="store_true")
+    parser.add_argument("--page", type=int, default=1)
+    parser.add_argument("--page-size", type=int, default=25)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    key_col = storage.DATASETS[args.dataset]["partition"]
+    if storage.open_dataset(args.dataset, args.store_dir) is None:
+        parser.error(f"저장소에 {args.dataset} 데이터가 없습니다: {args.store_dir}")
+    source = StoreSource(args.dataset, key_col, store_dir=args.store_dir)
+    if args.sort and args.sort not in source.columns:
+        parser.error(f"정렬 컬럼은 {', '.join(source.columns)} 중 하나여야 합니다")
+    query = make_query(args.keywords, args.search, sort=args.sort, ascending=not args.desc)
+    started = time.perf_counter()
+    if args.command == "page":
+        df = source.page(query, args.page - 1, args.page_size)
+        with pd.option_context("display.max_columns", 8, "display.width", 200):
+            print(df)
+        print(f"{source.count(query):,} rows match | page {args.page} in {time.perf_counter() - started:.3f}s")
+    else:
+        out = args.out or f"{args.dataset}.{args.format}"
+        rows = export(source, query, out if out != "-" else sys.stdout.buffer, args.format)
+        print(f"Exported {rows:,} rows to {out} in {time.perf_counter() - started:.2f}s", file=sys.stderr)
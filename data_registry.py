@@ -0,0 +1,148 @@
+import pickle
+import argparse
+import threading
+import tracemalloc
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from synthetic_data import synthetic_frames
+
+# 프로세스 전체가 공유하는 불변 데이터셋 레지스트리
+# - 데이터는 로드 시 키워드 순으로 한 번 정렬하고 파생 컬럼도 그때 한 번만 계산한다.
+# - 세션은 필터 상태(선택 키워드)만 들고, view()로 공유 프레임의 iloc 구간(복사 없는 뷰)을 받는다.
+# - 연속 구간이 아닌 조합은 한 번 합친 결과를 키워드 조합별로 공유(LRU)한다.
+# Copy-on-Write 모드에서는 뷰에 값을 써도 공유 원본이 바뀌지 않고 그 세션에서만 복사가 일어난다.
+# 이 모드는 pandas 동작을 프로세스 전체에서 바꾸므로 모듈에서 켜지 않고 앱 진입점(app_dashboard.py, app.py)에서 켠다.
+
+MAX_SHARED_VIEWS = 32
+
+
+def add_derived_columns(name, df):
+    # 대시보드가 매 rerun마다 만들던 파생 컬럼을 로드 시점에 한 번만 계산
+    if name == "trend":
+        df['month'] = df['date'].dt.strftime('%m')
+    elif name == "shop":
+        df['title_length'] = df['title'].str.len()
+        df['mall_name_len'] = df['mallName'].astype('string').str.len()
+    elif name == "blog":
+        df['post_date_dt'] = pd.to_datetime(df['postdate'], format='%Y%m%d')
+    return df
+
+
+class DatasetRegistry:
+    def __init__(self, frames):
+        # frames: {name: (DataFrame, 키워드 컬럼)}
+        self.frames = {}
+        self.key_cols = {}
+        self.offsets = {}
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+        for name, (df, key_col) in frames.items():
+            df = df.sort_values(key_col, kind='stable', ignore_index=True)
+            df = add_derived_columns(name, df)
+            keys = df[key_col].astype('string').to_numpy()
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.array([], int)
+            ends = np.r_[starts[1:], len(keys)]
+            self.frames[name] = df
+            self.key_cols[name] = key_col
+            self.offsets[name] = {keys[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+
+    def frame(self, name):
+        return self.frames[name]
+
+    def keywords(self, name):
+        return list(self.offsets[name].keys())
+
+    def view(self, name, keywords):
+        df = self.frames[name]
+        offsets = self.offsets[name]
+        ranges = sorted(offsets[k] for k in set(keywords) if k in offsets)
+        # 인접한 구간은 하나로 합침
+        merged = []
+        for s, e in ranges:
+            if merged and merged[-1][1] == s:
+                merged[-1] = (merged[-1][0], e)
+            else:
+                merged.append((s, e))
+        if not merged:
+            return df.iloc[0:0]
+        if len(merged) == 1:
+            s, e = merged[0]
+            return df if (s, e) == (0, len(df)) else df.iloc[s:e]
+
+        key = (name, tuple(merged))
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        view = pd.concat([df.iloc[s:e] for s, e in merged], ignore_index=True)
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > MAX_SHARED_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+
+def _session_copies(frames, selections):
+    # 기존 방식: 세션마다 cache_data가 역직렬화한 사본 + 필터링 사본 + 파생 컬럼 추가
+    sessions = []
+    for keywords in selections:
+        df_trend, df_shop, df_blog = pickle.loads(pickle.dumps(frames))
+        t = df_trend[df_trend['keyword_group'].isin(keywords)].copy()
+        t['month'] = t['date'].dt.strftime('%m')
+        b = df_blog[df_blog['keyword'].isin(keywords)].copy()
+        b['post_date_dt'] = pd.to_datetime(b['postdate'], format='%Y%m%d')
+        s = df_shop[df_shop['keyword'].isin(keywords)].copy()
+        sessions.append((df_trend, df_shop, df_blog, t, s, b))
+    return sessions
+
+
+def _session_views(registry, selections):
+    # 레지스트리 방식: 세션은 선택 키워드와 공유 프레임의 뷰만 보유
+    sessions = []
+    for keywords in selections:
+        sessions.append((keywords, registry.view("trend", keywords), registry.view("shop", keywords),
+                         registry.view("blog", keywords)))
+    return sessions
+
+
+def _measure(fn):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, size
+
+
+def measure_sessions(rows=50_000, sessions=20, seed=0):
+    # 동시 접속 세션 수에 따른 세션당 메모리 증가량 비교
+    df_trend, df_shop, df_blog, keywords = synthetic_frames(rows, seed=seed)
+    rng = np.random.default_rng(seed)
+    # 현실적인 사용 패턴: 대부분 기본값(전체), 일부는 소수 키워드 조합
+    selections = [keywords if rng.random() < 0.6 else
+                  list(rng.choice(keywords, size=rng.integers(1, 4), replace=False))
+                  for _ in range(sessions)]
+
+    # 대시보드와 같은 조건(Copy-on-Write)에서 측정
+    with pd.option_context("mode.copy_on_write", True):
+        _, copies_bytes = _measure(lambda: _session_copies((df_trend, df_shop, df_blog), selections))
+        registry, registry_bytes = _measure(lambda: DatasetRegistry({
+            "trend": (df_trend, "keyword_group"), "shop": (df_shop, "keyword"), "blog": (df_blog, "keyword")}))
+        _, views_bytes = _measure(lambda: _session_views(registry, selections))
+
+    print(f"rows={rows:,} sessions={sessions}")
+    print(f"per-session copies : {copies_bytes / sessions / 1024 / 1024:8.2f} MB/session")
+    print(f"shared registry    : {registry_bytes / 1024 / 1024:8.2f} MB once, "
+          f"{views_bytes / sessions / 1024 / 1024:.3f} MB/session")
+    return {"copies_per_session": copies_bytes / sessions, "registry": registry_bytes,
+            "views_per_session": views_bytes / sessions}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="세션당 메모리 사용량 측정")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+    measure_sessions(args.rows, args.sessions)
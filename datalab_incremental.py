@@ -0,0 +1,112 @@
+import os
+import hashlib
+import pandas as pd
+from datetime import date, timedelta
+from settings import STATE_DIR
+from datalab_planner import fetch_trend
+
+# DataLab 트렌드 증분 수집
+# DataLab ratio는 "요청 안에서의 최대값 = 100"으로 정규화되므로, 새로 받은 구간을 기존 시계열에
+# 그대로 이어 붙이면 스케일이 어긋난다. 마지막 저장일 이전 OVERLAP_DAYS일을 함께 요청해
+# 겹치는 구간에서 최소제곱 배율을 구하고, 그 배율로 새 구간을 기존 스케일에 맞춘다.
+
+OVERLAP_DAYS = 14
+SERIES_DIR = os.path.join(STATE_DIR, "trend_series")
+
+
+def plan_fetch_start(existing, label_col, group_names, start_date, end_date, overlap_days=OVERLAP_DAYS):
+    # 요청 시작일을 반환. 전부 최신이면 None, 기존 데이터가 없거나 그룹이 빠져 있으면 start_date(전체 수집)
+    if existing is None or existing.empty:
+        return start_date
+    last = pd.to_datetime(existing['date']).groupby(existing[label_col], observed=True).max()
+    if any(name not in last.index for name in group_names):
+        return start_date
+    last_date = min(last[name] for name in group_names).date()
+    if last_date >= date.fromisoformat(end_date):
+        return None
+    fetch_start = last_date - timedelta(days=overlap_days - 1)
+    return max(date.fromisoformat(start_date), fetch_start).isoformat()
+
+
+def rescale_factor(existing, new, label_col):
+    # 겹치는 (date, 그룹) 구간에서 old ≈ k * new 를 만족하는 k (최소제곱)
+    old = existing[['date', label_col, 'ratio']].copy()
+    old['date'] = pd.to_datetime(old['date'])
+    overlap = old.merge(new, on=['date', label_col], suffixes=('_old', '_new'))
+    denom = (overlap['ratio_new'] ** 2).sum()
+    if overlap.empty or denom == 0:
+        return None
+    return (overlap['ratio_old'] * overlap['ratio_new']).sum() / denom
+
+
+def merge_incremental(existing, new, label_col):
+    # 기존 값은 그대로 두고 그룹별 마지막 저장일 이후 행만 재스케일해 덧붙인다
+    # 배율을 구할 수 없으면 None (호출 측에서 전체 재수집)
+    factor = rescale_factor(existing, new, label_col)
+    if factor is None:
+        return None
+    old = existing.copy()
+    old['date'] = pd.to_datetime(old['date'])
+    last = old.groupby(label_col, observed=True)['date'].max()
+    appended = new[new['date'] > new[label_col].map(last)].copy()
+    appended['ratio'] = appended['ratio'] * factor
+
+    combined = pd.concat([old, appended], ignore_index=True)
+    # 새 구간이 과거 최대값을 넘어서면 DataLab 관례(최대 100)에 맞춰 전체를 다시 정규화
+    peak = combined['ratio'].max()
+    if peak > 100:
+        combined['ratio'] = combined['ratio'] / peak * 100
+    combined['ratio'] = combined['ratio'].round(5)
+    return combined.sort_values([label_col, 'date']).reset_index(drop=True)
+
+
+def update_trend(client, keyword_groups, existing, start_date, end_date,
+                 label_col="keyword_group", overlap_days=OVERLAP_DAYS):
+    # 기존 시계열(existing)에 빠진 날짜만 받아 이어 붙인 전체 시계열과 실제 요청 구간을 반환
+    group_names = [g['groupName'] for g in keyword_groups]
+    fetch_start = plan_fetch_start(existing, label_col, group_names, start_date, end_date, overlap_days)
+    if fetch_start is None:
+        return existing, None
+
+    # 그룹이 5개를 넘으면 기준 그룹을 포함한 여러 요청으로 나눠 하나의 스케일로 받음
+    new = fetch_trend(client, keyword_groups, fetch_start, end_date, label_col)
+    if fetch_start != start_date:
+        merged = merge_incremental(existing[existing[label_col].isin(group_names)], new, label_col)
+        if merged is not None:
+            return merged, (fetch_start, end_date)
+        # 겹치는 구간이 모두 0이라 배율을 정할 수 없으면 전체 구간을 다시 받는다
+        new = fetch_trend(client, keyword_groups, start_date, end_date, label_col)
+        fetch_start = start_date
+    return new, (fetch_start, end_date)
+
+
+class TrendSeriesStore:
+    # 키워드 그룹 구성별로 누적 시계열을 보관 (대시보드 실시간 조회용)
+    def __init__(self, directory=SERIES_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, keyword_groups, start_date):
+        signature = repr((start_date, [(g['groupName'], sorted(g['keywords'])) for g in keyword_groups]))
+        return os.path.join(self.directory, hashlib.sha1(signature.encode("utf-8")).hexdigest() + ".csv")
+
+    def load(self, keyword_groups, start_date):
+        path = self._path(keyword_groups, start_date)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path)
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def save(self, keyword_groups, start_date, df):
+        path = self._path(keyword_groups, start_date)
+        tmp = path + ".tmp"
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+    def update(self, client, keyword_groups, start_date, end_date, label_col):
+        existing = self.load(keyword_groups, start_date)
+        df, fetched = update_trend(client, keyword_groups, existing, start_date, end_date, label_col)
+        if fetched is not None:
+            self.save(keyword_groups, start_date, df)
+        return df
@@ -0,0 +1,222 @@
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+import pandas as pd
+from naver_api import DATALAB_SEARCH_PATH, SHOPPING_CATEGORIES_PATH
+
+# DataLab 요청 묶음 계획
+# 통합 검색어 트렌드는 요청당 키워드 그룹 5개, 쇼핑인사이트 분야별 트렌드는 요청당 분야 3개까지 받는다.
+# 그룹/분야 목록을 가장 적은 요청으로 나누고, 요청마다 같은 기준(anchor) 그룹을 함께 넣어
+# 요청별로 "최대값 = 100"으로 정규화된 결과를 기준 그룹의 비율로 하나의 스케일에 맞춘다.
+
+DATALAB_MAX_GROUPS = 5
+DATALAB_MAX_KEYWORDS = 20
+SHOPPING_MAX_CATEGORIES = 3
+
+
+def datalab_body(keyword_groups, start_date, end_date, time_unit="date"):
+    # keyword_groups: [{"groupName": ..., "keywords": [...]}, ...]
+    return {
+        "startDate": start_date,
+        "endDate": end_date,
+        "timeUnit": time_unit,
+        "keywordGroups": keyword_groups,
+    }
+
+
+def shopping_body(categories, start_date, end_date, time_unit="date"):
+    # categories: [{"name": ..., "param": ["50000006"]}, ...]
+    return {
+        "startDate": start_date,
+        "endDate": end_date,
+        "timeUnit": time_unit,
+        "category": categories,
+    }
+
+
+def parse_trend(res_body, label_col):
+    # 행마다 dict를 만들지 않고 그룹 단위로 컬럼 목록을 이어 붙임
+    dates, labels, ratios = [], [], []
+    for group in res_body['results']:
+        data = group['data']
+        dates += [item['period'] for item in data]
+        ratios += [item['ratio'] for item in data]
+        labels += [group['title']] * len(data)
+    return pd.DataFrame({'date': pd.to_datetime(pd.Series(dates, dtype=object)), label_col: labels,
+                         'ratio': pd.Series(ratios, dtype=float)})
+
+
+def plan_batches(items, max_per_request, anchor=None):
+    # items를 요청당 max_per_request개 이하로 나눈 목록. 한 요청에 다 들어가면 기준 그룹 없이 그대로,
+    # 넘치면 모든 요청의 첫 자리에 anchor(기본: 첫 항목)를 넣고 나머지 자리를 채운다.
+    if len(items) <= max_per_request:
+        return [list(items)] if items else []
+    anchor = anchor if anchor is not None else items[0]
+    rest = [item for item in items if item != anchor]
+    size = max_per_request - 1
+    return [[anchor] + rest[i:i + size] for i in range(0, len(rest), size)]
+
+
+def stitch(frames, anchor_name, label_col):
+    # frames: 요청별 결과(parse_trend 형식). 각 요청의 기준 그룹이 첫 요청의 기준 그룹과 같아지도록
+    # 최소제곱 배율을 곱한 뒤, 전체 최대값이 100이 되도록 다시 정규화한다.
+    if len(frames) == 1:
+        return frames[0]
+    # 기준 그룹이 모두 0이면 배율을 정할 수 없으므로(0배 또는 배율 없이 섞임) 잘못된 스케일을 돌려주지 않고 실패
+    reference = frames[0][frames[0][label_col] == anchor_name].set_index('date')['ratio']
+    if not reference.any():
+        raise ValueError(f"anchor '{anchor_name}' is all zero in the first batch; choose another anchor")
+    parts = [frames[0]]
+    for i, frame in enumerate(frames[1:], start=2):
+        anchor = frame[frame[label_col] == anchor_name].set_index('date')['ratio']
+        ref, new = reference.align(anchor, join='inner')
+        denom = float(np.dot(new, new))
+        if denom == 0 or not ref.any():
+            raise ValueError(f"anchor '{anchor_name}' is all zero in batch {i}; choose another anchor")
+        factor = float(np.dot(ref, new)) / denom
+        scaled = frame[frame[label_col] != anchor_name].copy()
+        scaled['ratio'] = scaled['ratio'] * factor
+        parts.append(scaled)
+    combined = pd.concat(parts, ignore_index=True)
+    peak = combined['ratio'].max()
+    if peak > 0:
+        combined['ratio'] = combined['ratio'] / peak * 100
+    combined['ratio'] = combined['ratio'].round(5)
+    return combined
+
+
+def stitch_responses(responses, anchor_name, label_col):
+    # 계획된 요청들의 응답 본문(요청 순서)을 하나의 스케일로 이어 붙임
+    return _stitch_frames([parse_trend(res_body, label_col) for res_body in responses], anchor_name, label_col)
+
+
+def _stitch_frames(frames, anchor_name, label_col):
+    if not frames:
+        return pd.DataFrame(columns=['date', label_col, 'ratio'])
+    return stitch(frames, anchor_name, label_col)
+
+
+def _fetch_batched(client, plan, items, name_key, anchor, label_col):
+    # 묶음 요청을 동시에 보내고(run_all) 결과를 하나의 스케일로 이어 붙임.
+    # 기준 그룹이 0뿐이라 이어 붙일 수 없으면, 응답에서 검색량이 가장 큰 그룹을 기준으로 다시 계획해 한 번 더 받음
+    calls, anchor_name = plan(anchor)
+    frames = _fetch_frames(client, calls, label_col)
+    try:
+        return _stitch_frames(frames, anchor_name, label_col)
+    except ValueError as e:
+        busiest = _busiest(frames, anchor_name, label_col)
+        if busiest is None:
+            raise
+        print(f"Warning: {e}; re-planning with anchor '{busiest}'")
+    calls, anchor_name = plan(_find_anchor(items, name_key, busiest))
+    return _stitch_frames(_fetch_frames(client, calls, label_col), anchor_name, label_col)
+
+
+def _fetch_frames(client, calls, label_col):
+    frames = []
+    for res_body, error in client.run_all(calls):
+        if error is not None:
+            raise error
+        frames.append(parse_trend(res_body, label_col))
+    return frames
+
+
+def _busiest(frames, anchor_name, label_col):
+    # 기준 그룹을 뺀 그룹 중 요청 안 비율 합이 가장 큰 그룹 (요청마다 스케일이 달라 대략적인 선택)
+    combined = pd.concat(frames, ignore_index=True)
+    totals = combined[combined[label_col] != anchor_name].groupby(label_col)['ratio'].sum()
+    totals = totals[totals > 0]
+    return totals.idxmax() if len(totals) else None
+
+
+def _find_anchor(items, name_key, name):
+    # 이름으로 지정한 기준 그룹/분야 (목록에 없는 그룹은 이름 대신 dict로 넘겨야 함)
+    for item in items:
+        if item[name_key] == name:
+            return item
+    raise ValueError(f"anchor '{name}' is not in the request list; pass the group dict to use an outside anchor")
+
+
+def trend_calls(keyword_groups, start_date, end_date, time_unit="date", anchor=None):
+    # fetch_trend의 요청 목록과 기준 그룹 이름. 다른 요청과 함께 팬아웃할 때 쓰고, 응답은 stitch_responses로 합침
+    for group in keyword_groups:
+        if len(group['keywords']) > DATALAB_MAX_KEYWORDS:
+            raise ValueError(f"keyword group '{group['groupName']}' has more than {DATALAB_MAX_KEYWORDS} keywords")
+    # anchor: 기준 그룹 이름 또는 그룹 dict (목록에 없는 그룹도 가능, 기본: 첫 그룹)
+    if isinstance(anchor, str):
+        anchor = _find_anchor(keyword_groups, 'groupName', anchor)
+    batches = plan_batches(keyword_groups, DATALAB_MAX_GROUPS, anchor)
+    anchor_name = batches[0][0]['groupName'] if batches else None
+    calls = [{"path": DATALAB_SEARCH_PATH, "body": datalab_body(batch, start_date, end_date, time_unit)}
+             for batch in batches]
+    return calls, anchor_name
+
+
+def shopping_calls(categories, start_date, end_date, time_unit="date", anchor=None):
+    if isinstance(anchor, str):
+        anchor = _find_anchor(categories, 'name', anchor)
+    batches = plan_batches(categories, SHOPPING_MAX_CATEGORIES, anchor)
+    anchor_name = batches[0][0]['name'] if batches else None
+    calls = [{"path": SHOPPING_CATEGORIES_PATH, "body": shopping_body(batch, start_date, end_date, time_unit)}
+             for batch in batches]
+    return calls, anchor_name
+
+
+def fetch_trend(client, keyword_groups, start_date, end_date, label_col="keyword_group",
+                time_unit="date", anchor=None):
+    # 키워드 그룹 수와 관계없이 가장 적은 요청으로 받아 하나의 비교 가능한 스케일로 반환
+    def plan(anchor):
+        return trend_calls(keyword_groups, start_date, end_date, time_unit, anchor)
+    return _fetch_batched(client, plan, keyword_groups, 'groupName', anchor, label_col)
+
+
+def fetch_shopping_categories(client, categories, start_date, end_date, label_col="category",
+                              time_unit="date", anchor=None):
+    def plan(anchor):
+        return shopping_calls(categories, start_date, end_date, time_unit, anchor)
+    return _fetch_batched(client, plan, categories, 'name', anchor, label_col)
+
+
+def benchmark(n_groups=20, latency=0.05, start_date="2025-01-01", end_date="2025-12-31"):
+    # 스텁 서버에서 그룹당 1요청 방식과 묶음 요청 방식의 요청 수/시간/스케일 오차 비교
+    from mock_naver_server import start_mock_server, datalab_results
+    from naver_api import NaverClient
+    from rate_limiter import RequestScheduler, DailyUsage, QUOTA_GROUPS
+
+    groups = [{"groupName": f"키워드{i}", "keywords": [f"키워드{i}", f"키워드{i} 맛집"]} for i in range(n_groups)]
+    server, base_url = start_mock_server(latency=latency)
+    usage = DailyUsage(os.path.join(tempfile.mkdtemp(), "usage.sqlite"))
+    client = NaverClient("test", "test", base_url=base_url, scheduler=RequestScheduler(QUOTA_GROUPS, usage))
+
+    # 한 요청에 모든 그룹을 넣었을 때의 "정답" 스케일
+    truth = parse_trend(datalab_results(datalab_body(groups, start_date, end_date),
+                                        [(g['groupName'], g['keywords'], {}) for g in groups]), "keyword_group")
+
+    results = {}
+    for name, fn in [
+        ("per-group", lambda: pd.concat([fetch_trend(client, [g], start_date, end_date) for g in groups])),
+        ("batched", lambda: fetch_trend(client, groups, start_date, end_date)),
+    ]:
+        before = server.request_count
+        started = time.perf_counter()
+        df = fn()
+        elapsed = time.perf_counter() - started
+        merged = truth.merge(df, on=['date', 'keyword_group'], suffixes=('_truth', ''))
+        error = (merged['ratio'] - merged['ratio_truth']).abs().max()
+        results[name] = {"requests": server.request_count - before, "seconds": round(elapsed, 3),
+                         "max_abs_error": round(float(error), 4)}
+        print(f"[{name}] {results[name]['requests']} requests | {elapsed:.3f}s | "
+              f"max |ratio - single-request ratio| = {error:.4f}")
+    server.shutdown()
+    client.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DataLab 요청 묶음 계획 벤치마크 (스텁 서버)")
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+    benchmark(args.groups, args.latency)
@@ -0,0 +1,414 @@
+import os
+import re
+import sys
+import json
+import time
+import codecs
+import shutil
+import resource
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import storage
+from naver_api import search_path, search_page_starts, SEARCH_MAX_DISPLAY
+from item_history import ItemHistory, HISTORY_DB, ITEM_KEYS, BATCH_SIZE
+from product_clusters import ProductClusters, CLUSTER_DB
+from price_monitor import PriceMonitor, PRICE_DB
+
+# 검색 API 스트리밍 적재
+# 응답 본문을 조각(chunk) 단위로 읽으면서 items 배열의 원소를 하나씩 디코드하고, 값은 곧바로 필드별 버퍼에
+# 넣었다가 CONVERT_ROWS마다 타입이 정해진 Arrow 배열로 바꾼다. BATCH_ROWS가 차면 저장소에 한 파일로 내보내고
+# 같은 묶음으로 아이템 이력/동일 상품 색인/가격 감시 통계를 갱신한다.
+# 따라서 키워드/페이지 수와 관계없이 메모리에는 진행 중인 요청 몇 개와 한 묶음만 남는다.
+
+CHUNK_BYTES = 64 * 1024
+CONVERT_ROWS = 1_000
+BATCH_ROWS = 50_000
+# 이력/색인 갱신에 필요한 컬럼 (이미지 URL, 본문 요약 등은 넘기지 않음)
+RECORD_COLUMNS = ["productId", "link", "title", "mallName", "category3", "keyword", "lprice", "hprice", "rank"]
+# 저장소 스키마 + 검색 순위 (순위는 이력에만 쓰고 저장소에는 남기지 않음)
+SEARCH_SCHEMAS = {api_type: storage.DATASETS[api_type]["schema"].append(pa.field("rank", pa.int32()))
+                  for api_type in ITEM_KEYS}
+
+_WS = re.compile(r"[ \t\n\r]*")
+_NEXT = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+class _JsonReader:
+    # 바이트 조각 반복자 위에서 필요한 만큼만 읽어 들이는 JSON 토큰 단위 읽기
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self):
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self.decoder.decode(b"", final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        # 이미 읽은 앞부분은 버림 (버퍼에는 아직 디코드하지 않은 부분만)
+        self.buf = self.buf[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def peek(self):
+        # 공백을 건너뛴 다음 글자 (끝이면 None)
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return None
+
+    def skip(self, expected):
+        found = self.peek()
+        if found != expected:
+            raise ValueError(f"Invalid JSON: expected {expected!r}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        # 값 하나를 통째로 디코드. 숫자가 조각 경계에서 잘렸을 수 있으므로 뒤에 글자가 보일 때까지 더 읽음
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._more()
+
+
+def iter_json_items(chunks, key, meta=None):
+    # 최상위 객체의 배열 필드 key의 원소를 하나씩 흘려보냄. 나머지 최상위 필드(total 등)는 meta에 담음
+    reader = _JsonReader(chunks)
+    reader.skip("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.skip(":")
+        if name == key and reader.peek() == "[":
+            reader.pos += 1
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value()
+                    # 보통은 버퍼 안에서 바로 다음 구분자가 보임 (조각 경계에 걸리면 한 글자씩 확인)
+                    sep = _NEXT.match(reader.buf, reader.pos)
+                    if sep is not None:
+                        reader.pos = sep.end()
+                        if sep.group(1) == "]":
+                            break
+                    elif reader.peek() == "]":
+                        reader.pos += 1
+                        break
+                    else:
+                        reader.skip(",")
+        else:
+            value = reader.value()
+            if meta is not None:
+                meta[name] = value
+        if reader.peek() == "}":
+            return
+        reader.skip(",")
+
+
+def to_arrow(values, field):
+    # JSON 값 목록 -> 필드 타입의 Arrow 배열. 빈 문자열/변환할 수 없는 값은 null (storage.to_table과 같은 규칙)
+    value_type = field.type.value_type if pa.types.is_dictionary(field.type) else field.type
+    try:
+        arr = pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = pa.array([None if v is None else str(v) for v in values], pa.string())
+    if pa.types.is_null(arr.type):
+        return pa.nulls(len(arr), field.type)
+    if pa.types.is_string(arr.type) and not pa.types.is_string(value_type):
+        arr = pc.if_else(pc.equal(arr, ""), pa.scalar(None, pa.string()), arr)
+        if pa.types.is_date32(value_type):
+            fmt = "%Y%m%d" if field.name == "postdate" else "%Y-%m-%d"
+            arr = pc.strptime(arr, format=fmt, unit="s", error_is_null=True)
+        else:
+            try:
+                arr = pc.cast(arr, value_type)
+            except pa.ArrowInvalid:
+                arr = pa.array(pd.to_numeric(arr.to_pandas(), errors="coerce"), from_pandas=True)
+    arr = arr.cast(value_type, safe=False)
+    if pa.types.is_dictionary(field.type):
+        arr = pc.dictionary_encode(arr).cast(field.type)
+    return arr
+
+
+class ColumnBuffer:
+    # 스키마 필드별 버퍼. 값은 필드별 목록에 잠깐 쌓였다가 CONVERT_ROWS마다 Arrow 배열 조각으로 바뀜
+    def __init__(self, schema):
+        self.schema = schema
+        self.raw = {name: [] for name in schema.names}
+        self.chunks = {name: [] for name in schema.names}
+        self.pending = 0
+        self.rows = 0
+
+    def append(self, item):
+        for name, values in self.raw.items():
+            values.append(item.get(name))
+        self.pending += 1
+        self.rows += 1
+        if self.pending >= CONVERT_ROWS:
+            self._convert()
+
+    def merge(self, other):
+        # 같은 스키마의 다른 버퍼(페이지 단위 파싱 결과)를 이어 붙임. 변환 전 값은 모아서 한 번에 변환
+        if any(other.chunks.values()):
+            self._convert()
+            for name in self.schema.names:
+                self.chunks[name].extend(other.chunks[name])
+            self.rows += other.rows - other.pending
+        for name, values in self.raw.items():
+            values.extend(other.raw[name])
+        self.pending += other.pending
+        self.rows += other.pending
+        if self.pending >= CONVERT_ROWS:
+            self._convert()
+
+    def _convert(self):
+        if not self.pending:
+            return
+        for field in self.schema:
+            self.chunks[field.name].append(to_arrow(self.raw[field.name], field))
+            self.raw[field.name] = []
+        self.pending = 0
+
+    def take(self):
+        # 쌓인 행을 하나의 Arrow 테이블로 꺼내고 비움 (작은 조각/조각별 사전은 합쳐서 로우그룹이 잘게 쪼개지지 않게)
+        self._convert()
+        table = pa.Table.from_arrays([pa.chunked_array(self.chunks[f.name], type=f.type) for f in self.schema],
+                                     schema=self.schema)
+        self.chunks = {name: [] for name in self.schema.names}
+        self.rows = 0
+        return table.unify_dictionaries().combine_chunks()
+
+
+def search_page_parser(api_type, keyword, start=1):
+    # NaverClient.request(parse=...)용: 응답 본문을 스트리밍으로 파싱해 (페이지 버퍼, 최상위 필드)를 반환
+    # 페이지 버퍼는 아직 변환 전 값이며 SearchIngest에 합쳐진 뒤 CONVERT_ROWS 단위로 한꺼번에 변환됨
+    schema = SEARCH_SCHEMAS[api_type]
+
+    def parse(response):
+        meta = {}
+        buffer = ColumnBuffer(schema)
+        items = iter_json_items(response.iter_content(CHUNK_BYTES), "items", meta)
+        for rank, item in enumerate(items, start=start):
+            item["keyword"] = keyword
+            item["rank"] = rank
+            buffer.append(item)
+        return buffer, meta
+
+    return parse
+
+
+def iter_search_pages(client, api_type, keywords, pages=1, display=SEARCH_MAX_DISPLAY):
+    # 키워드 x 페이지 요청을 진행 중인 개수만 제한해 보내고, 페이지 버퍼를 입력 순서대로 흘려보냄
+    calls, labels = [], []
+    for kw in keywords:
+        for start in search_page_starts(pages * display, display):
+            calls.append({"path": search_path(api_type),
+                          "params": {"query": kw, "display": display, "start": start},
+                          "parse": search_page_parser(api_type, kw, start)})
+            labels.append(kw)
+    for kw, (result, error) in zip(labels, client.iter_all(calls)):
+        if error is not None:
+            print(f"Error in Search {api_type} for {kw}: {error}")
+            continue
+        yield result[0]
+
+
+class SearchIngest:
+    # 검색 결과를 BATCH_ROWS 단위로 저장소 + 아이템 이력 + (쇼핑) 동일 상품 색인/가격 감시에 반영
+    def __init__(self, api_type, collected=None, store_dir=storage.STORE_DIR, history_path=HISTORY_DB,
+                 cluster_path=CLUSTER_DB, batch_rows=BATCH_ROWS, price_path=PRICE_DB):
+        self.api_type = api_type
+        self.collected = collected or datetime.now().strftime("%Y-%m-%d")
+        # 배치마다 나눠 쓰는 파일을 한 실행으로 묶음 (같은 날 재실행하면 이전 실행 파일을 교체)
+        self.run = storage.new_run()
+        self.store_dir = store_dir
+        self.history_path = history_path
+        self.cluster_path = cluster_path
+        self.price_path = price_path
+        self.batch_rows = batch_rows
+        self.buffer = ColumnBuffer(SEARCH_SCHEMAS[api_type])
+        self.history = None
+        self.clusters = None
+        self.prices = None
+        self.rows = 0
+        self.titles = 0
+        self.merged = 0
+        self.alerts = 0
+
+    def add(self, item):
+        # item: 검색 API 아이템 dict (keyword, rank 포함) 또는 search_page_parser()의 페이지 버퍼
+        if isinstance(item, ColumnBuffer):
+            self.buffer.merge(item)
+        else:
+            self.buffer.append(item)
+        if self.buffer.rows >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer.rows:
+            return
+        table = self.buffer.take()
+        storage.append(self.api_type, table, collected=self.collected, store_dir=self.store_dir, run=self.run)
+        if self.history is None:
+            self.history = ItemHistory(self.history_path).start_run(self.api_type, self.collected)
+            if self.api_type == "shop":
+                self.clusters = ProductClusters(self.cluster_path)
+                self.prices = PriceMonitor(self.price_path)
+        records = table.select([c for c in RECORD_COLUMNS if c in table.column_names])
+        for batch in records.to_batches(max_chunksize=BATCH_SIZE):
+            rows = batch.to_pylist()
+            self.history.add(rows)
+            if self.clusters is not None:
+                titles, merged = self.clusters.add(rows, run_date=self.collected)
+                self.titles += titles
+                self.merged += merged
+            if self.prices is not None:
+                self.alerts += self.prices.add(rows, run_date=self.collected)
+        self.rows += table.num_rows
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.history is not None:
+                new, changed = self.history.close()
+                print(f"History ({self.api_type}): {new} new, {changed} changed")
+        if self.clusters is not None:
+            print(f"Clusters ({self.api_type}): {self.titles} new titles, {self.merged} merged")
+        if self.prices is not None:
+            print(f"Prices ({self.api_type}): {self.alerts} alerts")
+        if not self.rows:
+            print(f"No data to save for {self.api_type}")
+        return self.rows
+
+
+def save_search(api_type, items, collected=None, store_dir=storage.STORE_DIR, history_path=HISTORY_DB,
+                cluster_path=CLUSTER_DB, batch_rows=BATCH_ROWS, price_path=PRICE_DB):
+    # items: 아이템 dict 또는 페이지 버퍼 반복자. 중간에 실패해도 받은 만큼은 저장
+    ingest = SearchIngest(api_type, collected, store_dir, history_path, cluster_path, batch_rows, price_path)
+    try:
+        for item in items:
+            ingest.add(item)
+    finally:
+        rows = ingest.close()
+    return rows
+
+
+# --- 벤치마크: 기존 경로(전체 응답 dict -> 결과 리스트 -> DataFrame) vs 스트리밍 적재 ---
+def _bench_client(base_url, workdir):
+    from naver_api import NaverClient
+    from rate_limiter import RequestScheduler, DailyUsage, QUOTA_GROUPS
+    groups = {name: dict(cfg, per_sec=10 ** 6, daily=10 ** 9) for name, cfg in QUOTA_GROUPS.items()}
+    return NaverClient("test", "test", base_url=base_url,
+                       scheduler=RequestScheduler(groups, DailyUsage(os.path.join(workdir, "usage.sqlite"))))
+
+
+def _collect_list(client, api_type, keywords, pages, workdir):
+    # 변경 전 collect_search_api와 같은 방식: 모든 응답을 dict로 받고, 아이템을 하나의 리스트에 모아 한 번에 저장
+    calls, labels = [], []
+    for kw in keywords:
+        for start in search_page_starts(pages * SEARCH_MAX_DISPLAY):
+            calls.append({"path": search_path(api_type),
+                          "params": {"query": kw, "display": SEARCH_MAX_DISPLAY, "start": start}})
+            labels.append((kw, start))
+    all_results = []
+    for (kw, start), (res_body, error) in zip(labels, client.run_all(calls)):
+        if error is not None:
+            continue
+        for rank, item in enumerate(res_body["items"], start=start):
+            item["keyword"] = kw
+            item["rank"] = rank
+        all_results.extend(res_body["items"])
+    storage.append(api_type, all_results, store_dir=os.path.join(workdir, "store"))
+    ItemHistory(os.path.join(workdir, "history.sqlite")).record_run(api_type, all_results)
+    if api_type == "shop":
+        ProductClusters(os.path.join(workdir, "clusters.sqlite")).add(all_results)
+        PriceMonitor(os.path.join(workdir, "prices.sqlite")).add(all_results)
+    return len(all_results)
+
+
+def _collect_stream(client, api_type, keywords, pages, workdir, batch_rows=BATCH_ROWS):
+    return save_search(api_type, iter_search_pages(client, api_type, keywords, pages),
+                       store_dir=os.path.join(workdir, "store"), history_path=os.path.join(workdir, "history.sqlite"),
+                       cluster_path=os.path.join(workdir, "clusters.sqlite"), batch_rows=batch_rows,
+                       price_path=os.path.join(workdir, "prices.sqlite"))
+
+
+def bench_run(mode, api_type, keywords, pages, batch_rows=BATCH_ROWS):
+    # 한 가지 경로를 새 프로세스에서 실행해 최대 RSS 증가량(수집 시작 이후)과 처리량을 JSON 한 줄로 출력
+    import contextlib
+    from mock_naver_server import start_mock_server
+    from synthetic_data import keyword_list
+    workdir = tempfile.mkdtemp()
+    server, base_url = start_mock_server()
+    client = _bench_client(base_url, workdir)
+    kws = keyword_list(keywords)
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        if mode == "list":
+            rows = _collect_list(client, api_type, kws, pages, workdir)
+        else:
+            rows = _collect_stream(client, api_type, kws, pages, workdir, batch_rows)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    server.shutdown()
+    client.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps({"mode": mode, "rows": rows, "seconds": round(elapsed, 3),
+                      "peak_mb": round((peak_kb - base_kb) / 1024, 1)}))
+
+
+def benchmark(api_type="blog", keywords=(5, 20, 80), pages=10, batch_rows=BATCH_ROWS):
+    # 키워드 수를 늘리며 두 경로의 최대 메모리 증가량과 처리량 비교 (경로마다 별도 프로세스)
+    print(f"{api_type}: keywords x {pages} pages x {SEARCH_MAX_DISPLAY} items (mock server)")
+    for n in keywords:
+        results = {}
+        for mode in ["list", "stream"]:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "run", "--mode", mode, "--api", api_type,
+                                  "--keywords", str(n), "--pages", str(pages), "--batch-rows", str(batch_rows)],
+                                 capture_output=True, text=True, check=True)
+            results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        line = [f"keywords={n:>4}"]
+        for mode, r in results.items():
+            line.append(f"{mode}: {r['rows']:,} rows {r['seconds']:.2f}s "
+                        f"({r['rows'] / r['seconds']:,.0f} rows/s) peak +{r['peak_mb']:.0f}MB")
+        print(" | ".join(line))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 API 스트리밍 적재 메모리/처리량 벤치마크 (스텁 서버)")
+    parser.add_argument("command", choices=["bench", "run"])
+    parser.add_argument("--api", choices=list(ITEM_KEYS), default="blog")
+    parser.add_argument("--keywords", type=int, nargs="+", default=[5, 20, 80])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--mode", choices=["list", "stream"], default="stream")
+    args = parser.parse_args()
+    if args.command == "bench":
+        benchmark(args.api, args.keywords, args.pages, args.batch_rows)
+    else:
+        bench_run(args.mode, args.api, args.keywords[0], args.pages, args.batch_rows)
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import argparse
+import pandas as pd
+from datetime import datetime
+from settings import DATA_DIR
+import storage
+
+# 실행 간 중복 제거된 쇼핑/블로그 아이템 이력
+# - items: 아이템(shop=productId, blog=link)당 한 행, 최초/최근 관측일과 마지막 값 보관
+# - observations: lprice/hprice/rank가 직전 관측과 달라졌을 때만 한 행 추가
+# 따라서 저장 용량은 실행 횟수가 아니라 변경 횟수에 비례한다.
+
+HISTORY_DB = os.path.join(DATA_DIR, "item_history.sqlite")
+ITEM_KEYS = {"shop": "productId", "blog": "link"}
+BATCH_SIZE = 500
+
+
+class ItemHistory:
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS items (
+                    kind TEXT, item_key TEXT, keyword TEXT, title TEXT, link TEXT,
+                    mall_name TEXT, category TEXT,
+                    first_seen TEXT, last_seen TEXT,
+                    last_lprice INTEGER, last_hprice INTEGER, last_rank INTEGER,
+                    PRIMARY KEY (kind, item_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_first_seen ON items (kind, first_seen);
+                CREATE TABLE IF NOT EXISTS observations (
+                    kind TEXT, item_key TEXT, run_date TEXT,
+                    lprice INTEGER, hprice INTEGER, rank INTEGER,
+                    PRIMARY KEY (kind, item_key, run_date)
+                );
+                CREATE TABLE IF NOT EXISTS runs (
+                    kind TEXT, run_date TEXT, items INTEGER, new_items INTEGER, changed INTEGER,
+                    PRIMARY KEY (kind, run_date)
+                );
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def record_run(self, kind, items, run_date=None):
+        # items: dict 반복자 (검색 API 아이템 + keyword, rank). (신규 수, 변경 수)를 반환
+        run = self.start_run(kind, run_date)
+        try:
+            run.add(items)
+        except Exception:
+            run.conn.close()
+            raise
+        return run.close()
+
+    def start_run(self, kind, run_date=None):
+        # 한 번의 실행을 여러 묶음으로 나눠 기록 (스트리밍 적재에서 배치가 올 때마다 add)
+        return HistoryRun(self, kind, run_date or datetime.now().strftime("%Y-%m-%d"))
+
+    def _write_batch(self, conn, kind, run_date, batch, totals):
+        keys = [key for key, _ in batch]
+        placeholders = ",".join("?" * len(keys))
+        last = {row[0]: row[1:] for row in conn.execute(
+            f"SELECT item_key, last_lprice, last_hprice, last_rank FROM items "
+            f"WHERE kind = ? AND item_key IN ({placeholders})", [kind] + keys)}
+
+        new_items, changed, touched, observations = [], [], [], []
+        for key, item in batch:
+            values = tuple(storage.to_int(item.get(col)) for col in ("lprice", "hprice", "rank"))
+            if key not in last:
+                new_items.append((kind, key, item.get("keyword"), item.get("title"), item.get("link"),
+                                  item.get("mallName"), item.get("category3"), run_date, run_date) + values)
+                observations.append((kind, key, run_date) + values)
+            elif tuple(last[key]) != values:
+                changed.append(values + (run_date, kind, key))
+                observations.append((kind, key, run_date) + values)
+            else:
+                touched.append((run_date, kind, key))
+
+        conn.executemany("INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", new_items)
+        conn.executemany("UPDATE items SET last_lprice = ?, last_hprice = ?, last_rank = ?, last_seen = ? "
+                         "WHERE kind = ? AND item_key = ?", changed)
+        conn.executemany("UPDATE items SET last_seen = ? WHERE kind = ? AND item_key = ?", touched)
+        conn.executemany("INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?)", observations)
+        totals["items"] += len(batch)
+        totals["new"] += len(new_items)
+        totals["changed"] += len(changed)
+
+    def price_history(self, product_id):
+        # 상품 하나의 가격/순위 변경 이력 (변경이 있던 실행일만)
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(
+                "SELECT run_date, lprice, hprice, rank FROM observations "
+                "WHERE kind = 'shop' AND item_key = ? ORDER BY run_date", conn, params=(str(product_id),))
+        finally:
+            conn.close()
+
+    def new_since(self, kind, since, keyword=None):
+        # since(YYYY-MM-DD) 이후 처음 관측된 아이템
+        sql = "SELECT * FROM items WHERE kind = ? AND first_seen >= ?"
+        params = [kind, since]
+        if keyword is not None:
+            sql += " AND keyword = ?"
+            params.append(keyword)
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql + " ORDER BY first_seen DESC", conn, params=params)
+        finally:
+            conn.close()
+
+    def items(self, kind, keyword=None):
+        sql = "SELECT * FROM items WHERE kind = ?"
+        params = [kind]
+        if keyword is not None:
+            sql += " AND keyword = ?"
+            params.append(keyword)
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def runs(self):
+        conn = self._connect()
+        try:
+            return pd.read_sql_query("SELECT * FROM runs ORDER BY run_date", conn)
+        finally:
+            conn.close()
+
+
+class HistoryRun:
+    # 실행 하나의 누적 상태 (중복 제거용 키 집합, 순위, 합계). add()마다 커밋하고 close()에서 runs에 기록
+    def __init__(self, history, kind, run_date):
+        self.history = history
+        self.kind = kind
+        self.run_date = run_date
+        self.key_field = ITEM_KEYS[kind]
+        self.totals = {"items": 0, "new": 0, "changed": 0}
+        self.seen = set()
+        self.position = 0
+        self.conn = history._connect()
+
+    def add(self, items):
+        batch = []
+        with self.conn:
+            for item in items:
+                self.position += 1
+                key = item.get(self.key_field)
+                if key is None or pd.isna(key):
+                    continue
+                key = str(key)
+                if key in self.seen:
+                    continue
+                self.seen.add(key)
+                # 순위가 없으면 입력 순서를 순위로 (호출한 쪽의 dict는 바꾸지 않음)
+                if "rank" not in item:
+                    item = dict(item, rank=self.position)
+                batch.append((key, item))
+                if len(batch) >= BATCH_SIZE:
+                    self.history._write_batch(self.conn, self.kind, self.run_date, batch, self.totals)
+                    batch = []
+            if batch:
+                self.history._write_batch(self.conn, self.kind, self.run_date, batch, self.totals)
+
+    def close(self):
+        try:
+            with self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+                                  (self.kind, self.run_date, self.totals["items"], self.totals["new"],
+                                   self.totals["changed"]))
+        finally:
+            self.conn.close()
+        return self.totals["new"], self.totals["changed"]
+
+
+def backfill_from_store(history=None):
+    # 저장소의 shop/blog 수집일 파티션을 오래된 순으로 재생해 이력을 채움
+    history = history or ItemHistory()
+    for kind in ITEM_KEYS:
+        collected_dates = sorted({k.get("collected") for k in storage.partitions(kind)})
+        for collected in collected_dates:
+            df = storage.read(kind, filters=[("collected", "=", collected)])
+            df['rank'] = df.groupby('keyword', observed=True).cumcount() + 1
+            df = df.astype(object).where(df.notna(), None)
+            new, changed = history.record_run(kind, df.to_dict("records"), run_date=collected)
+            print(f"[{kind}] {collected}: {new} new, {changed} changed")
+    return history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="쇼핑/블로그 아이템 이력 관리")
+    parser.add_argument("command", choices=["backfill", "runs"])
+    args = parser.parse_args()
+    if args.command == "backfill":
+        backfill_from_store()
+    else:
+        print(ItemHistory().runs().to_string(index=False))
@@ -0,0 +1,307 @@
+import os
+import time
+import argparse
+import multiprocessing as mp
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import storage
+from trend_analytics import SMOOTH_DAYS, smooth, group_stats
+from price_monitor import BAIT_PRICE
+
+# 키워드 일괄 비교 (50~200개)
+# 1. 수집: DataLab 트렌드는 기준 그룹을 공유하는 최소 요청으로 받아 한 스케일로 잇고(batch_trend),
+#    쇼핑/블로그 검색은 기존 적재 경로(저장소 + 이력/동일 상품/가격 감시)로 키워드별 파티션에 쌓는다.
+# 2. 분석: 필요한 컬럼만 읽어 키워드별 NumPy 배열로 나눈 뒤 프로세스 풀에서 키워드마다 지표를 계산한다.
+#    대기열이 빈 뒤에도 KEYWORD_TIMEOUT초 안에 끝나지 않은 키워드는 timeout으로 기록하고 워커를 종료하므로
+#    느린 키워드 하나가 나머지 결과를 막지 않는다.
+# 3. 순위: 증가율/검색량/가격대/블로그 화제성 순위와 종합 점수를 keyword_leaderboard에 저장하고,
+#    대시보드 `키워드 비교` 탭은 이 결과만 읽는다.
+# 수집 모듈(naver_api, ingest 등)은 수집 단계에서만 불러와 분석 워커 시작 비용을 줄인다.
+
+KEYWORD_TIMEOUT = 30.0
+# 최근 검색량: 마지막 VOLUME_DAYS일 평균 비율
+VOLUME_DAYS = 28
+# 블로그 화제성: 최근 BUZZ_DAYS일 게시글 수와 그 전 BUZZ_DAYS일 대비 증가율
+BUZZ_DAYS = 30
+# 종합 점수에 쓰는 지표 (가격대는 높고 낮음이 좋고 나쁨이 아니므로 순위만 표시)
+SCORE_COLUMNS = ["trend_growth", "trend_volume", "buzz_growth"]
+RANK_COLUMNS = {"growth": "trend_growth", "volume": "trend_volume", "price": "price_median", "buzz": "buzz_growth"}
+
+
+def read_keywords(path):
+    # 한 줄에 하나 또는 쉼표 구분, 중복/빈 값 제거 (입력 순서 유지)
+    with open(path, encoding="utf-8") as f:
+        words = [w.strip() for line in f for w in line.split(",")]
+    return list(dict.fromkeys(w for w in words if w))
+
+
+def collect_batch(keywords, batch, start_date, end_date, client=None, pages=1, store_dir=storage.STORE_DIR):
+    from naver_api import get_client
+    from datalab_planner import fetch_trend
+    from ingest import save_search, iter_search_pages
+    client = client or get_client()
+    print(f"Collecting batch '{batch}': {len(keywords)} keywords")
+    try:
+        groups = [{"groupName": kw, "keywords": [kw]} for kw in keywords]
+        df = fetch_trend(client, groups, start_date, end_date, label_col="keyword")
+        storage.append("batch_trend", df.assign(batch=batch), store_dir=store_dir)
+    except Exception as e:
+        print(f"Error in Datalab Search (batch {batch}): {e}")
+    for api_type in ["blog", "shop"]:
+        save_search(api_type, iter_search_pages(client, api_type, keywords, pages), store_dir=store_dir)
+
+
+def _days(values):
+    return np.asarray(values, dtype="datetime64[D]").astype(np.int64)
+
+
+def _split(df, column, keywords):
+    # 키워드별 배열 (키워드 순 정렬 후 구간 인덱스로 자름, 행마다 파이썬 객체를 만들지 않음)
+    if df is None or df.empty:
+        return {kw: np.empty(0) for kw in keywords}
+    groups = df.groupby(df.columns[0], observed=True, sort=False).indices
+    values = df[column].to_numpy()
+    return {kw: values[groups[kw]] if kw in groups else np.empty(0, values.dtype) for kw in keywords}
+
+
+def load_tasks(keywords, batch=None, store_dir=storage.STORE_DIR):
+    # 분석 작업 목록: 키워드마다 트렌드(일자, 비율), 쇼핑 가격, 블로그 게시일 배열
+    # 배치 트렌드가 없으면(수집 생략) 저장소의 기본 트렌드 데이터를 사용 (키워드 간 스케일이 다를 수 있음)
+    trend = None
+    if batch is not None:
+        trend = storage.read("batch_trend", columns=["keyword", "date", "ratio"],
+                             filters=[("batch", "=", batch)], latest=True, store_dir=store_dir)
+    if trend is None or trend.empty:
+        trend = storage.read("trend", columns=["keyword_group", "date", "ratio"],
+                             filters=[("keyword_group", "in", keywords)], latest=True, store_dir=store_dir)
+    shop = storage.read("shop", columns=["keyword", "lprice"], filters=[("keyword", "in", keywords)],
+                        latest=True, store_dir=store_dir)
+    blog = storage.read("blog", columns=["keyword", "postdate"], filters=[("keyword", "in", keywords)],
+                        latest=True, store_dir=store_dir)
+    if trend is not None:
+        trend = trend.assign(day=_days(trend['date']))
+    if blog is not None:
+        blog = blog.dropna(subset=['postdate'])
+        blog = blog.assign(day=_days(blog['postdate']))
+    trend_days, trend_ratio = _split(trend, "day", keywords), _split(trend, "ratio", keywords)
+    prices = _split(shop, "lprice", keywords)
+    blog_days = _split(blog, "day", keywords)
+    # 블로그 최근 구간의 기준일: 배치 전체의 마지막 게시일 (키워드마다 다르면 비교가 안 됨)
+    reference = int(blog['day'].max()) if blog is not None and not blog.empty else None
+    return [{"keyword": kw, "trend_days": trend_days[kw], "trend_ratio": trend_ratio[kw].astype(float),
+             "prices": prices[kw].astype(float), "blog_days": blog_days[kw], "reference_day": reference}
+            for kw in keywords]
+
+
+def analyze_keyword(task):
+    # 워커 프로세스에서 키워드 하나의 지표 계산 (입력/출력 모두 작은 배열과 숫자)
+    started = time.perf_counter()
+    if task.get("delay"):
+        # 검증용 지연 (selftest에서 느린 키워드를 흉내 냄)
+        time.sleep(task["delay"])
+    out = {"keyword": task["keyword"], "status": "ok"}
+
+    days, ratio = task["trend_days"], task["trend_ratio"]
+    if len(days):
+        first = int(days.min())
+        series = np.full((1, int(days.max()) - first + 1), np.nan)
+        series[0, days - first] = ratio
+        stats = group_stats(smooth(series, SMOOTH_DAYS))
+        last = stats["growth_last_idx"][0]
+        out["trend_growth"] = float(stats["growth"][0, last]) if last >= 0 else np.nan
+        out["trend_volume"] = float(np.nanmean(series[0, -VOLUME_DAYS:]))
+        for name in ["peak", "onset"]:
+            idx = stats[f"{name}_idx"][0]
+            out[f"trend_{name}"] = np.datetime64(first + int(idx), "D") if idx >= 0 else None
+
+    prices = task["prices"][~np.isnan(task["prices"])]
+    out["shop_items"] = len(prices)
+    if len(prices):
+        out["price_q1"], out["price_median"], out["price_q3"] = np.percentile(prices, [25, 50, 75])
+        out["bait_share"] = float((prices < BAIT_PRICE).mean())
+
+    posts = task["blog_days"]
+    out["blog_posts"] = len(posts)
+    if len(posts) and task["reference_day"] is not None:
+        ref = task["reference_day"]
+        recent = int(((posts > ref - BUZZ_DAYS) & (posts <= ref)).sum())
+        previous = int(((posts > ref - 2 * BUZZ_DAYS) & (posts <= ref - BUZZ_DAYS)).sum())
+        out["blog_recent"] = recent
+        out["buzz_growth"] = recent / max(previous, 1) - 1
+    if not len(days) and not len(prices) and not len(posts):
+        out["status"] = "no_data"
+    out["elapsed_ms"] = (time.perf_counter() - started) * 1000
+    return out
+
+
+def analyze(tasks, workers=None, timeout=KEYWORD_TIMEOUT):
+    # 키워드별 작업을 프로세스 풀에 나눠 실행. 끝나는 대로 결과를 모으고, 대기열이 빈 뒤 timeout초가 지나도
+    # 남은 키워드는 timeout으로 기록한 뒤 풀을 종료 (실행 중인 작업도 함께 중단)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    results = {}
+    pool = mp.get_context("spawn").Pool(workers)
+    try:
+        pending = {t["keyword"]: pool.apply_async(analyze_keyword, (t,)) for t in tasks}
+        deadline = None
+        while pending:
+            for kw, result in list(pending.items()):
+                if result.ready():
+                    del pending[kw]
+                    try:
+                        results[kw] = result.get()
+                    except Exception as e:
+                        results[kw] = {"keyword": kw, "status": "error", "error": str(e)}
+            if not pending:
+                break
+            if deadline is None and len(pending) <= workers:
+                deadline = time.time() + timeout
+            if deadline is not None and time.time() >= deadline:
+                for kw in pending:
+                    results[kw] = {"keyword": kw, "status": "timeout", "error": f"{timeout:g}초 안에 끝나지 않음"}
+                break
+            next(iter(pending.values())).wait(0.05)
+    finally:
+        pool.terminate()
+        pool.join()
+    return [results[t["keyword"]] for t in tasks]
+
+
+def rank(results, batch):
+    # 지표별 순위(1 = 가장 높음)와 종합 점수(증가율/검색량/화제성 백분위 평균, 0~100)
+    df = pd.DataFrame(results)
+    for column in storage.DATASETS["keyword_leaderboard"]["schema"].names:
+        if column not in df.columns:
+            df[column] = None
+    df['batch'] = batch
+    for name, column in RANK_COLUMNS.items():
+        values = pd.to_numeric(df[column], errors='coerce')
+        df[f"rank_{name}"] = values.rank(ascending=False, method="min").astype("Int64")
+    metrics = df[SCORE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    df['score'] = (metrics.rank(pct=True).mean(axis=1) * 100).round(1)
+    return df.sort_values('score', ascending=False, na_position='last').reset_index(drop=True)
+
+
+def run_batch(keywords, batch=None, collect=True, start_date="2025-01-01", end_date=None, workers=None,
+              timeout=KEYWORD_TIMEOUT, pages=1, client=None, store_dir=storage.STORE_DIR):
+    batch = batch or datetime.now().strftime("%Y%m%d-%H%M%S")
+    if collect:
+        collect_batch(keywords, batch, start_date, end_date or datetime.now().strftime("%Y-%m-%d"),
+                      client, pages, store_dir)
+    started = time.perf_counter()
+    tasks = load_tasks(keywords, batch, store_dir)
+    loaded = time.perf_counter()
+    results = analyze(tasks, workers, timeout)
+    analyzed = time.perf_counter()
+    board = rank(results, batch)
+    storage.append("keyword_leaderboard", board, store_dir=store_dir)
+    counts = board['status'].value_counts().to_dict()
+    print(f"Batch '{batch}': {len(keywords)} keywords, load {loaded - started:.2f}s, "
+          f"analyze {analyzed - loaded:.2f}s, status {counts}")
+    return board
+
+
+def batches(store_dir=storage.STORE_DIR):
+    # 저장된 배치 목록 (최근 수집일 순)
+    newest = {}
+    for keys in storage.partitions("keyword_leaderboard", store_dir):
+        newest[keys.get("batch")] = max(newest.get(keys.get("batch"), ""), keys.get("collected", ""))
+    return sorted(newest, key=lambda b: (newest[b], b), reverse=True)
+
+
+def leaderboard(batch=None, store_dir=storage.STORE_DIR):
+    names = batches(store_dir)
+    if not names:
+        return None
+    batch = batch or names[0]
+    df = storage.read("keyword_leaderboard", filters=[("batch", "=", batch)], latest=True, store_dir=store_dir)
+    return df.drop(columns=["collected"]).sort_values('score', ascending=False, na_position='last')
+
+
+def _synthetic_tasks(n_keywords, days, items, seed=0):
+    rng = np.random.default_rng(seed)
+    start = int(np.datetime64("2023-01-01", "D").astype(np.int64))
+    tasks = []
+    for i in range(n_keywords):
+        t = np.arange(days)
+        ratio = np.clip(50 + 40 * np.sin(t / (30 + i)) + rng.normal(0, 5, days), 0, 100)
+        tasks.append({"keyword": f"키워드{i}", "trend_days": start + t, "trend_ratio": ratio,
+                      "prices": rng.lognormal(9.5, 0.5, items), "reference_day": start + days - 1,
+                      "blog_days": start + rng.integers(0, days, items)})
+    return tasks
+
+
+def benchmark(n_keywords=200, days=3650, items=200_000, workers_list=None, timeout=KEYWORD_TIMEOUT):
+    # 워커 수별 분석 시간 (프로세스 시작 비용 포함). 코어 수보다 많은 워커는 의미가 없음
+    cores = os.cpu_count() or 1
+    workers_list = workers_list or sorted({1, 2, 4, cores})
+    tasks = _synthetic_tasks(n_keywords, days, items)
+    print(f"{n_keywords} keywords x (trend {days} days, {items:,} prices, {items:,} posts), {cores} cores")
+    base = None
+    for workers in workers_list:
+        started = time.perf_counter()
+        results = analyze(tasks, workers, timeout)
+        elapsed = time.perf_counter() - started
+        base = base or elapsed
+        ok = sum(r["status"] == "ok" for r in results)
+        print(f"  workers={workers:>3}: {elapsed:6.2f}s  speedup x{base / elapsed:.2f}  ({ok}/{n_keywords} ok)")
+
+
+def selftest():
+    # 느린 키워드 하나가 나머지를 막지 않는지, 순위/저장/조회가 맞는지 확인
+    import tempfile
+    tasks = _synthetic_tasks(12, 400, 500)
+    tasks[0]["delay"] = 60
+    started = time.perf_counter()
+    results = analyze(tasks, workers=2, timeout=2)
+    elapsed = time.perf_counter() - started
+    status = [r["status"] for r in results]
+    assert status[0] == "timeout" and status[1:] == ["ok"] * 11, status
+    assert elapsed < 30, elapsed
+
+    board = rank(results, "selftest")
+    assert board['score'].notna().sum() == 11 and board.loc[0, 'status'] == "ok", board
+    assert board['rank_growth'].min() == 1
+    with tempfile.TemporaryDirectory() as store_dir:
+        storage.append("keyword_leaderboard", board, store_dir=store_dir)
+        stored = leaderboard(store_dir=store_dir)
+    assert list(stored['keyword']) == list(board['keyword']), stored
+    print(f"selftest ok (timeout isolated in {elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="키워드 일괄 비교 (수집 -> 키워드별 병렬 분석 -> 순위표)")
+    parser.add_argument("command", choices=["run", "show", "bench", "selftest"])
+    parser.add_argument("--keywords", nargs="+", help="비교할 키워드")
+    parser.add_argument("--keywords-file", help="키워드 목록 파일 (한 줄에 하나 또는 쉼표 구분)")
+    parser.add_argument("--batch", help="배치 이름 (기본: 실행 시각)")
+    parser.add_argument("--no-collect", action="store_true", help="수집 없이 저장소의 최신 데이터로 분석")
+    parser.add_argument("--start-date", default="2025-01-01")
+    parser.add_argument("--pages", type=int, default=1, help="키워드당 검색 페이지 수 (100건 단위)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None)
+    parser.add_argument("--timeout", type=float, default=KEYWORD_TIMEOUT)
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        keywords = list(args.keywords or [])
+        if args.keywords_file:
+            keywords += read_keywords(args.keywords_file)
+        keywords = list(dict.fromkeys(keywords))
+        if not keywords:
+            parser.error("--keywords 또는 --keywords-file이 필요합니다")
+        board = run_batch(keywords, args.batch, not args.no_collect, args.start_date,
+                          workers=args.workers[0] if args.workers else None, timeout=args.timeout, pages=args.pages)
+    if args.command in ("run", "show"):
+        board = leaderboard(args.batch) if args.command == "show" else board
+        if board is None:
+            print("저장된 배치가 없습니다.")
+        else:
+            columns = ["keyword", "status", "score", "trend_growth", "trend_volume", "price_median", "buzz_growth",
+                       "rank_growth", "rank_volume", "rank_price", "rank_buzz"]
+            with pd.option_context("display.width", 200):
+                print(board[columns].head(args.top).to_string(index=False))
+    elif args.command == "bench":
+        benchmark(workers_list=args.workers, timeout=args.timeout)
+    elif args.command == "selftest":
+        selftest()
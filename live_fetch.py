@@ -0,0 +1,63 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 대시보드 실시간 조회를 소스(트렌드/쇼핑/블로그)별 백그라운드 작업으로 실행
+# - 같은 조회 조건의 작업은 TTL 동안 모든 세션이 공유하고, 실패한 작업은 다음 rerun에서 다시 요청
+# - 페이지는 소스별 제한 시간까지만 기다리고, 시간을 넘긴 작업은 백그라운드에서 계속 진행되어
+#   다음 rerun에서 바로 결과를 받는다.
+
+LIVE_TTL = 600
+LIVE_TIMEOUTS = {"trend": 20.0, "shop": 15.0, "blog": 15.0}
+
+
+class LiveFetcher:
+    def __init__(self, max_workers=6, ttl=LIVE_TTL):
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="live-fetch")
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source, fn, *args):
+        # (source, args) 단위로 진행 중이거나 TTL 안에 성공한 작업은 재사용
+        key = (source,) + args
+        now = time.time()
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None:
+                future = job["future"]
+                failed = future.done() and future.exception() is not None
+                if not failed and now - job["submitted"] < self.ttl:
+                    return job
+            job = {"source": source, "submitted": now, "finished": None}
+            job["future"] = self.executor.submit(fn, *args)
+            job["future"].add_done_callback(lambda f, job=job: job.update(finished=time.time()))
+            self.jobs[key] = job
+            # 만료된 작업 정리
+            for k in [k for k, j in self.jobs.items() if now - j["submitted"] >= self.ttl and j["future"].done()]:
+                del self.jobs[k]
+            return job
+
+
+def iter_ready(jobs, timeouts=None, started=None):
+    # jobs: {source: job}. 끝나는 순서대로 (source, job, timed_out)를 내보냄
+    # 소스별 제한 시간은 이번 rerun 시작(started) 기준
+    timeouts = timeouts or LIVE_TIMEOUTS
+    started = started or time.time()
+    pending = dict(jobs)
+    while pending:
+        for source, job in list(pending.items()):
+            if job["future"].done():
+                del pending[source]
+                yield source, job, False
+        if not pending:
+            break
+        now = time.time()
+        expired = [s for s in pending if now >= started + timeouts.get(s, LIVE_TIMEOUTS["trend"])]
+        for source in expired:
+            yield source, pending.pop(source), True
+        if not pending:
+            break
+        deadline = min(started + timeouts.get(s, LIVE_TIMEOUTS["trend"]) for s in pending)
+        wait([job["future"] for job in pending.values()], timeout=max(0.0, deadline - time.time()),
+             return_when=FIRST_COMPLETED)
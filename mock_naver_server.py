@@ -0,0 +1,204 @@
+import json
+import math
+import time
+import random
+import zlib
+import argparse
+import threading
+import urllib.parse
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 수집 엔진 테스트용 로컬 Naver Open API 스텁 서버
+# - GET  /v1/search/{blog,shop}.json  (query, display, start, sort)
+# - POST /v1/datalab/search, /v1/datalab/shopping/*
+#        (categories, category/{device,gender,age}, category/keywords, category/keyword/{device,gender,age})
+# 응답 값은 입력(키워드/날짜)으로부터 결정적으로 생성되므로 재실행해도 같다.
+
+SEARCH_TOTAL = 1000
+SEGMENTS = {"device": ["pc", "mo"], "gender": ["m", "f"], "age": ["10", "20", "30", "40", "50", "60"]}
+
+
+def _seed(*parts):
+    return zlib.crc32("|".join(str(p) for p in parts).encode("utf-8"))
+
+
+def keyword_volume(keyword, day):
+    # 키워드별 고유 규모 + 연중 주기 + 잡음으로 구성한 "실제" 검색량
+    base = 50 + _seed(keyword) % 450
+    phase = (_seed(keyword, "phase") % 365) / 365 * 2 * math.pi
+    season = 1 + 0.6 * math.sin(day.toordinal() / 58.0 + phase)
+    noise = 0.85 + (_seed(keyword, day.isoformat()) % 300) / 1000
+    return base * season * noise
+
+
+def _periods(start_date, end_date, time_unit):
+    day = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    while day <= end:
+        yield day
+        if time_unit == "month":
+            day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+        elif time_unit == "week":
+            day += timedelta(days=7)
+        else:
+            day += timedelta(days=1)
+
+
+def datalab_results(body, groups):
+    # groups: [(title, [keyword, ...], extra_fields), ...]
+    # DataLab과 동일하게 요청 내 최대값을 100으로 정규화한다
+    periods = list(_periods(body["startDate"], body["endDate"], body.get("timeUnit", "date")))
+    raw = []
+    for title, keywords, _ in groups:
+        raw.append([sum(keyword_volume(k, p) for k in keywords) for p in periods])
+    peak = max((v for series in raw for v in series), default=0) or 1
+    results = []
+    for (title, keywords, extra), series in zip(groups, raw):
+        group = {"title": title, **extra}
+        group["data"] = [{"period": p.isoformat(), "ratio": round(v / peak * 100, 5)}
+                         for p, v in zip(periods, series)]
+        results.append(group)
+    return {"startDate": body["startDate"], "endDate": body["endDate"],
+            "timeUnit": body.get("timeUnit", "date"), "results": results}
+
+
+def segment_results(body, dimension, title, extra):
+    # 기기/성별/연령 구간별 추이. 요청 하나 안에서 모든 구간의 최대값을 100으로 정규화
+    periods = list(_periods(body["startDate"], body["endDate"], body.get("timeUnit", "date")))
+    target = f"{body['category']}|{body.get('keyword', '')}"
+    raw = {seg: [keyword_volume(f"{target}|{seg}", p) for p in periods] for seg in SEGMENTS[dimension]}
+    peak = max((v for series in raw.values() for v in series), default=0) or 1
+    data = [{"period": p.isoformat(), "group": seg, "ratio": round(raw[seg][i] / peak * 100, 5)}
+            for i, p in enumerate(periods) for seg in SEGMENTS[dimension]]
+    return {"startDate": body["startDate"], "endDate": body["endDate"],
+            "timeUnit": body.get("timeUnit", "date"), "results": [{"title": title, **extra, "data": data}]}
+
+
+def search_items(api_type, query, start, display, sort):
+    items = []
+    for rank in range(start, min(start + display, SEARCH_TOTAL + 1)):
+        # 정렬 모드별로 서로 다른(하지만 겹치는) 결과 집합을 돌려준다
+        n = _seed(query, sort, rank) % (SEARCH_TOTAL * 2)
+        if api_type == "shop":
+            price = 1000 + _seed(query, n, "price") % 40000
+            items.append({
+                "title": f"<b>{query}</b> 상품 {n}",
+                "link": f"https://smartstore.naver.com/main/products/{n}",
+                "image": f"https://shopping-phinf.pstatic.net/{n}.jpg",
+                "lprice": str(price), "hprice": "",
+                "mallName": f"몰{n % 37}", "productId": str(80000000000 + n),
+                "productType": "2", "brand": "", "maker": "",
+                "category1": "식품", "category2": "과자/베이커리",
+                "category3": "스낵", "category4": "쿠키/비스킷",
+            })
+        else:
+            post_day = date(2026, 1, 10) - timedelta(days=n % 120)
+            items.append({
+                "title": f"<b>{query}</b> 후기 {n}",
+                "link": f"https://blog.naver.com/user{n % 97}/{n}",
+                "description": f"<b>{query}</b> 레시피 만들기 리뷰 {n}",
+                "bloggername": f"블로거{n % 97}",
+                "bloggerlink": f"blog.naver.com/user{n % 97}",
+                "postdate": post_day.strftime("%Y%m%d"),
+            })
+    return {"lastBuildDate": "", "total": SEARCH_TOTAL, "start": start,
+            "display": len(items), "items": items}
+
+
+class MockNaverHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive 커넥션 재사용 확인용
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _before(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            server.connections.add(self.client_address)
+        if server.latency:
+            time.sleep(server.latency)
+        # 재시도/백오프 테스트용 429 주입
+        if server.fail_rate and random.random() < server.fail_rate:
+            self._send_json(429, {"errorMessage": "Rate limit exceeded", "errorCode": "012"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._before():
+            return
+        parsed = urllib.parse.urlparse(self.path)
+        qs = urllib.parse.parse_qs(parsed.query)
+        if parsed.path.startswith("/v1/search/"):
+            api_type = parsed.path.rsplit("/", 1)[-1].replace(".json", "")
+            query = qs.get("query", [""])[0]
+            start = int(qs.get("start", ["1"])[0])
+            display = int(qs.get("display", ["10"])[0])
+            sort = qs.get("sort", ["sim"])[0]
+            self._send_json(200, search_items(api_type, query, start, display, sort))
+        else:
+            self._send_json(404, {"errorMessage": "Not Found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not self._before():
+            return
+        if self.path == "/v1/datalab/search":
+            groups = [(g["groupName"], g["keywords"], {"keywords": g["keywords"]})
+                      for g in body["keywordGroups"]]
+            self._send_json(200, datalab_results(body, groups))
+        elif self.path == "/v1/datalab/shopping/categories":
+            groups = [(c["name"], c["param"], {"category": c["param"]}) for c in body["category"]]
+            self._send_json(200, datalab_results(body, groups))
+        elif self.path == "/v1/datalab/shopping/category/keywords":
+            groups = [(k["name"], [f"{body['category']}|{k['param'][0]}"], {"keyword": k["param"]})
+                      for k in body["keyword"]]
+            self._send_json(200, datalab_results(body, groups))
+        elif self.path.rsplit("/", 1)[-1] in SEGMENTS and self.path.startswith("/v1/datalab/shopping/category/"):
+            dimension = self.path.rsplit("/", 1)[-1]
+            if "/keyword/" in self.path:
+                payload = segment_results(body, dimension, body["keyword"], {"keyword": [body["keyword"]]})
+            else:
+                payload = segment_results(body, dimension, body["category"], {"category": [body["category"]]})
+            self._send_json(200, payload)
+        else:
+            self._send_json(404, {"errorMessage": "Not Found"})
+
+
+def start_mock_server(port=0, latency=0.0, fail_rate=0.0):
+    # 백그라운드 스레드에서 서버를 띄우고 (server, base_url)을 반환
+    server = ThreadingHTTPServer(("127.0.0.1", port), MockNaverHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.fail_rate = fail_rate
+    server.lock = threading.Lock()
+    server.request_count = 0
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 Naver Open API 스텁 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="요청당 인위적 지연(초)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    args = parser.parse_args()
+    server, base_url = start_mock_server(args.port, args.latency, args.fail_rate)
+    print(f"Mock Naver API running at {base_url} (NAVER_API_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
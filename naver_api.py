@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from rate_limiter import (get_scheduler, quota_group, backoff_delay, BATCH,
+                          RETRY_STATUS, MAX_RETRIES)
+
+# .env 파일 로드
+load_dotenv()
+
+# 로컬 스텁 서버로 교체할 수 있도록 베이스 URL과 동시성은 환경변수로 설정
+BASE_URL = os.getenv("NAVER_API_BASE_URL", "https://openapi.naver.com")
+DEFAULT_CONCURRENCY = int(os.getenv("NAVER_API_CONCURRENCY", "8"))
+DEFAULT_TIMEOUT = float(os.getenv("NAVER_API_TIMEOUT", "10"))
+
+DATALAB_SEARCH_PATH = "/v1/datalab/search"
+SHOPPING_CATEGORIES_PATH = "/v1/datalab/shopping/categories"
+
+# 검색 API 페이지네이션 한계 (doc/search_shopping.md: display 최대 100, start 최대 1000)
+SEARCH_MAX_DISPLAY = 100
+SEARCH_MAX_START = 1000
+SEARCH_SORTS = {"shop": ["sim", "date", "asc", "dsc"], "blog": ["sim", "date"]}
+# 페이지 간 중복 판정에 쓰는 아이템 고유 키
+SEARCH_ITEM_KEYS = {"shop": "productId", "blog": "link"}
+
+
+def search_path(api_type):
+    return f"/v1/search/{api_type}.json"
+
+
+def endpoint_name(path):
+    # "/v1/search/shop.json" -> "search/shop"
+    name = path.split("?")[0]
+    if name.startswith("/v1/"):
+        name = name[len("/v1/"):]
+    if name.endswith(".json"):
+        name = name[:-len(".json")]
+    return name
+
+
+class EndpointStats:
+    # 엔드포인트별 호출 수, 오류 수, 벽시계 구간과 누적 지연시간
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.first_start = None
+        self.last_end = None
+        self.total_latency = 0.0
+
+    def record(self, started, ended, ok):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total_latency += ended - started
+        if self.first_start is None or started < self.first_start:
+            self.first_start = started
+        if self.last_end is None or ended > self.last_end:
+            self.last_end = ended
+
+    @property
+    def wall_time(self):
+        if self.first_start is None:
+            return 0.0
+        return self.last_end - self.first_start
+
+    @property
+    def requests_per_sec(self):
+        wall = self.wall_time
+        return self.count / wall if wall > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "wall_time": round(self.wall_time, 4),
+            "avg_latency": round(self.total_latency / self.count, 4) if self.count else 0.0,
+            "requests_per_sec": round(self.requests_per_sec, 2),
+        }
+
+
+class NaverClient:
+    # keep-alive 커넥션 풀을 공유하는 Naver Open API 클라이언트
+    # 모든 호출은 스케줄러(일일 한도/초당 한도/우선순위)를 거쳐 나간다.
+    def __init__(self, client_id, client_secret, base_url=None, concurrency=None, timeout=None,
+                 priority=BATCH, scheduler=None, cache=None):
+        self.base_url = (base_url or BASE_URL).rstrip("/")
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.priority = priority
+        self.scheduler = scheduler or get_scheduler()
+        # response_cache.ResponseCache를 주면 응답을 디스크에 캐시 (stale-while-revalidate)
+        self.cache = cache
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "X-Naver-Client-Id": client_id or "",
+            "X-Naver-Client-Secret": client_secret or "",
+        })
+
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def request(self, path, params=None, body=None, priority=None, parse=None):
+        # parse(response)를 주면 본문을 스트리밍으로 받아 그 결과를 반환 (JSON 전체를 dict로 만들지 않음, 캐시 미사용)
+        if self.cache is None or parse is not None:
+            return self._request(path, params, body, priority, parse)
+        return self.cache.fetch(endpoint_name(path), params, body,
+                                lambda: self._request(path, params, body, priority))
+
+    def _request(self, path, params=None, body=None, priority=None, parse=None):
+        # 429/5xx/연결 오류는 지터가 섞인 지수 백오프로 재시도 (재시도도 한도를 소모)
+        name = endpoint_name(path)
+        priority = self.priority if priority is None else priority
+        started = time.perf_counter()
+        ok = False
+        try:
+            for attempt in range(MAX_RETRIES + 1):
+                self.scheduler.acquire(quota_group(name), priority)
+                try:
+                    response = self._send(path, params, body, stream=parse is not None)
+                except (requests.ConnectionError, requests.Timeout):
+                    if attempt == MAX_RETRIES:
+                        raise
+                    time.sleep(backoff_delay(attempt))
+                    continue
+                if response.status_code in RETRY_STATUS and attempt < MAX_RETRIES:
+                    response.close()
+                    time.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+                    continue
+                try:
+                    response.raise_for_status()
+                    res_body = response.json() if parse is None else parse(response)
+                finally:
+                    response.close()
+                ok = True
+                return res_body
+        finally:
+            self._record(name, started, time.perf_counter(), ok)
+
+    def _send(self, path, params, body, stream=False):
+        # body가 있으면 DataLab 방식의 JSON POST, 없으면 검색 API 방식의 GET
+        url = self.base_url + path
+        if body is not None:
+            return self.session.post(url, data=json.dumps(body).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"},
+                                     timeout=self.timeout, stream=stream)
+        return self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+
+    def _run_call(self, call):
+        try:
+            return self.request(call["path"], params=call.get("params"), body=call.get("body"),
+                                parse=call.get("parse")), None
+        except Exception as e:
+            return None, e
+
+    def run_all(self, calls):
+        # calls: [{"path": ..., "params": ..., "body": ..., "parse": ...}, ...]
+        # 모든 요청을 동시에 팬아웃하고 입력 순서대로 (결과, 예외) 튜플을 반환
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(calls))) as executor:
+            return list(executor.map(self._run_call, calls))
+
+    def iter_all(self, calls, window=None):
+        # run_all과 같지만 진행 중인 요청을 window개(기본: 동시성의 2배)로 제한하고 끝난 순서가 아닌
+        # 입력 순서대로 하나씩 흘려보냄 -> 요청 수가 많아도 응답을 한꺼번에 메모리에 들고 있지 않음
+        if not calls:
+            return
+        window = window or 2 * self.concurrency
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(calls))) as executor:
+            pending = deque()
+            for call in calls:
+                pending.append(executor.submit(self._run_call, call))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _record(self, name, started, ended, ok):
+        with self._stats_lock:
+            self.stats.setdefault(name, EndpointStats()).record(started, ended, ok)
+
+    def stats_report(self):
+        with self._stats_lock:
+            return {name: s.as_dict() for name, s in sorted(self.stats.items())}
+
+    def print_stats(self):
+        for name, s in self.stats_report().items():
+            print(f"[{name}] {s['count']} req ({s['errors']} err) | "
+                  f"wall {s['wall_time']:.2f}s | {s['requests_per_sec']:.1f} req/s | "
+                  f"avg {s['avg_latency'] * 1000:.0f}ms")
+
+    def close(self):
+        self.session.close()
+
+
+def search_page_starts(max_items=SEARCH_MAX_START, display=SEARCH_MAX_DISPLAY):
+    return [start for start in range(1, max_items + 1, display) if start <= SEARCH_MAX_START]
+
+
+def iter_search_items(client, api_type, query, sort="sim", max_items=SEARCH_MAX_START,
+                      display=SEARCH_MAX_DISPLAY):
+    # start/display 윈도우 전체를 동시성 단위(wave)로 병렬 요청하며 아이템을 하나씩 흘려보낸다.
+    # 빈 페이지가 나오거나 페이지 전체가 이미 본 아이템이면 거기서 중단한다.
+    key_field = SEARCH_ITEM_KEYS.get(api_type, "link")
+    display = min(display, max_items)
+    starts = search_page_starts(max_items, display)
+    seen = set()
+    total = None
+    # 첫 페이지로 total을 확인한 뒤 나머지 페이지를 병렬로 요청 (불필요한 호출 방지)
+    wave_size = 1
+
+    while starts:
+        wave, starts = starts[:wave_size], starts[wave_size:]
+        wave_size = max(1, client.concurrency)
+        calls = [{"path": search_path(api_type),
+                  "params": {"query": query, "display": display, "start": start, "sort": sort}}
+                 for start in wave]
+        for start, (res_body, error) in zip(wave, client.run_all(calls)):
+            if error is not None:
+                raise error
+            if total is None:
+                total = int(res_body.get("total", 0))
+                starts = [s for s in starts if s <= total]
+            items = res_body.get("items") or []
+            if not any(item.get(key_field) not in seen for item in items):
+                return
+            for rank, item in enumerate(items, start=start):
+                key = item.get(key_field)
+                if key in seen:
+                    continue
+                seen.add(key)
+                item["rank"] = rank
+                yield item
+            if start + len(items) > total:
+                return
+
+
+def get_client(concurrency=None, base_url=None):
+    return NaverClient(os.getenv("NAVER_CLIENT_ID"), os.getenv("NAVER_CLIENT_SECRET"),
+                       base_url=base_url, concurrency=concurrency)
@@ -0,0 +1,419 @@
+import os
+import json
+import math
+import time
+import sqlite3
+import argparse
+from bisect import bisect_right
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from settings import DATA_DIR
+import storage
+
+# 쇼핑 가격 감시 (수집 배치마다 증분 갱신)
+# - 키워드별/카테고리(category3)별 로그 가격의 사분위수와 MAD를 P² 추정기(마커 5개)로 유지한다.
+#   그룹 상태는 고정 크기라 한 배치 반영 시간은 누적 이력이 아니라 배치 크기에 비례한다.
+# - 상품(키워드, productId)이 처음 보이거나 가격이 바뀐 경우에만 통계에 넣어, 매일 같은 가격으로 다시 잡히는
+#   상품이 분포를 끌고 가지 않게 한다. 같은 날 다시 수집해도 통계는 두 번 반영되지 않는다.
+# - 판정 (배치를 반영한 통계 기준, 관측 MIN_COUNT개 이상인 그룹만):
+#   bait   BAIT_PRICE 미만이거나 수정 z 점수 <= -Z_THRESHOLD (광고용 미끼/오등록 저가 상품)
+#   high   수정 z 점수 >= Z_THRESHOLD
+#   spike  같은 상품의 직전 관측가 대비 SPIKE_RATIO배 이상 상승 (drop은 1/SPIKE_RATIO 이하 하락)
+# - 알림은 alerts 테이블(실행일/종류/키워드별 색인)에 쌓여 대시보드와 명령행에서 조회한다.
+
+PRICE_DB = os.path.join(DATA_DIR, "price_monitor.sqlite")
+QUANTILES = (0.25, 0.5, 0.75)
+SCOPES = {"keyword": "keyword", "category": "category3"}
+MIN_COUNT = 20
+# Iglewicz-Hoaglin 수정 z 점수 기준
+Z_THRESHOLD = 3.5
+BAIT_PRICE = 1000
+SPIKE_RATIO = 1.5
+# MAD가 0에 가까운 그룹(가격이 거의 같은 상품만 있는 경우)에서 작은 차이를 이상치로 보지 않도록 하는 최소 척도 (로그 가격)
+MIN_SCALE = 0.05
+BATCH_SIZE = 500
+
+
+class P2Quantile:
+    # Jain & Chlamtac P² 알고리즘: 마커 5개로 분위수 p 하나를 상수 메모리로 추정
+    def __init__(self, p, state=None):
+        self.p = p
+        if state:
+            self.q, self.n, self.np = state
+        else:
+            self.q, self.n, self.np = [], [], []
+
+    def add(self, x):
+        q, n = self.q, self.n
+        if len(n) < 5:
+            # 처음 5개는 그대로 모아 정렬 (마커 초기값)
+            q.insert(bisect_right(q, x), x)
+            if len(q) == 5:
+                p = self.p
+                self.n = [1, 2, 3, 4, 5]
+                self.np = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = min(bisect_right(q, x) - 1, 3)
+        for i in range(k + 1, 5):
+            n[i] += 1
+        p = self.p
+        desired = self.np
+        desired[1] += p / 2
+        desired[2] += p
+        desired[3] += (1 + p) / 2
+        desired[4] += 1
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # 포물선 보간, 순서가 깨지면 선형 보간
+                qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = qp
+                n[i] += d
+
+    def value(self):
+        if not self.q:
+            return None
+        if len(self.n) < 5:
+            return self.q[int(round(self.p * (len(self.q) - 1)))]
+        return self.q[2]
+
+    def state(self):
+        return [self.q, self.n, self.np]
+
+
+class RobustStats:
+    # 그룹 하나의 로그 가격 사분위수 + MAD (|x - 현재 중앙값|의 중앙값) 추정 상태
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get("count", 0)
+        self.quantiles = {p: P2Quantile(p, state.get(str(p))) for p in QUANTILES}
+        self.mad = P2Quantile(0.5, state.get("mad"))
+
+    def add(self, x):
+        self.count += 1
+        for est in self.quantiles.values():
+            est.add(x)
+        self.mad.add(abs(x - self.quantiles[0.5].value()))
+
+    def median(self):
+        return self.quantiles[0.5].value()
+
+    def scale(self):
+        # 정규분포 기준 표준편차 환산 (1.4826 * MAD)
+        return max(1.4826 * (self.mad.value() or 0.0), MIN_SCALE)
+
+    def z(self, x):
+        # 수정 z 점수 0.6745 * (x - 중앙값) / MAD 와 같음
+        return (x - self.median()) / self.scale()
+
+    def to_state(self):
+        state = {str(p): est.state() for p, est in self.quantiles.items()}
+        state.update(count=self.count, mad=self.mad.state())
+        return state
+
+    def row(self):
+        # stats 테이블의 조회용 컬럼 (원 단위)
+        q1, q3 = self.quantiles[0.25].value(), self.quantiles[0.75].value()
+        return (self.count, math.exp(self.median()), math.exp(q1), math.exp(q3), self.mad.value())
+
+
+def _group(item, column):
+    value = item.get(column)
+    if value is None or value == "" or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+class PriceMonitor:
+    def __init__(self, path=PRICE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS stats (
+                    scope TEXT, group_key TEXT, count INTEGER,
+                    median_price REAL, q1_price REAL, q3_price REAL, mad REAL,
+                    state TEXT, updated TEXT,
+                    PRIMARY KEY (scope, group_key)
+                );
+                CREATE TABLE IF NOT EXISTS last_prices (
+                    item_key TEXT, keyword TEXT, lprice INTEGER, run_date TEXT,
+                    PRIMARY KEY (item_key, keyword)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS alerts (
+                    run_date TEXT, kind TEXT, scope TEXT, group_key TEXT, item_key TEXT,
+                    keyword TEXT, title TEXT, mall_name TEXT, lprice INTEGER, reference REAL, score REAL,
+                    PRIMARY KEY (run_date, kind, scope, keyword, item_key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_alerts_kind ON alerts (kind, run_date);
+                CREATE INDEX IF NOT EXISTS idx_alerts_keyword ON alerts (keyword, run_date);
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, items, run_date=None):
+        # items: 검색 API 쇼핑 아이템 dict 반복자 (keyword 포함). 통계/직전 가격을 갱신하고 새 알림 수를 반환
+        run_date = run_date or datetime.now().strftime("%Y-%m-%d")
+        total = 0
+        batch = []
+        conn = self._connect()
+        try:
+            with conn:
+                for item in items:
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        total += self._add_batch(conn, batch, run_date)
+                        batch = []
+                if batch:
+                    total += self._add_batch(conn, batch, run_date)
+        finally:
+            conn.close()
+        return total
+
+    def _add_batch(self, conn, batch, run_date):
+        rows, stats, last, alerts, changed = self._evaluate(conn, batch, run_date)
+        now = datetime.now().isoformat(timespec="seconds")
+        conn.executemany("INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         [(scope, key) + s.row() + (json.dumps(s.to_state()), now)
+                          for (scope, key), s in stats.items() if s.count])
+        conn.executemany("INSERT OR REPLACE INTO last_prices VALUES (?, ?, ?, ?)",
+                         [(key, keyword, lprice, run_date) for keyword, key, lprice in changed])
+        conn.executemany("INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", alerts)
+        return len(alerts)
+
+    def _load(self, conn, rows):
+        groups = {(scope, key) for _, _, _, _, keys in rows for scope, key in keys.items() if key is not None}
+        stats = {g: RobustStats() for g in groups}
+        for scope in SCOPES:
+            keys = [key for s, key in groups if s == scope]
+            if keys:
+                placeholders = ",".join("?" * len(keys))
+                for key, state in conn.execute(f"SELECT group_key, state FROM stats WHERE scope = ? "
+                                               f"AND group_key IN ({placeholders})", [scope] + keys):
+                    stats[(scope, key)] = RobustStats(json.loads(state))
+        item_keys = sorted({key for _, key, _, _, _ in rows})
+        placeholders = ",".join("?" * len(item_keys))
+        last = {(keyword, key): (lprice, date) for key, keyword, lprice, date in conn.execute(
+            f"SELECT item_key, keyword, lprice, run_date FROM last_prices WHERE item_key IN ({placeholders})",
+            item_keys)} if item_keys else {}
+        return stats, last
+
+    def _evaluate(self, conn, batch, run_date):
+        # 배치 하나를 통계에 반영(메모리)하고 알림 행을 만든다. 저장은 호출한 쪽이 결정
+        rows = []
+        for item in batch:
+            key = item.get("productId")
+            lprice = storage.to_int(item.get("lprice"))
+            if key is None or lprice is None or lprice <= 0:
+                continue
+            keys = {scope: _group(item, column) for scope, column in SCOPES.items()}
+            rows.append((item, str(key), item.get("keyword"), lprice, keys))
+        stats, last = self._load(conn, rows)
+
+        changed, alerts = [], []
+        seen = set()
+        for item, key, keyword, lprice, keys in rows:
+            if (keyword, key) in seen:
+                continue
+            seen.add((keyword, key))
+            previous = last.get((keyword, key))
+            if previous is not None and previous[0] == lprice:
+                continue
+            changed.append((keyword, key, lprice))
+            x = math.log(lprice)
+            for scope, group_key in keys.items():
+                if group_key is not None:
+                    stats[(scope, group_key)].add(x)
+            # 같은 날 다시 수집한 경우는 직전 관측으로 보지 않음
+            if previous is not None and previous[1] < run_date:
+                ratio = lprice / previous[0] if previous[0] else None
+                if ratio is not None and (ratio >= SPIKE_RATIO or ratio <= 1 / SPIKE_RATIO):
+                    alerts.append(self._alert(run_date, "spike" if ratio > 1 else "drop", "item", keyword,
+                                              item, key, keyword, lprice, previous[0], ratio))
+
+        for item, key, keyword, lprice, keys in rows:
+            if lprice < BAIT_PRICE:
+                alerts.append(self._alert(run_date, "bait", "price_floor", None, item, key, keyword, lprice,
+                                          BAIT_PRICE, None))
+            x = math.log(lprice)
+            for scope, group_key in keys.items():
+                s = stats.get((scope, group_key))
+                if s is None or s.count < MIN_COUNT:
+                    continue
+                z = s.z(x)
+                if abs(z) >= Z_THRESHOLD:
+                    alerts.append(self._alert(run_date, "bait" if z < 0 else "high", scope, group_key, item, key,
+                                              keyword, lprice, math.exp(s.median()), z))
+        return rows, stats, last, alerts, changed
+
+    @staticmethod
+    def _alert(run_date, kind, scope, group_key, item, key, keyword, lprice, reference, score):
+        return (run_date, kind, scope, group_key, key, keyword, item.get("title"), item.get("mallName"), lprice,
+                round(reference, 1) if reference is not None else None,
+                round(score, 3) if score is not None else None)
+
+    def flag(self, df_shop, keyword=None, run_date=None):
+        # 저장하지 않고 판정만 (실시간 조회 결과 등). 저장된 통계에 이 프레임을 더한 사본 기준
+        # price_z(키워드 기준 수정 z 점수)와 price_alert(bait/high/spike/drop, 없으면 None) 컬럼을 붙여 반환
+        run_date = run_date or datetime.now().strftime("%Y-%m-%d")
+        df = df_shop if keyword is None else df_shop.assign(keyword=keyword)
+        records = df.astype(object).where(df.notna(), None).to_dict("records")
+        conn = self._connect()
+        try:
+            _, stats, _, alerts, _ = self._evaluate(conn, records, run_date)
+        finally:
+            conn.close()
+        kinds = {}
+        for alert in alerts:
+            # 상품당 한 종류만 표시 (가격 변동보다 분포 기준 판정을 우선)
+            if alert[2] != "item" or alert[4] not in kinds:
+                kinds[alert[4]] = alert[1]
+        ids = df['productId'].astype(str)
+        prices = pd.to_numeric(df['lprice'], errors='coerce')
+        z = pd.Series(np.nan, index=df.index)
+        for kw, idx in df.groupby('keyword', sort=False).groups.items():
+            s = stats.get(("keyword", str(kw)))
+            if s is not None and s.count >= MIN_COUNT:
+                logp = np.log(prices.loc[idx].where(prices.loc[idx] > 0))
+                z.loc[idx] = (logp - s.median()) / s.scale()
+        return df_shop.assign(price_z=z.round(2), price_alert=ids.map(kinds))
+
+    def alerts(self, since=None, keywords=None, kinds=None, limit=None):
+        sql = "SELECT * FROM alerts WHERE 1 = 1"
+        params = []
+        if since is not None:
+            sql += " AND run_date >= ?"
+            params.append(since)
+        if keywords:
+            sql += f" AND keyword IN ({','.join('?' * len(keywords))})"
+            params.extend(keywords)
+        if kinds:
+            sql += f" AND kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        sql += " ORDER BY run_date DESC, ABS(COALESCE(score, 0)) DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(sql, conn, params=params)
+        finally:
+            conn.close()
+
+    def stats(self, scope="keyword"):
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(
+                "SELECT group_key, count, median_price, q1_price, q3_price, mad, updated FROM stats "
+                "WHERE scope = ? ORDER BY count DESC", conn, params=(scope,))
+        finally:
+            conn.close()
+
+
+def build_from_store(monitor=None, store_dir=storage.STORE_DIR):
+    # 저장소의 shop 수집일 파티션을 오래된 순으로 재생해 통계/알림을 채움
+    monitor = monitor or PriceMonitor()
+    for collected in sorted({k.get("collected") for k in storage.partitions("shop", store_dir)}):
+        df = storage.read("shop", columns=["title", "mallName", "productId", "lprice", "keyword", "category3"],
+                          filters=[("collected", "=", collected)], store_dir=store_dir)
+        df = df.astype(object).where(df.notna(), None)
+        alerts = monitor.add(df.to_dict("records"), run_date=collected)
+        print(f"[shop] {collected}: {len(df)} items, {alerts} alerts")
+    return monitor
+
+
+def benchmark(batches=10, batch_rows=10_000, groups=40, path=None):
+    # 같은 크기의 배치를 계속 넣으며 배치당 시간 (누적 이력에 비례하면 점점 느려짐)
+    import tempfile
+    from synthetic_data import keyword_list
+    rng = np.random.default_rng(0)
+    kws = keyword_list(groups)
+    categories = {k: f"cat{i % 7}" for i, k in enumerate(kws)}
+    base = dict(zip(kws, rng.uniform(5_000, 40_000, groups)))
+    monitor = PriceMonitor(path or os.path.join(tempfile.mkdtemp(), "prices.sqlite"))
+    for b in range(batches):
+        run_date = f"2026-01-{b + 1:02d}"
+        keyword = rng.choice(kws, batch_rows)
+        price = np.array([base[k] for k in keyword]) * rng.lognormal(0, 0.3, batch_rows)
+        # 1%는 미끼 상품, 절반의 상품은 매일 새로 등록
+        price[rng.random(batch_rows) < 0.01] /= 20
+        ids = np.where(rng.random(batch_rows) < 0.5, np.arange(batch_rows), b * batch_rows + np.arange(batch_rows))
+        items = [{"productId": str(i), "keyword": k, "category3": categories[k], "lprice": int(p),
+                  "title": f"상품 {i}", "mallName": "몰"} for i, k, p in zip(ids, keyword, price)]
+        started = time.perf_counter()
+        alerts = monitor.add(items, run_date=run_date)
+        elapsed = time.perf_counter() - started
+        print(f"batch {b + 1:>3} ({batch_rows:,} rows, history {(b + 1) * batch_rows:>9,}) | "
+              f"{elapsed:.2f}s ({elapsed / batch_rows * 1e6:.0f}us/item) | {alerts} alerts")
+
+
+def selftest():
+    # P² 추정치가 정확한 분위수와 가까운지, 미끼/급등 판정이 나오는지 확인
+    import tempfile
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(9, 0.5, 20_000)
+    s = RobustStats()
+    for v in np.log(values):
+        s.add(v)
+    exact_median = np.median(np.log(values))
+    exact_mad = np.median(np.abs(np.log(values) - exact_median))
+    assert abs(s.median() - exact_median) < 0.02, (s.median(), exact_median)
+    assert abs(s.mad.value() - exact_mad) < 0.02, (s.mad.value(), exact_mad)
+    restored = RobustStats(json.loads(json.dumps(s.to_state())))
+    assert restored.median() == s.median() and restored.count == s.count
+
+    monitor = PriceMonitor(os.path.join(tempfile.mkdtemp(), "prices.sqlite"))
+    items = [{"productId": str(i), "keyword": "쿠키", "category3": "쿠키", "lprice": int(v), "title": str(i)}
+             for i, v in enumerate(rng.lognormal(9, 0.2, 200))]
+    items.append({"productId": "bait", "keyword": "쿠키", "category3": "쿠키", "lprice": 1500, "title": "미끼"})
+    monitor.add(items, run_date="2026-01-01")
+    kinds = set(monitor.alerts(kinds=["bait"])["item_key"])
+    assert "bait" in kinds, kinds
+    count = monitor.stats().loc[0, "count"]
+    monitor.add(items, run_date="2026-01-01")
+    assert monitor.stats().loc[0, "count"] == count, "같은 날 재수집이 통계에 두 번 반영됨"
+    monitor.add([dict(items[0], lprice=items[0]["lprice"] * 2)], run_date="2026-01-02")
+    spikes = monitor.alerts(kinds=["spike"])
+    assert list(spikes["item_key"]) == ["0"], spikes
+    flagged = monitor.flag(pd.DataFrame(items[-3:]))
+    assert flagged["price_alert"].iloc[-1] == "bait", flagged
+    print("selftest ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="쇼핑 가격 감시 (증분 분위수/MAD, 미끼 상품/가격 급변 알림)")
+    parser.add_argument("command", choices=["build", "alerts", "stats", "bench", "selftest"])
+    parser.add_argument("--db", default=PRICE_DB)
+    parser.add_argument("--store-dir", default=storage.STORE_DIR)
+    parser.add_argument("--since", help="YYYY-MM-DD 이후 알림만")
+    parser.add_argument("--kind", nargs="+", choices=["bait", "high", "spike", "drop"])
+    parser.add_argument("--scope", choices=list(SCOPES), default="keyword")
+    parser.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_from_store(PriceMonitor(args.db), args.store_dir)
+    elif args.command == "alerts":
+        df = PriceMonitor(args.db).alerts(args.since, kinds=args.kind, limit=args.top)
+        with pd.option_context("display.width", 200, "display.max_colwidth", 40):
+            print(df.to_string(index=False))
+    elif args.command == "stats":
+        with pd.option_context("display.width", 200):
+            print(PriceMonitor(args.db).stats(args.scope).head(args.top).to_string(index=False))
+    elif args.command == "bench":
+        benchmark()
+    else:
+        selftest()
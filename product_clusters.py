@@ -0,0 +1,360 @@
+import os
+import re
+import html
+import time
+import zlib
+import sqlite3
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from settings import DATA_DIR
+import storage
+
+# 쇼핑 상품 제목 정규화 + 판매처 간 동일 상품 묶기 (MinHash/LSH)
+# - 정규화: <b> 태그/HTML 엔티티 제거, 판매처명과 [..] 말머리 제거, 홍보 문구 제거, 소문자/공백 정리
+# - 같은 정규화 제목은 바로 같은 상품. 서로 다른 정규화 제목만 글자 3-gram MinHash 서명을 만들고
+#   LSH 밴드 버킷이 겹치는 후보끼리만 유사도(서명 일치 비율)를 비교해 묶는다 (전체 쌍 비교 없음).
+# - 용량/개수 표기(100g, 6개입 등)가 서로 다르면 비슷해도 다른 상품으로 둔다.
+# - 색인(SQLite)은 실행 간 유지되며, 수집 시 add()로 새 상품만 추가한다. 새 제목이 두 묶음을 잇는 경우 묶음을 합친다.
+
+CLUSTER_DB = os.path.join(DATA_DIR, "product_clusters.sqlite")
+NUM_PERM = 100
+BANDS = 20
+ROWS = NUM_PERM // BANDS
+SIMILARITY = 0.6
+MARGIN = 0.1
+# 검색 키워드를 뺀 나머지가 이보다 짧은 제목(예: "두바이쫀득쿠키 80g")은 어떤 상품인지 알 수 없어 묶지 않음
+MIN_DISTINCT_CHARS = 4
+SHINGLE = 3
+BATCH_SIZE = 500
+
+STOPWORDS = ["당일발송", "당일출고", "무료배송", "무배", "특가", "최저가", "정품", "국내산", "선물세트", "선물", "답례품",
+             "추천", "인기", "신상", "할인", "세일", "행사", "이벤트", "사은품", "한정", "핸드메이드", "수제"]
+UNIT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(kg|g|ml|l|개입|개|입|구|세트|박스|팩|봉|ea)(?![a-z가-힣])")
+_TAG_RE = re.compile(r"<[^>]+>")
+_BRACKET_RE = re.compile(r"\[[^\]]*\]|【[^】]*】")
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣.]+")
+_STOP_RE = re.compile("|".join(sorted(map(re.escape, STOPWORDS), key=len, reverse=True)))
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20260110)
+_A = _rng.integers(1, 1 << 32, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, NUM_PERM, dtype=np.uint64)
+
+
+def normalize_title(title, mall=None):
+    text = html.unescape(_TAG_RE.sub(" ", str(title or ""))).lower()
+    text = _BRACKET_RE.sub(" ", text)
+    if mall:
+        # 제목 앞에 붙은 판매처명 (띄어쓰기가 달라도)
+        for name in {str(mall).lower(), str(mall).lower().replace(" ", "")}:
+            if name:
+                text = text.replace(name, " ")
+    text = _STOP_RE.sub(" ", text)
+    return " ".join(_NON_WORD_RE.sub(" ", text).split())
+
+
+def units(norm):
+    # 용량/개수 표기 집합 (예: {"100g", "2개입"})
+    return ",".join(sorted({f"{float(n):g}{u}" for n, u in UNIT_RE.findall(norm)}))
+
+
+def grams(norm):
+    # 띄어쓰기 차이에 흔들리지 않도록 공백을 뺀 글자 3-gram 집합
+    compact = norm.replace(" ", "")
+    if len(compact) <= SHINGLE:
+        return {compact}
+    return {compact[i:i + SHINGLE] for i in range(len(compact) - SHINGLE + 1)}
+
+
+def shingles(norm):
+    return np.array([zlib.crc32(g.encode("utf-8")) for g in grams(norm)], dtype=np.uint64)
+
+
+def signature(norm):
+    # (a * h + b) mod p 순열 NUM_PERM개의 최솟값
+    h = shingles(norm)
+    return ((_A[:, None] * h[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def band_keys(signatures):
+    # (n, NUM_PERM) 서명 -> (n, BANDS) 밴드 버킷 키 (부호 있는 64비트)
+    sig = signatures.reshape(len(signatures), BANDS, ROWS)
+    key = np.zeros(sig.shape[:2], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for r in range(ROWS):
+            key = (key * np.uint64(0x100000001B3) + sig[:, :, r]) % _MERSENNE
+    return key.astype(np.int64)
+
+
+def similarity(sig, others):
+    # 서명 일치 비율 = 자카드 유사도 추정치
+    return (others == sig[None, :]).mean(axis=1)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def distinctive(norm, keyword=None):
+    compact = norm.replace(" ", "")
+    if keyword:
+        compact = compact.replace(normalize_title(keyword).replace(" ", ""), "")
+    return len(compact) >= MIN_DISTINCT_CHARS
+
+
+def _compatible(u1, u2):
+    return not u1 or not u2 or u1 == u2
+
+
+class ProductClusters:
+    def __init__(self, path=CLUSTER_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS titles (
+                    title_id INTEGER PRIMARY KEY, norm TEXT UNIQUE, units TEXT,
+                    cluster_id INTEGER, signature BLOB
+                );
+                CREATE INDEX IF NOT EXISTS idx_titles_cluster ON titles (cluster_id);
+                CREATE TABLE IF NOT EXISTS buckets (
+                    band INTEGER, bucket INTEGER, title_id INTEGER,
+                    PRIMARY KEY (band, bucket, title_id)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS items (
+                    item_key TEXT PRIMARY KEY, title_id INTEGER, keyword TEXT, title TEXT,
+                    mall_name TEXT, lprice INTEGER, last_seen TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_title ON items (title_id);
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, items, run_date=None):
+        # items: 검색 API 쇼핑 아이템 dict 반복자. (새 제목 수, 합쳐진 묶음 수)를 반환
+        run_date = run_date or datetime.now().strftime("%Y-%m-%d")
+        totals = {"titles": 0, "merged": 0}
+        batch = []
+        conn = self._connect()
+        try:
+            with conn:
+                for item in items:
+                    key = item.get("productId")
+                    if key is None or pd.isna(key):
+                        continue
+                    batch.append(item)
+                    if len(batch) >= BATCH_SIZE:
+                        self._add_batch(conn, batch, run_date, totals)
+                        batch = []
+                if batch:
+                    self._add_batch(conn, batch, run_date, totals)
+        finally:
+            conn.close()
+        return totals["titles"], totals["merged"]
+
+    def _add_batch(self, conn, batch, run_date, totals):
+        norms = [normalize_title(item.get("title"), item.get("mallName")) for item in batch]
+        keywords = {}
+        for item, norm in zip(batch, norms):
+            keywords.setdefault(norm, item.get("keyword"))
+        unique = list(keywords)
+        placeholders = ",".join("?" * len(unique))
+        known = dict(conn.execute(f"SELECT norm, title_id FROM titles WHERE norm IN ({placeholders})", unique))
+        new = [n for n in unique if n not in known]
+        if new:
+            known.update(self._add_titles(conn, new, [keywords[n] for n in new], totals))
+        rows = [(str(item["productId"]), known[norm], item.get("keyword"), item.get("title"), item.get("mallName"),
+                 storage.to_int(item.get("lprice")), run_date) for item, norm in zip(batch, norms)]
+        conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _add_titles(self, conn, norms, keywords, totals):
+        sigs = np.stack([signature(n) for n in norms])
+        keys = band_keys(sigs)
+        unit_list = [units(n) for n in norms]
+        # 버킷에 넣고 후보를 찾는 대상 (키워드 외 내용이 너무 짧은 제목은 혼자 한 묶음)
+        probe = [p for p, (n, k) in enumerate(zip(norms, keywords)) if distinctive(n, k)]
+        next_id = (conn.execute("SELECT MAX(title_id) FROM titles").fetchone()[0] or 0) + 1
+        ids = list(range(next_id, next_id + len(norms)))
+
+        # 색인에 있는 후보: 밴드 버킷이 하나라도 같은 제목
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS probe (band INTEGER, bucket INTEGER, pos INTEGER)")
+        conn.execute("DELETE FROM probe")
+        conn.executemany("INSERT INTO probe VALUES (?, ?, ?)",
+                         [(b, int(keys[p, b]), p) for p in probe for b in range(BANDS)])
+        hits = conn.execute("SELECT DISTINCT probe.pos, b.title_id FROM probe JOIN buckets b "
+                            "ON b.band = probe.band AND b.bucket = probe.bucket").fetchall()
+        # 후보 제목 정보는 제목마다 한 번만 읽음
+        found = {}
+        candidate_ids = sorted({title_id for _, title_id in hits})
+        for start in range(0, len(candidate_ids), 900):
+            part = candidate_ids[start:start + 900]
+            for title_id, cluster_id, unit, norm, sig in conn.execute(
+                    f"SELECT title_id, cluster_id, units, norm, signature FROM titles "
+                    f"WHERE title_id IN ({','.join('?' * len(part))})", part):
+                found[title_id] = (title_id, cluster_id, unit, np.frombuffer(sig, dtype=np.uint64), norm)
+        candidates = {}
+        for pos, title_id in hits:
+            candidates.setdefault(pos, []).append(found[title_id])
+
+        # 묶음 합치기 (union-find, 작은 id가 대표)
+        parent = {}
+
+        def find(c):
+            while parent.get(c, c) != c:
+                c = parent[c]
+            return c
+
+        # 같은 배치 안의 후보: 앞서 처리한 새 제목 중 버킷이 겹치는 것
+        local = {}
+        clusters = []
+        probe_set = set(probe)
+        for p, norm in enumerate(norms):
+            if p not in probe_set:
+                clusters.append(ids[p])
+                continue
+            cands = list(candidates.get(p, []))
+            seen = set()
+            for b in range(BANDS):
+                for q in local.get((b, int(keys[p, b])), []):
+                    if q not in seen:
+                        seen.add(q)
+                        cands.append((ids[q], clusters[q], unit_list[q], sigs[q], norms[q]))
+            matched = set()
+            if cands:
+                # 서명 추정치로 거른 뒤 경계 근처는 실제 3-gram 자카드로 확인 (추정 오차로 인한 잘못된 병합 방지)
+                sims = similarity(sigs[p], np.stack([c[3] for c in cands]))
+                own = grams(norm)
+                matched = {find(c[1]) for c, est in zip(cands, sims)
+                           if est >= SIMILARITY - MARGIN and _compatible(unit_list[p], c[2])
+                           and (est >= SIMILARITY + MARGIN or jaccard(own, grams(c[4])) >= SIMILARITY)}
+            cluster = min(matched) if matched else ids[p]
+            for other in matched - {cluster}:
+                parent[other] = cluster
+            clusters.append(cluster)
+            for b in range(BANDS):
+                local.setdefault((b, int(keys[p, b])), []).append(p)
+
+        clusters = [find(c) for c in clusters]
+        conn.executemany("INSERT INTO titles VALUES (?, ?, ?, ?, ?)",
+                         [(i, n, u, c, s.tobytes()) for i, n, u, c, s in zip(ids, norms, unit_list, clusters, sigs)])
+        conn.executemany("INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)",
+                         [(b, int(keys[p, b]), ids[p]) for p in probe for b in range(BANDS)])
+        merges = [(find(c), c) for c in parent]
+        conn.executemany("UPDATE titles SET cluster_id = ? WHERE cluster_id = ?", merges)
+        totals["titles"] += len(norms)
+        totals["merged"] += len(merges)
+        return dict(zip(norms, ids))
+
+    def assignments(self):
+        # 상품(productId)별 묶음 번호와 대표 제목 (묶음에서 가장 먼저 색인된 정규화 제목)
+        conn = self._connect()
+        try:
+            return pd.read_sql_query(
+                "SELECT i.item_key, t.cluster_id, r.norm AS label, t.norm FROM items i "
+                "JOIN titles t ON t.title_id = i.title_id JOIN titles r ON r.title_id = t.cluster_id", conn)
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            items, titles, clusters = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM items), COUNT(*), COUNT(DISTINCT cluster_id) FROM titles").fetchone()
+        finally:
+            conn.close()
+        return {"items": items, "titles": titles, "clusters": clusters}
+
+
+def with_clusters(df_shop, assignments):
+    # 쇼핑 프레임에 묶음 번호/대표 제목을 붙임 (색인에 없는 상품은 자기 자신이 한 묶음)
+    ids = df_shop['productId'].astype(str)
+    mapped = assignments.drop_duplicates('item_key').set_index('item_key')
+    cluster = ids.map(mapped['cluster_id'])
+    label = ids.map(mapped['label'])
+    missing = cluster.isna()
+    if missing.any():
+        cluster = cluster.where(~missing, ids.map(lambda k: f"p{k}"))
+        label = label.where(~missing, df_shop['title'].map(normalize_title))
+    return df_shop.assign(cluster_id=cluster.astype(str), product=label)
+
+
+def price_spread(df_shop, min_malls=2):
+    # with_clusters() 결과에서 판매처 2곳 이상에 올라온 상품별 가격 범위
+    g = df_shop.dropna(subset=['lprice']).groupby('cluster_id', observed=True)
+    out = g.agg(product=('product', 'first'), keyword=('keyword', 'first'), listings=('productId', 'size'),
+                malls=('mallName', 'nunique'), min_price=('lprice', 'min'), median_price=('lprice', 'median'),
+                max_price=('lprice', 'max'))
+    cheapest = df_shop.loc[g['lprice'].idxmin(), ['cluster_id', 'mallName']].set_index('cluster_id')['mallName']
+    out['cheapest_mall'] = cheapest.reindex(out.index).astype(str)
+    out['spread'] = out['max_price'] - out['min_price']
+    out['spread_pct'] = out['spread'] / out['min_price'].where(out['min_price'] > 0) * 100
+    out = out[out['malls'] >= min_malls]
+    return out.sort_values(['malls', 'spread_pct'], ascending=False).reset_index()
+
+
+def build_from_store(index=None, store_dir=storage.STORE_DIR):
+    # 저장소의 shop 수집일 파티션을 오래된 순으로 색인에 추가
+    index = index or ProductClusters()
+    for collected in sorted({k.get("collected") for k in storage.partitions("shop", store_dir)}):
+        df = storage.read("shop", columns=["title", "mallName", "productId", "lprice", "keyword"],
+                          filters=[("collected", "=", collected)], store_dir=store_dir)
+        df = df.astype(object).where(df.notna(), None)
+        titles, merged = index.add(df.to_dict("records"), run_date=collected)
+        print(f"[shop] {collected}: {len(df)} items, {titles} new titles, {merged} merged clusters")
+    return index
+
+
+def benchmark(sizes=(1_000, 4_000, 16_000, 64_000), path=None):
+    # 서로 다른 제목 수를 늘려 가며 색인 시간 (전체 쌍 비교라면 4배마다 16배)
+    import tempfile
+    from synthetic_data import keyword_list, SHOP_SUFFIXES
+    rng = np.random.default_rng(0)
+    syllables = list("가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주추쿠투푸후")
+    words = ["피스타치오", "카다이프", "초콜릿", "쫀득", "모찌", "쿠키", "스프레드", "두쫀쿠", "디저트", "크림"]
+    for n in sizes:
+        kws = keyword_list(max(1, n // 40))
+        # 상품마다 고유한 이름(3음절 2개) + 흔한 단어 2개 + 구성
+        base = [f"{''.join(rng.choice(syllables, 3))} {''.join(rng.choice(syllables, 3))} "
+                f"{' '.join(rng.choice(words, 2, replace=False))} {SHOP_SUFFIXES[i % len(SHOP_SUFFIXES)]}"
+                for i in range(n // 4)]
+        # 같은 상품을 판매처마다 조금씩 다르게 올린 제목
+        items = []
+        for i in range(n):
+            title = base[i % len(base)]
+            if rng.random() < 0.5:
+                title = title.replace(" ", "", 1)
+            items.append({"productId": str(i), "title": f"[몰{i % 97}] <b>{title}</b> 당일발송",
+                          "mallName": f"몰{i % 97}", "lprice": 1000, "keyword": kws[0]})
+        db = path or os.path.join(tempfile.mkdtemp(), "clusters.sqlite")
+        index = ProductClusters(db)
+        started = time.perf_counter()
+        index.add(items)
+        elapsed = time.perf_counter() - started
+        s = index.stats()
+        print(f"items {n:>7,} | titles {s['titles']:>7,} | clusters {s['clusters']:>6,} (expected {len(base):,}) | "
+              f"{elapsed:.2f}s ({elapsed / n * 1e6:.0f}us/item)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="쇼핑 상품 동일 상품 묶기 색인 (MinHash/LSH)")
+    parser.add_argument("command", choices=["build", "stats", "spread", "bench"])
+    parser.add_argument("--db", default=CLUSTER_DB)
+    parser.add_argument("--store-dir", default=storage.STORE_DIR)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_from_store(ProductClusters(args.db), args.store_dir)
+    elif args.command == "stats":
+        print(ProductClusters(args.db).stats())
+    elif args.command == "spread":
+        df = storage.read("shop", latest=True, store_dir=args.store_dir)
+        spread = price_spread(with_clusters(df, ProductClusters(args.db).assignments()))
+        with pd.option_context("display.width", 200, "display.max_colwidth", 40):
+            print(spread.head(args.top).to_string(index=False))
+    else:
+        benchmark()
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import argparse
+import threading
+import functools
+import pandas as pd
+from contextlib import nullcontext
+from datetime import datetime
+from settings import STATE_DIR
+
+# Streamlit 앱 rerun 단위 실행 시간 측정
+# - span("이름") 컨텍스트 매니저 / @timed("이름") 데코레이터로 로드, 변환, 차트 생성 구간을 감싼다.
+# - instrument_*()는 px.* 그림 생성(figure.*), st.plotly_chart / st.dataframe 등 직렬화/전송(render.*),
+#   집계/저장소 함수 호출을 감싸 자동으로 하위 구간으로 기록한다.
+# - 측정은 세션 스레드에 프로파일러가 켜져 있을 때만 한다. 꺼져 있으면 span()은 미리 만든 빈 컨텍스트를 돌려줄 뿐이다.
+# - rerun마다 구간 목록을 JSON 한 줄로 남기고(.naver_state/profile/{app}.jsonl),
+#   구간별 누적 횟수/시간을 Prometheus 텍스트 형식(.naver_state/profile/{app}.prom)으로 덮어쓴다.
+
+PROFILE_DIR = os.path.join(STATE_DIR, "profile")
+RENDER_CALLS = ["plotly_chart", "dataframe", "table", "write", "metric"]
+FIGURE_CALLS = ["line", "bar", "box", "area", "pie", "imshow", "scatter", "histogram"]
+TOGGLE_KEY = "_profile_enabled"
+
+_local = threading.local()
+_NOOP = nullcontext()
+_totals = {}
+_totals_lock = threading.Lock()
+
+
+def enabled_by_default():
+    return os.getenv("NAVER_PROFILE", "").lower() in ("1", "true", "yes")
+
+
+def _rss():
+    # 현재 프로세스 RSS(바이트). /proc이 없으면 최대 RSS로 대신함
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Span:
+    __slots__ = ("profiler", "name", "path", "depth", "started", "rss", "ms", "child_ms", "rss_delta")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.child_ms = 0.0
+
+    def __enter__(self):
+        stack = self.profiler.stack
+        self.path = f"{stack[-1].path}/{self.name}" if stack else self.name
+        self.depth = len(stack)
+        stack.append(self)
+        self.rss = _rss()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.started) * 1000
+        self.rss_delta = _rss() - self.rss
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].child_ms += self.ms
+        self.profiler.spans.append(self)
+        return False
+
+
+class Profiler:
+    # rerun 하나의 측정 결과
+    def __init__(self, app):
+        self.app = app
+        self.stack = []
+        self.spans = []
+        self.started = time.perf_counter()
+        self.rss = _rss()
+        self.total_ms = None
+
+    def span(self, name):
+        return Span(self, name)
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        return self
+
+    def rows(self):
+        # 시작 순서대로 (들여쓰기된 이름, 전체 ms, 자기 ms, RSS 변화)
+        return [{"span": "  " * s.depth + s.name, "path": s.path, "ms": round(s.ms, 2),
+                 "self_ms": round(s.ms - s.child_ms, 2), "rss_mb": round(s.rss_delta / 1024 / 1024, 2)}
+                for s in sorted(self.spans, key=lambda s: s.started)]
+
+
+def start(app, enabled=True):
+    # rerun 시작 시 호출. enabled가 아니면 이 스레드의 측정을 끔
+    _local.profiler = Profiler(app) if enabled else None
+    return _local.profiler
+
+
+def current():
+    return getattr(_local, "profiler", None)
+
+
+def span(name):
+    profiler = getattr(_local, "profiler", None)
+    if profiler is None:
+        return _NOOP
+    return Span(profiler, name)
+
+
+def timed(name=None):
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profiler = getattr(_local, "profiler", None)
+            if profiler is None:
+                return fn(*args, **kwargs)
+            with Span(profiler, label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument(obj, names, prefix):
+    # 모듈/클래스의 함수를 한 번만 감싸 "prefix.이름" 구간으로 기록 (측정이 꺼진 세션은 그대로 통과)
+    marker = f"_naver_profiled_{prefix}"
+    if getattr(obj, marker, False):
+        return
+    for name in names:
+        if hasattr(obj, name):
+            setattr(obj, name, timed(f"{prefix}.{name}")(getattr(obj, name)))
+    setattr(obj, marker, True)
+
+
+def instrument_streamlit(st, calls=RENDER_CALLS):
+    # st.* 와 컨테이너(DeltaGenerator) 렌더링 메서드 (직렬화/전송 시간)
+    from streamlit.delta_generator import DeltaGenerator
+    instrument(DeltaGenerator, calls, "render")
+    instrument(st, calls, "render")
+
+
+def instrument_plotly(px, calls=FIGURE_CALLS):
+    # plotly.express 그림 생성 시간
+    instrument(px, calls, "figure")
+
+
+def export(profiler, profile_dir=PROFILE_DIR):
+    # 구조화 로그 한 줄 + 누적 Prometheus 텍스트 파일
+    if profiler is None or profiler.total_ms is None:
+        return
+    os.makedirs(profile_dir, exist_ok=True)
+    record = {"ts": datetime.now().isoformat(timespec="milliseconds"), "app": profiler.app,
+              "total_ms": round(profiler.total_ms, 2), "rss_mb": round(_rss() / 1024 / 1024, 1),
+              "spans": [{k: r[k] for k in ("path", "ms", "self_ms", "rss_mb")} for r in profiler.rows()]}
+    with _totals_lock:
+        with open(os.path.join(profile_dir, f"{profiler.app}.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        totals = _totals.setdefault(profiler.app, {})
+        for s in profiler.spans + [None]:
+            path, seconds = (s.path, s.ms / 1000) if s else ("rerun", profiler.total_ms / 1000)
+            entry = totals.setdefault(path, {"count": 0, "sum": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["sum"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+        text = prometheus_text(profiler.app, totals)
+        path = os.path.join(profile_dir, f"{profiler.app}.prom")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+
+def prometheus_text(app, totals):
+    lines = ["# HELP naver_app_span_seconds Streamlit rerun span durations",
+             "# TYPE naver_app_span_seconds summary"]
+    for path, entry in sorted(totals.items()):
+        labels = f'app="{app}",span="{path}"'
+        lines.append(f"naver_app_span_seconds_count{{{labels}}} {entry['count']}")
+        lines.append(f"naver_app_span_seconds_sum{{{labels}}} {entry['sum']:.6f}")
+    lines += ["# HELP naver_app_span_seconds_max Slowest observed span duration",
+              "# TYPE naver_app_span_seconds_max gauge"]
+    for path, entry in sorted(totals.items()):
+        lines.append(f'naver_app_span_seconds_max{{app="{app}",span="{path}"}} {entry["max"]:.6f}')
+    lines += ["# HELP naver_app_rss_bytes Process resident memory", "# TYPE naver_app_rss_bytes gauge",
+              f'naver_app_rss_bytes{{app="{app}"}} {_rss()}']
+    return "\n".join(lines) + "\n"
+
+
+def start_rerun(st, app):
+    # 스크립트 맨 앞에서 호출. 사이드바 체크박스(render_panel에서 그림)의 이전 값으로 켜고 끔
+    return start(app, st.session_state.get(TOGGLE_KEY, enabled_by_default()))
+
+
+def render_panel(st, profiler, slowest=10):
+    # rerun 끝에서 호출: 켜고 끄는 체크박스, 측정 종료, 내보내기, 사이드바 패널 표시
+    st.sidebar.checkbox("⏱ 실행 시간 프로파일링", value=enabled_by_default(), key=TOGGLE_KEY)
+    if profiler is None:
+        return
+    profiler.finish()
+    export(profiler)
+    # 패널 자체를 그리는 시간은 측정하지 않음
+    _local.profiler = None
+    rows = pd.DataFrame(profiler.rows())
+    with st.sidebar.expander(f"⏱ 이번 rerun {profiler.total_ms:.0f}ms", expanded=True):
+        if rows.empty:
+            st.write("측정된 구간이 없습니다.")
+            return
+        st.caption(f"구간 {len(rows)}개 · 자기 시간 상위 {slowest}개")
+        st.dataframe(rows.nlargest(slowest, "self_ms")[["path", "self_ms", "ms", "rss_mb"]],
+                     hide_index=True, use_container_width=True)
+        st.caption("전체 구간 (시작 순)")
+        st.dataframe(rows[["span", "ms", "self_ms", "rss_mb"]], hide_index=True, use_container_width=True)
+        st.caption(f"로그: {os.path.join(PROFILE_DIR, profiler.app)}.jsonl / .prom")
+
+
+def summarize(app, profile_dir=PROFILE_DIR, last=50):
+    # 최근 rerun 로그에서 구간별 중앙값/최대값
+    path = os.path.join(profile_dir, f"{app}.jsonl")
+    if not os.path.exists(path):
+        print(f"No profile log at {path}")
+        return None
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()][-last:]
+    rows = [dict(s, rerun=i) for i, r in enumerate(records) for s in r["spans"]]
+    rows += [{"rerun": i, "path": "rerun", "ms": r["total_ms"], "self_ms": None} for i, r in enumerate(records)]
+    df = pd.DataFrame(rows)
+    summary = (df.groupby("path")
+                 .agg(reruns=("rerun", "nunique"), median_ms=("ms", "median"), max_ms=("ms", "max"),
+                      self_median_ms=("self_ms", "median"))
+                 .sort_values("median_ms", ascending=False))
+    print(f"{app}: last {len(records)} reruns")
+    print(summary.round(2).to_string())
+    return summary
+
+
+def overhead(n=200_000):
+    # 측정이 꺼진 상태와 켜진 상태에서 span() 한 번의 비용
+    results = {}
+    for label, enabled in [("disabled", False), ("enabled", True)]:
+        start("overhead", enabled)
+        started = time.perf_counter()
+        for _ in range(n):
+            with span("x"):
+                pass
+        results[label] = (time.perf_counter() - started) / n * 1e9
+        _local.profiler = None
+    print(f"span() cost: disabled {results['disabled']:.0f}ns | enabled {results['enabled']:.0f}ns per call")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streamlit 앱 rerun 프로파일 로그 요약")
+    parser.add_argument("command", choices=["summary", "overhead"])
+    parser.add_argument("--app", default="dashboard", help="dashboard 또는 app")
+    parser.add_argument("--last", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        summarize(args.app, last=args.last)
+    else:
+        overhead()
@@ -0,0 +1,173 @@
+import os
+import time
+import heapq
+import random
+import sqlite3
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from settings import STATE_DIR
+
+# 우선순위 클래스 (값이 작을수록 먼저 처리)
+INTERACTIVE = 0   # 대시보드 실시간 조회
+BATCH = 10        # 수집기 / 백필
+
+# 호출 한도 그룹: 하루 한도(doc 기준), 초당 허용량, 배치 작업이 건드리지 못하는 대시보드 예약분
+QUOTA_GROUPS = {
+    "search": {"daily": 25000, "per_sec": 10, "interactive_reserve": 2000},
+    "datalab": {"daily": 1000, "per_sec": 5, "interactive_reserve": 100},
+    "shopping_insight": {"daily": 1000, "per_sec": 5, "interactive_reserve": 100},
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+
+# Naver API 한도는 한국 시간 자정에 초기화된다
+KST = timezone(timedelta(hours=9))
+
+USAGE_DB = os.path.join(STATE_DIR, "api_usage.sqlite")
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def quota_group(endpoint):
+    # endpoint_name() 결과 -> 한도 그룹
+    if endpoint.startswith("search/"):
+        return "search"
+    if endpoint.startswith("datalab/shopping"):
+        return "shopping_insight"
+    return "datalab"
+
+
+def backoff_delay(attempt, retry_after=None):
+    # full jitter 지수 백오프, 서버가 Retry-After를 주면 그 값을 하한으로 사용
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        try:
+            delay = max(delay, float(retry_after))
+        except ValueError:
+            pass
+    return delay
+
+
+class DailyUsage:
+    # 프로세스 간(수집기 <-> 대시보드) 공유되는 엔드포인트 그룹별 일일 호출 카운터
+    def __init__(self, path=USAGE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS usage ("
+                         "day TEXT, grp TEXT, count INTEGER NOT NULL DEFAULT 0, "
+                         "PRIMARY KEY (day, grp))")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def today():
+        return datetime.now(KST).strftime("%Y-%m-%d")
+
+    def consume(self, group, limit):
+        # limit 미만일 때만 원자적으로 1 증가, 성공 여부 반환
+        day = self.today()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR IGNORE INTO usage (day, grp, count) VALUES (?, ?, 0)", (day, group))
+                cur = conn.execute("UPDATE usage SET count = count + 1 "
+                                   "WHERE day = ? AND grp = ? AND count < ?", (day, group, limit))
+                return cur.rowcount == 1
+        finally:
+            conn.close()
+
+    def counts(self, day=None):
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT grp, count FROM usage WHERE day = ?", (day or self.today(),))
+            return dict(rows.fetchall())
+        finally:
+            conn.close()
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class RequestScheduler:
+    # 그룹별 토큰 버킷 + 우선순위 대기열 + 일일 한도
+    # 같은 그룹의 토큰은 항상 우선순위가 가장 높은(값이 작은) 대기자에게 먼저 배정된다.
+    def __init__(self, groups=None, usage=None):
+        self.groups = groups or QUOTA_GROUPS
+        self.usage = usage or DailyUsage()
+        self.buckets = {name: TokenBucket(cfg["per_sec"]) for name, cfg in self.groups.items()}
+        self.waiters = {name: [] for name in self.groups}
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+
+    def daily_limit(self, group, priority):
+        cfg = self.groups[group]
+        if priority <= INTERACTIVE:
+            return cfg["daily"]
+        return cfg["daily"] - cfg.get("interactive_reserve", 0)
+
+    def acquire(self, group, priority=BATCH):
+        bucket = self.buckets[group]
+        waiters = self.waiters[group]
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(waiters, entry)
+            try:
+                while True:
+                    if waiters[0] == entry:
+                        bucket.refill()
+                        if bucket.tokens >= 1:
+                            bucket.tokens -= 1
+                            break
+                        self._cond.wait(bucket.wait_time())
+                    else:
+                        self._cond.wait()
+            finally:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+        if not self.usage.consume(group, self.daily_limit(group, priority)):
+            raise QuotaExceeded(f"daily quota reached for '{group}' "
+                                f"(limit {self.daily_limit(group, priority)}, priority {priority})")
+
+    def available(self, group, priority=BATCH):
+        # 해당 우선순위가 오늘 더 쓸 수 있는 호출 수 (배치는 대시보드 예약분 제외)
+        return max(0, self.daily_limit(group, priority) - self.usage.counts().get(group, 0))
+
+    def remaining(self):
+        counts = self.usage.counts()
+        return {name: cfg["daily"] - counts.get(name, 0) for name, cfg in self.groups.items()}
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler():
+    # 프로세스 전체가 공유하는 스케줄러 (수집기와 대시보드는 DB로 일일 카운터를 공유)
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler()
+        return _default_scheduler
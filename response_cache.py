@@ -0,0 +1,402 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from settings import STATE_DIR
+
+# API 응답 캐시 (재배포/워커 재시작 후에도 유지, 여러 레플리카가 공유)
+# - 키: 엔드포인트 + 정규화된 쿼리/바디
+# - 엔드포인트별 TTL이 지나면 stale로 보고, stale 구간에서는 캐시를 즉시 반환하며 백그라운드에서 갱신
+# - 2단 구성: 프로세스 안 LRU(메모리) -> 공유 계층(기본 SQLite 파일, 같은 볼륨의 레플리카가 함께 사용)
+#   공유 계층은 get/put/acquire/release/stats를 가진 객체로 바꿔 끼울 수 있다 (SqliteBackend 참고).
+# - 같은 키의 동시 요청은 upstream을 한 번만 호출: 프로세스 안에서는 진행 중인 호출을 기다리고,
+#   레플리카 간에는 공유 계층의 임대(lease)를 먼저 잡은 쪽만 호출하고 나머지는 결과가 저장되기를 기다림
+# - 공유 계층 전체 크기가 상한을 넘으면 최근 사용 시각이 가장 오래된 항목부터 제거(LRU)
+
+CACHE_DB = os.path.join(STATE_DIR, "response_cache.sqlite")
+MAX_CACHE_BYTES = int(os.getenv("NAVER_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+MEMORY_CACHE_BYTES = int(os.getenv("NAVER_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+# 호출을 맡은 레플리카가 죽어도 이 시간이 지나면 다른 레플리카가 넘겨받음
+LEASE_SECONDS = 120
+# 다른 레플리카의 결과를 기다릴 때 공유 계층을 다시 확인하는 간격
+WAIT_POLL = 0.05
+
+# endpoint_name() 접두어별 (fresh TTL, stale 허용 구간) 초
+ENDPOINT_TTLS = {
+    "search/": (60 * 60, 24 * 60 * 60),
+    "datalab/shopping": (6 * 60 * 60, 3 * 24 * 60 * 60),
+    "datalab/search": (6 * 60 * 60, 3 * 24 * 60 * 60),
+}
+DEFAULT_TTL = (60 * 60, 24 * 60 * 60)
+COUNTERS = ["memory_hits", "shared_hits", "stale_hits", "misses", "coalesced", "loads", "refreshes", "errors"]
+
+
+def endpoint_ttl(endpoint):
+    for prefix, ttl in ENDPOINT_TTLS.items():
+        if endpoint.startswith(prefix):
+            return ttl
+    return DEFAULT_TTL
+
+
+def cache_key(endpoint, params=None, body=None):
+    # 파라미터 순서/공백 차이와 무관하게 같은 요청은 같은 키가 되도록 정규화
+    normalized = json.dumps({"endpoint": endpoint, "params": params or {}, "body": body},
+                            sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class MemoryLRU:
+    # 프로세스 안 계층: 키 -> (JSON 문자열, 저장 시각). 호출마다 새로 파싱해 호출자끼리 객체를 공유하지 않음
+    def __init__(self, max_bytes=MEMORY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, data, created):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self.entries[key] = (data, created)
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, (evicted, _) = self.entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+
+class SqliteBackend:
+    # 공유 계층: 같은 호스트/볼륨의 레플리카가 함께 여는 SQLite 파일 (응답 + 호출 임대)
+    def __init__(self, path=CACHE_DB, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, endpoint TEXT, value TEXT, "
+                         "size INTEGER, created REAL, accessed REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, expires REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        # (JSON 문자열, 저장 시각) 또는 None
+        conn = self._connect()
+        try:
+            with conn:
+                row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+            return row
+        finally:
+            conn.close()
+
+    def put(self, key, endpoint, data, created):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO responses (key, endpoint, value, size, created, accessed) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", (key, endpoint, data, len(data), created, created))
+                self._evict(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def acquire(self, key, owner, seconds=LEASE_SECONDS):
+        # 키의 upstream 호출 임대를 잡으면 True (만료된 임대는 넘겨받음)
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM leases WHERE key = ? AND expires < ?", (key, now))
+                return conn.execute("INSERT OR IGNORE INTO leases VALUES (?, ?, ?)",
+                                    (key, owner, now + seconds)).rowcount == 1
+        finally:
+            conn.close()
+
+    def release(self, key, owner):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {"entries": count, "bytes": size}
+        finally:
+            conn.close()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_DB, max_bytes=MAX_CACHE_BYTES, memory_bytes=MEMORY_CACHE_BYTES, backend=None):
+        self.backend = backend or SqliteBackend(path, max_bytes)
+        self.memory = MemoryLRU(memory_bytes)
+        self.owner = uuid.uuid4().hex
+        self.inflight = {}
+        self.refreshing = set()
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _lookup(self, key, fresh_ttl=0):
+        # (JSON 문자열, 저장 시각, 계층). 메모리 사본이 fresh가 아니면 다른 레플리카가 갱신했을 수 있어 공유 계층도 확인
+        entry = self.memory.get(key)
+        if entry is not None and time.time() - entry[1] < fresh_ttl:
+            return entry + ("memory",)
+        shared = self.backend.get(key)
+        if shared is not None and (entry is None or shared[1] > entry[1]):
+            self.memory.put(key, shared[0], shared[1])
+            return tuple(shared) + ("shared",)
+        return entry + ("memory",) if entry is not None else None
+
+    def get(self, key):
+        # (값, 저장 시각) 또는 None
+        entry = self._lookup(key)
+        return None if entry is None else (json.loads(entry[0]), entry[1])
+
+    def put(self, key, endpoint, value):
+        data = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        self.backend.put(key, endpoint, data, now)
+        self.memory.put(key, data, now)
+
+    def fetch(self, endpoint, params, body, loader):
+        # loader(): 실제 API 호출. fresh면 캐시, stale이면 캐시 반환 + 백그라운드 갱신, 만료/없음이면 동기 호출
+        key = cache_key(endpoint, params, body)
+        fresh_ttl, stale_ttl = endpoint_ttl(endpoint)
+        entry = self._lookup(key, fresh_ttl)
+        if entry is not None:
+            data, created, tier = entry
+            age = time.time() - created
+            if age < fresh_ttl:
+                self._count(f"{tier}_hits")
+                return json.loads(data)
+            if age < fresh_ttl + stale_ttl:
+                self._count("stale_hits")
+                self._refresh_in_background(key, endpoint, loader)
+                return json.loads(data)
+
+        self._count("misses")
+        return self._load(key, endpoint, fresh_ttl, loader)
+
+    def _load(self, key, endpoint, fresh_ttl, loader):
+        # 프로세스 안 single-flight: 같은 키를 이미 호출 중이면 그 결과를 기다림
+        with self._lock:
+            flight = self.inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.inflight[key] = {"done": threading.Event(), "data": None, "error": None}
+        if not leader:
+            self._count("coalesced")
+            flight["done"].wait()
+            if flight["error"] is not None:
+                raise flight["error"]
+            return json.loads(flight["data"])
+
+        try:
+            value, flight["data"] = self._load_shared(key, endpoint, fresh_ttl, loader)
+            return value
+        except Exception as e:
+            flight["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self.inflight[key]
+            flight["done"].set()
+
+    def _load_shared(self, key, endpoint, fresh_ttl, loader):
+        # 레플리카 간 single-flight: 임대를 잡은 쪽만 호출하고, 못 잡으면 결과가 저장되거나 임대가 풀릴 때까지 대기
+        # (값, JSON 문자열)을 반환
+        waited = False
+        while True:
+            if self.backend.acquire(key, self.owner):
+                try:
+                    # 임대를 기다리는 사이 다른 레플리카가 채운 값이 있으면 그대로 사용
+                    shared = self.backend.get(key)
+                    if shared is not None and time.time() - shared[1] < fresh_ttl:
+                        self.memory.put(key, shared[0], shared[1])
+                        return json.loads(shared[0]), shared[0]
+                    self._count("loads")
+                    try:
+                        value = loader()
+                    except Exception:
+                        self._count("errors")
+                        raise
+                    data = json.dumps(value, ensure_ascii=False)
+                    now = time.time()
+                    self.backend.put(key, endpoint, data, now)
+                    self.memory.put(key, data, now)
+                    return value, data
+                finally:
+                    self.backend.release(key, self.owner)
+            if not waited:
+                self._count("coalesced")
+                waited = True
+            time.sleep(WAIT_POLL)
+            shared = self.backend.get(key)
+            if shared is not None and time.time() - shared[1] < fresh_ttl:
+                self.memory.put(key, shared[0], shared[1])
+                return json.loads(shared[0]), shared[0]
+
+    def _refresh_in_background(self, key, endpoint, loader):
+        with self._lock:
+            if key in self.refreshing or key in self.inflight:
+                return
+            self.refreshing.add(key)
+
+        def _run():
+            try:
+                # 다른 레플리카가 이미 갱신 중이면 넘어감
+                if not self.backend.acquire(key, self.owner):
+                    return
+                try:
+                    self._count("refreshes")
+                    self.put(key, endpoint, loader())
+                finally:
+                    self.backend.release(key, self.owner)
+            except Exception as e:
+                self._count("errors")
+                print(f"Background refresh failed for {endpoint}: {e}")
+            finally:
+                with self._lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def stats(self):
+        # 공유 계층 크기 + 이 프로세스의 메모리 계층 크기와 요청 카운터
+        stats = self.backend.stats()
+        with self._lock:
+            stats.update(self.counters)
+        stats.update(memory_entries=len(self.memory.entries), memory_bytes=self.memory.bytes)
+        return stats
+
+
+# --- 검증: 여러 프로세스(레플리카) x 스레드(세션)가 같은 키를 동시에 요청해도 upstream 호출은 키당 한 번 ---
+def _replica(path, keys, sessions, delay, start_at, out):
+    cache = ResponseCache(path)
+
+    def loader(key):
+        time.sleep(delay)
+        return {"key": key, "items": list(range(100))}
+
+    def session():
+        for key in keys:
+            value = cache.fetch("search/shop", {"query": key}, None, lambda key=key: loader(key))
+            assert value["key"] == key
+    # 모든 레플리카가 같은 순간에 시작하도록 맞춤 (콜드 스타트 폭주)
+    time.sleep(max(0.0, start_at - time.time()))
+    threads = [threading.Thread(target=session) for _ in range(sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.put(cache.stats())
+
+
+def stampede(replicas=4, sessions=8, keys=5, delay=0.3, path=None):
+    import tempfile
+    import multiprocessing as mp
+    path = path or os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    SqliteBackend(path)
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    names = [f"키워드{i}" for i in range(keys)]
+    start_at = time.time() + 2.0
+    procs = [ctx.Process(target=_replica, args=(path, names, sessions, delay, start_at, out))
+             for _ in range(replicas)]
+    for p in procs:
+        p.start()
+    stats = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    totals = {name: sum(s[name] for s in stats) for name in COUNTERS}
+    requests = replicas * sessions * keys
+    print(f"replicas {replicas} x sessions {sessions} x keys {keys} = {requests} requests | "
+          + ", ".join(f"{name} {totals[name]}" for name in COUNTERS))
+    return totals
+
+
+def selftest():
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite")
+    totals = stampede(path=path)
+    assert totals["loads"] == 5, totals
+    assert totals["errors"] == 0, totals
+    # 모두 캐시에 있으므로 두 번째 폭주는 upstream 호출 없음
+    totals = stampede(path=path)
+    assert totals["loads"] == 0 and totals["misses"] == 0, totals
+
+    # 호출이 실패하면 기다리던 세션도 같은 예외를 받고, 다음 요청은 다시 호출
+    cache = ResponseCache(os.path.join(tempfile.mkdtemp(), "cache.sqlite"))
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+    errors = []
+
+    def session():
+        try:
+            cache.fetch("search/blog", {"query": "x"}, None, failing)
+        except RuntimeError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=session) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len(errors) == 4, (calls, errors)
+    assert cache.fetch("search/blog", {"query": "x"}, None, lambda: {"ok": 1}) == {"ok": 1}
+    print("selftest ok")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API 응답 캐시 (메모리 LRU + 공유 SQLite, 요청 합치기)")
+    parser.add_argument("command", choices=["stats", "stampede", "selftest"])
+    parser.add_argument("--db", default=CACHE_DB)
+    parser.add_argument("--replicas", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=5)
+    args = parser.parse_args()
+    if args.command == "stats":
+        print(SqliteBackend(args.db).stats())
+    elif args.command == "stampede":
+        stampede(args.replicas, args.sessions, args.keys)
+    else:
+        selftest()
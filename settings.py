@@ -0,0 +1,7 @@
+import os
+
+# 수집 데이터(CSV 등) 저장 위치
+DATA_DIR = os.getenv("NAVER_DATA_DIR", "raw_data")
+
+# 호출량 카운터, 캐시 등 실행 상태 저장 위치 (버전 관리 대상 아님)
+STATE_DIR = os.getenv("NAVER_STATE_DIR", ".naver_state")
@@ -0,0 +1,137 @@
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from rate_limiter import QuotaExceeded, BATCH
+from datalab_planner import plan_batches, stitch, parse_trend
+
+# 쇼핑인사이트 구간별(기기/성별/연령) 및 키워드별 추이 수집 (doc/shopping_insight.md)
+# - 분야 x 구간 차원, (분야, 키워드) x 구간 차원, 분야별 키워드 비교를 요청 목록으로 펼친 뒤
+#   일일 한도 안에 들어가는지 먼저 확인하고 동시에 요청한다.
+# - 결과는 (date, category, keyword, dimension, segment, ratio) long format 한 테이블로 저장하고,
+#   대시보드는 월별로 미리 집계한 segment_monthly만 읽는다.
+
+CATEGORY_PATH = "/v1/datalab/shopping/category/{dimension}"
+KEYWORD_PATH = "/v1/datalab/shopping/category/keyword/{dimension}"
+KEYWORDS_PATH = "/v1/datalab/shopping/category/keywords"
+SHOPPING_MAX_KEYWORDS = 5
+DIMENSIONS = ["device", "gender", "age"]
+SEGMENT_LABELS = {
+    "device": {"pc": "PC", "mo": "모바일"},
+    "gender": {"m": "남성", "f": "여성"},
+    "age": {"10": "10대", "20": "20대", "30": "30대", "40": "40대", "50": "50대", "60": "60대 이상"},
+}
+SEGMENT_COLUMNS = ["date", "category", "keyword", "dimension", "segment", "ratio"]
+
+
+def plan_segment_tasks(categories, keywords=None, dimensions=None):
+    # categories: 분야 코드 목록, keywords: {분야 코드: [키워드, ...]}
+    # 작업 하나 = 구간 요청 1건, 또는 분야별 키워드 비교(5개 초과 시 기준 키워드를 공유하는 여러 요청)
+    keywords = keywords or {}
+    dimensions = dimensions or DIMENSIONS
+    tasks = []
+    for category in categories:
+        for dimension in dimensions:
+            tasks.append({"task": f"{category}::{dimension}", "category": category, "keyword": "",
+                          "dimension": dimension, "requests": 1})
+        kws = keywords.get(category, [])
+        for kw in kws:
+            for dimension in dimensions:
+                tasks.append({"task": f"{category}:{kw}:{dimension}", "category": category, "keyword": kw,
+                              "dimension": dimension, "requests": 1})
+        if kws:
+            tasks.append({"task": f"{category}:*:keywords", "category": category, "keyword": "",
+                          "dimension": "keywords", "keywords": kws,
+                          "requests": len(plan_batches(kws, SHOPPING_MAX_KEYWORDS))})
+    return tasks
+
+
+def _body(task, start_date, end_date, time_unit):
+    body = {"startDate": start_date, "endDate": end_date, "timeUnit": time_unit, "category": task["category"]}
+    if task["keyword"]:
+        body["keyword"] = task["keyword"]
+    return body
+
+
+def _segment_rows(res_body, task):
+    rows = []
+    for result in res_body["results"]:
+        for item in result["data"]:
+            rows.append({"date": item["period"], "category": task["category"], "keyword": task["keyword"],
+                         "dimension": task["dimension"], "segment": item["group"], "ratio": item["ratio"]})
+    return rows
+
+
+def run_segment_task(client, task, start_date, end_date, time_unit="date"):
+    # 작업 하나를 실행해 long format 행 목록으로 반환
+    if task["dimension"] == "keywords":
+        # 분야 안 키워드 비교: 요청마다 기준 키워드를 넣어 하나의 스케일로 맞춤
+        keyword_items = [{"name": kw, "param": [kw]} for kw in task["keywords"]]
+        batches = plan_batches(keyword_items, SHOPPING_MAX_KEYWORDS)
+        responses = client.run_all([{"path": KEYWORDS_PATH,
+                                     "body": dict(_body(task, start_date, end_date, time_unit), keyword=batch)}
+                                    for batch in batches])
+        frames = []
+        for res_body, error in responses:
+            if error is not None:
+                raise error
+            frames.append(parse_trend(res_body, "segment"))
+        df = stitch(frames, batches[0][0]["name"], "segment")
+        return [{"date": d.strftime("%Y-%m-%d"), "category": task["category"], "keyword": seg,
+                 "dimension": "keywords", "segment": seg, "ratio": r}
+                for d, seg, r in zip(df["date"], df["segment"], df["ratio"])]
+    path = (KEYWORD_PATH if task["keyword"] else CATEGORY_PATH).format(dimension=task["dimension"])
+    return _segment_rows(client.request(path, body=_body(task, start_date, end_date, time_unit)), task)
+
+
+def check_quota(client, tasks, priority=BATCH):
+    # 요청 전에 쇼핑인사이트 일일 한도(배치 몫) 안에 들어가는지 확인
+    needed = sum(task["requests"] for task in tasks)
+    available = client.scheduler.available("shopping_insight", priority)
+    if needed > available:
+        raise QuotaExceeded(f"shopping insight segments need {needed} requests, {available} left today")
+    return needed
+
+
+def collect_segments(client, categories, keywords, start_date, end_date, time_unit="date", dimensions=None):
+    # 분야 x 구간 조합 전체를 동시에 수집해 long format DataFrame으로 반환
+    tasks = plan_segment_tasks(categories, keywords, dimensions)
+    needed = check_quota(client, tasks)
+    print(f"Collecting {len(tasks)} shopping insight segment slices ({needed} requests, "
+          f"concurrency={client.concurrency})...")
+
+    def _run(task):
+        try:
+            return run_segment_task(client, task, start_date, end_date, time_unit), None
+        except Exception as e:
+            return None, e
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, min(client.concurrency, len(tasks)))) as executor:
+        for task, (result, error) in zip(tasks, executor.map(_run, tasks)):
+            if error is not None:
+                print(f"Error in shopping insight {task['task']}: {error}")
+                continue
+            rows.extend(result)
+    return pd.DataFrame(rows, columns=SEGMENT_COLUMNS)
+
+
+def segment_monthly(df):
+    # 구간별 월 평균 비율과 비중(같은 날짜·대상·차원 안에서 구간 합 대비 비율의 월 평균)
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df['month'] = df['date'].dt.strftime('%Y-%m')
+    keys = ['category', 'keyword', 'dimension']
+    total = df.groupby(keys + ['date'], observed=True)['ratio'].transform('sum')
+    df['share'] = (df['ratio'] / total.where(total > 0)).fillna(0)
+    monthly = (df.groupby(keys + ['segment', 'month'], observed=True)
+                 .agg(ratio_mean=('ratio', 'mean'), share=('share', 'mean'))
+                 .reset_index())
+    return monthly[['month'] + keys + ['segment', 'ratio_mean', 'share']]
+
+
+def save_segments(df, save):
+    # save(data, dataset): collect_data.save_snapshot과 같은 형태의 저장 함수
+    if df.empty:
+        print("No shopping insight segments to save")
+        return
+    save(df, "segments")
+    save(segment_monthly(df), "segment_monthly")
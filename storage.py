@@ -0,0 +1,341 @@
+import os
+import re
+import sys
+import time
+import uuid
+import argparse
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from datetime import datetime
+from settings import DATA_DIR
+
+# 컬럼형(Parquet) 데이터 저장소
+# raw_data/store/{dataset}/{partition}=.../collected=YYYY-MM-DD/part-*.parquet
+# - 수집기는 append()로 실행마다 새 파티션 파일을 추가 (같은 날 같은 파티션 값은 마지막 실행으로 교체)
+# - 대시보드는 read()로 필요한 컬럼만, 조건(filters)은 파티션/로우그룹 단위로 걸러서 읽음
+
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# dataset -> (기존 CSV 접두어, 파티션 컬럼, 스키마)
+DATASETS = {
+    "trend": {
+        "prefix": "dubai_search_trend_2025",
+        "partition": "keyword_group",
+        "schema": pa.schema([("date", pa.date32()), ("keyword_group", CATEGORY), ("ratio", pa.float64())]),
+    },
+    "shopping": {
+        "prefix": "dubai_shopping_trend_2025",
+        "partition": "category",
+        "schema": pa.schema([("date", pa.date32()), ("category", CATEGORY), ("ratio", pa.float64())]),
+    },
+    "shop": {
+        "prefix": "dubai_shop_latest",
+        "partition": "keyword",
+        "schema": pa.schema([
+            ("title", pa.string()), ("link", pa.string()), ("image", pa.string()),
+            ("lprice", pa.int64()), ("hprice", pa.int64()),
+            ("mallName", CATEGORY), ("productId", pa.string()), ("productType", pa.int8()),
+            ("brand", CATEGORY), ("maker", CATEGORY),
+            ("category1", CATEGORY), ("category2", CATEGORY), ("category3", CATEGORY), ("category4", CATEGORY),
+            ("keyword", CATEGORY), ("sort", CATEGORY),
+        ]),
+    },
+    "blog": {
+        "prefix": "dubai_blog_latest",
+        "partition": "keyword",
+        "schema": pa.schema([
+            ("title", pa.string()), ("link", pa.string()), ("description", pa.string()),
+            ("bloggername", pa.string()), ("bloggerlink", pa.string()),
+            ("postdate", pa.date32()), ("keyword", CATEGORY), ("sort", CATEGORY),
+        ]),
+    },
+    # 쇼핑인사이트 기기/성별/연령/키워드 구간별 추이 (long format, 분야 코드로 파티션)
+    "segments": {
+        "prefix": "dubai_shopping_segments",
+        "partition": "category",
+        "schema": pa.schema([
+            ("date", pa.date32()), ("category", CATEGORY), ("keyword", CATEGORY),
+            ("dimension", CATEGORY), ("segment", CATEGORY), ("ratio", pa.float32()),
+        ]),
+    },
+    # segments의 월별 사전 집계 (대시보드 세그먼트 비교 탭용)
+    "segment_monthly": {
+        "prefix": "dubai_shopping_segment_monthly",
+        "partition": "category",
+        "schema": pa.schema([
+            ("month", CATEGORY), ("category", CATEGORY), ("keyword", CATEGORY),
+            ("dimension", CATEGORY), ("segment", CATEGORY),
+            ("ratio_mean", pa.float32()), ("share", pa.float32()),
+        ]),
+    },
+    # 키워드 일괄 비교(keyword_batch.py): 한 번에 받은 같은 스케일의 트렌드와 키워드별 지표/순위
+    "batch_trend": {
+        "prefix": "dubai_batch_trend",
+        "partition": "batch",
+        "schema": pa.schema([("date", pa.date32()), ("batch", CATEGORY), ("keyword", CATEGORY),
+                             ("ratio", pa.float64())]),
+    },
+    "keyword_leaderboard": {
+        "prefix": "dubai_keyword_leaderboard",
+        "partition": "batch",
+        "schema": pa.schema([
+            ("batch", CATEGORY), ("keyword", CATEGORY), ("status", CATEGORY), ("error", pa.string()),
+            ("trend_volume", pa.float64()), ("trend_growth", pa.float64()),
+            ("trend_peak", pa.date32()), ("trend_onset", pa.date32()),
+            ("shop_items", pa.int32()), ("price_q1", pa.float64()), ("price_median", pa.float64()),
+            ("price_q3", pa.float64()), ("bait_share", pa.float32()),
+            ("blog_posts", pa.int32()), ("blog_recent", pa.int32()), ("buzz_growth", pa.float64()),
+            ("rank_growth", pa.int32()), ("rank_volume", pa.int32()), ("rank_price", pa.int32()),
+            ("rank_buzz", pa.int32()), ("score", pa.float64()), ("elapsed_ms", pa.float32()),
+        ]),
+    },
+}
+
+
+def dataset_path(dataset, store_dir=STORE_DIR):
+    return os.path.join(store_dir, dataset)
+
+
+def to_table(dataset, data):
+    # list[dict], DataFrame 또는 Arrow 테이블(ingest.py의 타입별 버퍼)을 데이터셋 스키마에 맞춘 Arrow 테이블로 변환
+    schema = DATASETS[dataset]["schema"]
+    if isinstance(data, pa.Table):
+        columns = [data.column(f.name) if f.name in data.column_names else pa.nulls(data.num_rows, f.type)
+                   for f in schema]
+        return pa.table(columns, names=schema.names).cast(schema)
+    df = pd.DataFrame(data)
+    columns = {}
+    for field in schema:
+        col = df[field.name] if field.name in df.columns else pd.Series([None] * len(df), dtype="object")
+        if pa.types.is_date32(field.type):
+            fmt = "%Y%m%d" if field.name == "postdate" else None
+            col = pd.to_datetime(col.astype("string"), format=fmt, errors="coerce").dt.date
+        elif pa.types.is_integer(field.type):
+            col = pd.to_numeric(col, errors="coerce").astype("Int64")
+        elif pa.types.is_floating(field.type):
+            col = pd.to_numeric(col, errors="coerce")
+        else:
+            col = col.astype("string")
+        columns[field.name] = pa.array(col, type=field.type.value_type if pa.types.is_dictionary(field.type)
+                                       else field.type, from_pandas=True)
+    table = pa.table(columns)
+    return table.cast(schema)
+
+
+def to_int(value):
+    # 아이템 dict의 숫자 필드(문자열/실수/결측) -> int 또는 None (이력/동일 상품 색인/가격 감시의 행 단위 변환)
+    try:
+        if value is None or value == "" or pd.isna(value):
+            return None
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def new_run():
+    # 실행 id: 한 번의 수집(여러 번 나눠 append해도 같은 값)이 쓴 파일 이름 접두어
+    # 시작 시각(ns) 순으로 정렬되며, 't' 접두어로 예전 uuid 실행 id보다 항상 뒤에 옴
+    return f"t{time.time_ns():020d}{uuid.uuid4().hex[:8]}"
+
+
+def _file_run(path):
+    # part-{run}-{uuid8}-{i}.parquet -> run
+    return os.path.basename(path).split("-")[1]
+
+
+def append(dataset, data, collected=None, store_dir=STORE_DIR, run=None):
+    # 한 번의 수집 결과를 (파티션 컬럼, 수집일) 파티션으로 추가
+    # 같은 날 같은 파티션 값에 여러 실행(재실행/재시도/같은 데이터셋을 쓰는 다른 작업)이 쓰면 가장 늦게 시작한 실행만 남기므로
+    # read(latest=True)는 파티션 값마다 그날 마지막 실행만 읽음. 한 실행을 여러 번 나눠 쓰려면 같은 run을 넘김
+    # (예: --deep 크롤 뒤 같은 날 일반 수집을 돌리면 그 키워드는 일반 수집의 100건 스냅샷으로 교체됨)
+    if data is None or len(data) == 0:
+        print(f"No data to save for {dataset}")
+        return 0
+    cfg = DATASETS[dataset]
+    table = to_table(dataset, data)
+    collected = collected or datetime.now().strftime("%Y-%m-%d")
+    run = run or new_run()
+    table = table.append_column("collected", pa.array([collected] * table.num_rows, pa.string()))
+    partition_col = cfg["partition"]
+    table = table.set_column(table.schema.get_field_index(partition_col), partition_col,
+                             table.column(partition_col).cast(pa.string()))
+
+    ds.write_dataset(
+        table, dataset_path(dataset, store_dir), format="parquet",
+        partitioning=ds.partitioning(pa.schema([(partition_col, pa.string()), ("collected", pa.string())]),
+                                     flavor="hive"),
+        existing_data_behavior="overwrite_or_ignore",
+        basename_template=f"part-{run}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+    )
+    values = set(table.column(partition_col).unique().to_pylist())
+    replaced = _remove_other_runs(dataset, values, collected, run, store_dir)
+    print(f"Saved: {dataset_path(dataset, store_dir)} ({table.num_rows} rows, collected={collected}"
+          + (f", replaced {replaced} files" if replaced else "") + ")")
+    return table.num_rows
+
+
+def _remove_other_runs(dataset, values, collected, run, store_dir):
+    # (파티션 값, 수집일) 파티션마다 가장 늦게 시작한 실행의 파일만 남기고 삭제
+    # 더 늦게 시작한 실행의 파일은 지우지 않음: 동시에 쓰는 실행끼리는 늦게 시작한 쪽이 남고,
+    # 이번 실행보다 늦은 실행이 이미 썼으면 이번 실행이 쓴 파일을 지움
+    partition_col = DATASETS[dataset]["partition"]
+    data = ds.dataset(dataset_path(dataset, store_dir), format="parquet",
+                      partitioning=ds.partitioning(pa.schema([(partition_col, pa.string()),
+                                                              ("collected", pa.string())]), flavor="hive"))
+    files = {}
+    for fragment in data.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        if keys.get("collected") == collected and keys.get(partition_col) in values:
+            files.setdefault(keys.get(partition_col), []).append(fragment.path)
+    removed = 0
+    for value, paths in files.items():
+        newest = max(max(_file_run(path) for path in paths), run)
+        if newest != run:
+            print(f"Superseded: {dataset} {partition_col}={value} was written by a newer run on {collected}")
+        for path in paths:
+            if _file_run(path) != newest:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                removed += 1
+    return removed
+
+
+def dataset_schema(dataset):
+    # 읽기 스키마: 데이터셋 스키마 + 파티션 컬럼. 첫 파일에서 추론하지 않으므로 나중에 추가된 컬럼은
+    # 그 컬럼이 없는 예전 파일에서 null로 읽힘
+    partition_col = DATASETS[dataset]["partition"]
+    fields = [pa.field(f.name, CATEGORY) if f.name == partition_col else f for f in DATASETS[dataset]["schema"]]
+    return pa.schema(fields + [pa.field("collected", CATEGORY)])
+
+
+def open_dataset(dataset, store_dir=STORE_DIR):
+    path = dataset_path(dataset, store_dir)
+    if not os.path.isdir(path):
+        return None
+    # 파티션 값도 문자열 범주형으로 고정 (추론하면 "50000006" 같은 분야 코드가 정수가 됨)
+    partition_col = DATASETS[dataset]["partition"]
+    partitioning = ds.HivePartitioning.discover(schema=pa.schema([(partition_col, CATEGORY), ("collected", CATEGORY)]))
+    data = ds.dataset(path, format="parquet", partitioning=partitioning)
+    return data.replace_schema(dataset_schema(dataset))
+
+
+def partitions(dataset, store_dir=STORE_DIR):
+    # 파일을 열지 않고 경로만으로 (파티션 값, 수집일) 목록을 구함
+    data = open_dataset(dataset, store_dir)
+    if data is None:
+        return []
+    return [ds.get_partition_keys(f.partition_expression) for f in data.get_fragments()]
+
+
+def latest_expression(dataset, store_dir=STORE_DIR):
+    # 파티션 값별로 가장 최근 수집일만 고르는 필터 (기존 "최근 파일" 로직과 동일)
+    partition_col = DATASETS[dataset]["partition"]
+    newest = {}
+    for keys in partitions(dataset, store_dir):
+        value = keys.get(partition_col)
+        newest[value] = max(newest.get(value, ""), keys.get("collected", ""))
+    expr = None
+    for value, collected in newest.items():
+        e = (ds.field(partition_col) == value) & (ds.field("collected") == collected)
+        expr = e if expr is None else expr | e
+    return expr
+
+
+def read(dataset, columns=None, filters=None, latest=False, store_dir=STORE_DIR):
+    # columns: 읽을 컬럼 목록 (projection)
+    # filters: pyarrow 필터 표현식 또는 [("keyword", "in", [...]), ("lprice", ">=", 1000)] 형태
+    # latest: 파티션 값별로 가장 최근 수집일 데이터만 읽음 (기존 "최근 파일" 로직과 동일)
+    data = open_dataset(dataset, store_dir)
+    if data is None:
+        return None
+    expr = None
+    if filters is not None:
+        expr = filters if isinstance(filters, ds.Expression) else pq.filters_to_expression(filters)
+    if latest:
+        latest_expr = latest_expression(dataset, store_dir)
+        if latest_expr is not None:
+            expr = latest_expr if expr is None else expr & latest_expr
+
+    table = data.to_table(columns=columns, filter=expr)
+    return table.to_pandas(date_as_object=False)
+
+
+def migrate_csv(raw_dir=DATA_DIR, store_dir=STORE_DIR):
+    # raw_data/의 기존 CSV 스냅샷을 파일명의 수집일 파티션으로 옮김
+    done = {(d, k.get("collected")) for d in DATASETS for k in partitions(d, store_dir)}
+    count = 0
+    for filename in sorted(os.listdir(raw_dir)):
+        m = re.match(r"(.+)_(\d{8})\.csv$", filename)
+        if not m:
+            continue
+        dataset = next((d for d, cfg in DATASETS.items() if cfg["prefix"] == m.group(1)), None)
+        if dataset is None:
+            continue
+        collected = datetime.strptime(m.group(2), "%Y%m%d").strftime("%Y-%m-%d")
+        if (dataset, collected) in done:
+            print(f"Skip (already migrated): {filename}")
+            continue
+        df = pd.read_csv(os.path.join(raw_dir, filename), encoding="utf-8-sig")
+        append(dataset, df, collected=collected, store_dir=store_dir)
+        count += 1
+    return count
+
+
+def _load_csv_path(raw_dir):
+    # app_dashboard.load_data의 기존 CSV 경로
+    files = os.listdir(raw_dir)
+    trend_file = sorted([f for f in files if "dubai_search_trend_2025" in f])[-1]
+    blog_file = sorted([f for f in files if "dubai_blog_latest" in f])[-1]
+    shop_file = sorted([f for f in files if "dubai_shop_latest" in f])[-1]
+    df_trend = pd.read_csv(os.path.join(raw_dir, trend_file))
+    df_blog = pd.read_csv(os.path.join(raw_dir, blog_file))
+    df_shop = pd.read_csv(os.path.join(raw_dir, shop_file))
+    df_trend['date'] = pd.to_datetime(df_trend['date'])
+    df_shop['lprice'] = pd.to_numeric(df_shop['lprice'], errors='coerce')
+    return df_trend, df_blog, df_shop
+
+
+def _load_store_path(store_dir):
+    return (read("trend", latest=True, store_dir=store_dir),
+            read("blog", latest=True, store_dir=store_dir),
+            read("shop", latest=True, store_dir=store_dir))
+
+
+def benchmark(raw_dir=DATA_DIR, store_dir=STORE_DIR, repeat=20):
+    results = {}
+    for name, fn, arg in [("csv", _load_csv_path, raw_dir), ("store", _load_store_path, store_dir)]:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            frames = fn(arg)
+            timings.append(time.perf_counter() - started)
+        rows = sum(len(f) for f in frames)
+        memory = sum(f.memory_usage(deep=True).sum() for f in frames)
+        results[name] = {"median_ms": round(sorted(timings)[len(timings) // 2] * 1000, 2),
+                         "rows": rows, "memory_mb": round(memory / 1024 / 1024, 2)}
+    for name, r in results.items():
+        print(f"[{name}] median {r['median_ms']}ms | {r['rows']} rows | {r['memory_mb']}MB in memory")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parquet 저장소 관리")
+    parser.add_argument("command", choices=["migrate", "bench", "info"])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(f"Migrated {migrate_csv()} CSV snapshots into {STORE_DIR}")
+    elif args.command == "bench":
+        if not os.path.isdir(STORE_DIR):
+            sys.exit("Store is empty. Run `python storage.py migrate` first.")
+        benchmark(repeat=args.repeat)
+    else:
+        for dataset in DATASETS:
+            print(dataset, sorted({tuple(sorted(k.items())) for k in partitions(dataset)}))
@@ -0,0 +1,161 @@
+import os
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import storage
+
+# 벤치마크용 합성 데이터 생성기
+# 실제 수집 데이터(raw_data/의 trend/shop/blog)와 같은 컬럼/형식으로 10^3 ~ 10^7 행을 만든다.
+# - trend: 키워드 그룹별 일간 클릭 지수 (유행 곡선 + 잡음, 전체 최대값 = 100)
+# - shop: 검색 API 상품 항목 (<b> 태그가 들어간 제목, 판매처는 소수 몰에 몰리는 분포)
+# - blog: 검색 API 블로그 항목 (토픽 단어가 섞인 제목/요약, postdate는 YYYYMMDD 정수)
+# 메모리에 올리는 synthetic_frames()와, 청크 단위로 저장소/CSV에 쓰는 write()를 제공한다.
+
+MAX_TREND_DAYS = 3650
+CHUNK_ROWS = 1_000_000
+
+SHOP_SUFFIXES = ["선물세트", "수제 쿠키", "피스타치오 카다이프 초콜릿", "쫀득쿠키 6개입", "대용량 1kg",
+                 "편의점 신상", "당일발송", "개별포장 10개"]
+CATEGORIES = [("스낵", "쿠키/비스킷"), ("초콜릿", "수제초콜릿"), ("쿠키", "쿠키/비스킷"), ("떡", "찹쌀떡"),
+              ("케이크", "조각케이크")]
+BLOG_WORDS = ["만들기", "레시피", "리뷰", "내돈내산", "선물", "편의점", "맛집", "후기", "카다이프", "피스타치오",
+              "오늘", "주말", "솔직", "추천", "&quot;완판&quot;", "웨이팅", "가격", "택배"]
+
+
+def _objects(values):
+    return np.array(values, dtype=object)
+
+
+def _zipf_choice(rng, n_values, size, a=1.1):
+    # 상위 몇 개 값에 몰리는 분포 (판매처/블로거)
+    weights = 1.0 / np.arange(1, n_values + 1) ** a
+    return rng.choice(n_values, size=size, p=weights / weights.sum())
+
+
+def keyword_list(n_keywords):
+    return [f"두바이 키워드{i}" for i in range(n_keywords)]
+
+
+def trend_frame(rows, keywords, seed=0):
+    # 그룹 수 x 일수 = rows. 일수는 최대 10년, 더 필요한 행은 그룹을 늘려서 채움 (앞쪽 그룹 = keywords)
+    rng = np.random.default_rng(seed)
+    n_days = max(1, min(MAX_TREND_DAYS, rows // len(keywords)))
+    n_groups = max(len(keywords), -(-rows // n_days))
+    groups = keywords + [f"트렌드 그룹{i}" for i in range(len(keywords), n_groups)]
+    t = np.arange(n_days, dtype=float)
+    peaks = rng.uniform(0, n_days, n_groups)[:, None]
+    widths = rng.uniform(n_days / 20 + 1, n_days / 4 + 2, n_groups)[:, None]
+    heights = rng.uniform(5, 100, n_groups)[:, None]
+    ratio = heights * np.exp(-((t - peaks) / widths) ** 2) + rng.random((n_groups, n_days)) * 2
+    ratio = (ratio / ratio.max() * 100).round(5).ravel()[:rows]
+    days = pd.date_range("2025-01-01", periods=n_days, freq="D")
+    return pd.DataFrame({'date': np.tile(days, n_groups)[:rows],
+                         'keyword_group': pd.Categorical(np.repeat(groups, n_days)[:rows], categories=groups),
+                         'ratio': ratio})
+
+
+def shop_frame(rows, keywords, seed=0, offset=0):
+    rng = np.random.default_rng(seed)
+    n_malls = max(10, min(5000, rows // 20))
+    malls = _objects([f"몰{i}" for i in range(n_malls)])
+    mall = malls[_zipf_choice(rng, n_malls, rows)]
+    kw = _objects(keywords)[rng.integers(0, len(keywords), rows)]
+    suffix = _objects(SHOP_SUFFIXES)[rng.integers(0, len(SHOP_SUFFIXES), rows)]
+    product_id = _objects((10_000_000_000 + offset + np.arange(rows)).astype(str))
+    cat = rng.integers(0, len(CATEGORIES), rows)
+    # 대부분 4천~1만원대, 일부는 1,000원 미만 광고성 상품
+    lprice = np.round(rng.lognormal(np.log(8000), 0.6, rows), -1)
+    bait = rng.random(rows) < 0.02
+    lprice[bait] = rng.integers(100, 1000, int(bait.sum()))
+    brand = np.where(rng.random(rows) < 0.3, mall, None)
+    return pd.DataFrame({
+        'title': "[" + mall + "] <b>" + kw + "</b> " + suffix,
+        'link': "https://smartstore.naver.com/main/products/" + product_id,
+        'image': "https://shopping-phinf.pstatic.net/main_" + product_id + ".jpg",
+        'lprice': lprice,
+        'hprice': np.nan,
+        'mallName': pd.Categorical(mall, categories=malls),
+        'productId': product_id,
+        'productType': rng.choice([1, 2, 3], rows, p=[0.2, 0.7, 0.1]),
+        'brand': pd.Categorical(brand),
+        'maker': pd.Categorical(brand),
+        'category1': pd.Categorical(np.full(rows, "식품", dtype=object)),
+        'category2': pd.Categorical(np.full(rows, "과자/베이커리", dtype=object)),
+        'category3': pd.Categorical(_objects([c[0] for c in CATEGORIES])[cat]),
+        'category4': pd.Categorical(_objects([c[1] for c in CATEGORIES])[cat]),
+        'keyword': pd.Categorical(kw, categories=keywords),
+    })
+
+
+def blog_frame(rows, keywords, seed=0, offset=0, n_days=365):
+    rng = np.random.default_rng(seed)
+    n_bloggers = max(10, min(50_000, rows // 5))
+    blogger_ids = _objects([f"blogger{i}" for i in range(n_bloggers)])
+    blogger = _zipf_choice(rng, n_bloggers, rows, a=0.8)
+    kw = _objects(keywords)[rng.integers(0, len(keywords), rows)]
+    words = _objects(BLOG_WORDS)
+    title = "<b>" + kw + "</b> " + words[rng.integers(0, len(words), rows)] + " " + words[rng.integers(0, len(words), rows)]
+    description = kw.copy()
+    for _ in range(8):
+        description = description + " " + words[rng.integers(0, len(words), rows)]
+    days = pd.date_range("2025-01-01", periods=n_days, freq="D").strftime("%Y%m%d").astype(int).to_numpy()
+    post_id = _objects((220_000_000_000 + offset + np.arange(rows)).astype(str))
+    return pd.DataFrame({
+        'title': title,
+        'link': "https://blog.naver.com/" + blogger_ids[blogger] + "/" + post_id,
+        'description': description,
+        'bloggername': _objects([f"블로거{i}" for i in range(n_bloggers)])[blogger],
+        'bloggerlink': "blog.naver.com/" + blogger_ids[blogger],
+        'postdate': days[rng.integers(0, len(days), rows)],
+        'keyword': pd.Categorical(kw, categories=keywords),
+    })
+
+
+def synthetic_frames(rows, n_keywords=20, seed=0):
+    # 데이터셋마다 rows행. 반환: (trend, shop, blog, 공통 키워드 목록)
+    keywords = keyword_list(n_keywords)
+    return (trend_frame(rows, keywords, seed), shop_frame(rows, keywords, seed + 1),
+            blog_frame(rows, keywords, seed + 2), keywords)
+
+
+def write(rows, store_dir=None, csv_dir=None, n_keywords=20, seed=0, chunk_rows=CHUNK_ROWS,
+          collected="2025-12-31"):
+    # 청크 단위로 만들어 저장소(store_dir)와/또는 CSV 스냅샷(csv_dir)에 기록 (전체를 메모리에 올리지 않음)
+    keywords = keyword_list(n_keywords)
+    stamp = collected.replace("-", "")
+    written = {}
+    run = storage.new_run()
+
+    def _save(dataset, df, first):
+        if store_dir:
+            storage.append(dataset, df, collected=collected, store_dir=store_dir, run=run)
+        if csv_dir:
+            os.makedirs(csv_dir, exist_ok=True)
+            path = os.path.join(csv_dir, f"{storage.DATASETS[dataset]['prefix']}_{stamp}.csv")
+            df.to_csv(path, mode="w" if first else "a", header=first, index=False,
+                      encoding="utf-8-sig" if first else "utf-8")
+        written[dataset] = written.get(dataset, 0) + len(df)
+
+    _save("trend", trend_frame(rows, keywords, seed), True)
+    for i, start in enumerate(range(0, rows, chunk_rows)):
+        n = min(chunk_rows, rows - start)
+        _save("shop", shop_frame(n, keywords, (seed, 1, i), offset=start), i == 0)
+        _save("blog", blog_frame(n, keywords, (seed, 2, i), offset=start), i == 0)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="합성 trend/shop/blog 데이터 생성")
+    parser.add_argument("--rows", type=int, default=100_000, help="데이터셋별 행 수 (10^3 ~ 10^7)")
+    parser.add_argument("--keywords", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store-dir", default=None, help="Parquet 저장소 경로")
+    parser.add_argument("--csv-dir", default=None, help="CSV 스냅샷 경로")
+    args = parser.parse_args()
+
+    if not args.store_dir and not args.csv_dir:
+        parser.error("--store-dir 또는 --csv-dir 중 하나는 필요합니다")
+    started = time.perf_counter()
+    written = write(args.rows, args.store_dir, args.csv_dir, args.keywords, args.seed)
+    print(f"Generated {written} in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,288 @@
+import re
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+import storage
+
+# 블로그 제목/본문 요약의 토픽 키워드 집계
+# - 마크업 제거와 매칭은 전부 pandas 문자열 연산(벡터화)으로 처리
+# - 단어가 적으면 단어마다 numpy 배열 비교로 출현 위치를 찾음 (텍스트를 단어 수만큼 훑지만 훑기 한 번이 매우 쌈)
+# - 단어가 많으면 모든 토픽의 단어를 하나의 정규식(긴 단어 우선 대안 + 전방탐색)으로 묶어 텍스트를 한 번만 훑음
+#   같은 위치에서 시작하는 짧은 단어(접두어)는 매칭된 가장 긴 단어로부터 보충하므로
+#   단어별 중첩 출현까지 단어마다 따로 count()한 결과와 같다.
+# - TopicCounter는 청크 단위로 누적하므로 저장소 전체 이력도 메모리에 올리지 않고 집계
+
+DEFAULT_TOPICS = {k: [k] for k in ["만들기", "레시피", "리뷰", "내돈내산", "선물", "편의점", "맛집"]}
+TEXT_COLUMNS = ("title", "description")
+BATCH_ROWS = 50_000
+# 단어 수가 이보다 많으면 단어별로 여러 번 훑는 것보다 트라이 정규식으로 한 번 훑는 쪽이 빠름
+TERM_COUNT_MAX = 32
+
+# 행 구분자. 청크의 모든 행을 이 문자로 이어 붙여 정규식 연산을 문자열 하나에 한 번씩만 수행
+_SEP = "\x00"
+_TAG_RE = re.compile(r"<[^>\x00]*>")
+_ENTITIES = {"&quot;": '"', "&lt;": "<", "&gt;": ">", "&apos;": "'", "&#39;": "'", "&nbsp;": " ", "&amp;": "&"}
+
+
+def _joined(texts):
+    return _SEP.join(texts.astype("string").fillna("").str.replace(_SEP, " ", regex=False).tolist())
+
+
+def _strip_joined(text):
+    # 검색 API가 넣는 <b> 강조 태그와 HTML 엔티티 제거 (&amp;는 이중 치환을 막기 위해 마지막)
+    text = _TAG_RE.sub("", text)
+    if "&" in text:
+        for entity, char in _ENTITIES.items():
+            text = text.replace(entity, char)
+    return text
+
+
+def strip_markup(texts):
+    return pd.Series(_strip_joined(_joined(texts)).split(_SEP), index=texts.index, dtype="string")
+
+
+def parse_lexicon(text):
+    # "토픽: 단어1, 단어2" 형식(줄 단위). 콜론이 없으면 단어 자체를 토픽으로 사용
+    lexicon = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        topic, _, terms = line.partition(":") if ":" in line else (line, "", line)
+        terms = [t.strip() for t in terms.split(",") if t.strip()]
+        if terms:
+            lexicon.setdefault(topic.strip(), []).extend(terms)
+    return lexicon
+
+
+def post_dates(values):
+    # postdate: 저장소(datetime), CSV(20250101 정수), API("20250101") 모두 일자로 변환
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.normalize()
+    digits = values.astype("string").str.replace("-", "", regex=False)
+    return pd.to_datetime(digits, format="%Y%m%d", errors="coerce")
+
+
+def _trie_pattern(terms):
+    # 단어 목록을 접두어 트라이 모양의 정규식으로 변환 (정규식 엔진이 오토마톤처럼 한 글자씩 분기)
+    # 자식 분기를 탐욕적 선택으로 두어 같은 위치에서는 가장 긴 단어가 매칭된다
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
+
+
+class TopicMatcher:
+    def __init__(self, lexicon=None):
+        lexicon = lexicon or DEFAULT_TOPICS
+        self.lexicon = {topic: sorted({t.lower() for t in terms if t}) for topic, terms in lexicon.items()}
+        self.topics = list(self.lexicon)
+        term_topics = {}
+        for topic, terms in self.lexicon.items():
+            for term in terms:
+                term_topics.setdefault(term, []).append(topic)
+        terms = sorted(term_topics, key=len, reverse=True)
+        self._term_topics = term_topics
+        if len(terms) <= TERM_COUNT_MAX:
+            self.pattern = None
+            return
+        # 구분자 자리에서는 빈 문자열, 단어가 시작하는 자리에서는 가장 긴 단어를 돌려줌
+        self.pattern = re.compile(_SEP + "|(?=(" + _trie_pattern(terms) + "))")
+        # 가장 긴 매칭 단어 -> 같은 위치에서 함께 매칭되는 (단어, 토픽) 목록
+        pairs = []
+        for longest in terms:
+            for term in terms:
+                if longest.startswith(term):
+                    pairs.extend((longest, term, topic) for topic in term_topics[term])
+        self._expand = pd.DataFrame(pairs, columns=["match", "term", "topic"])
+
+    def hits(self, texts):
+        # texts(Series) -> 출현 한 번당 한 행 (row: 위치 순번, term, topic)
+        return self._match(_strip_joined(_joined(texts)))
+
+    def _match(self, text):
+        if self.pattern is None:
+            return self._count_terms(text.lower())
+        tokens = np.array(self.pattern.findall(text.lower()), dtype=object)
+        is_hit = tokens != ""
+        rows = np.cumsum(~is_hit)[is_hit]
+        found = pd.DataFrame({"row": rows, "match": tokens[is_hit]})
+        return found.merge(self._expand, on="match")[["row", "term", "topic"]]
+
+    def _count_terms(self, text):
+        # 텍스트를 코드포인트 배열로 바꿔 단어마다 첫 글자 후보 위치를 글자 단위로 좁혀 감 (정규식 없이 numpy 비교)
+        # 위치마다 따로 보므로 트라이 정규식과 같이 중첩 출현도 센다
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        seps = np.flatnonzero(codes == ord(_SEP))
+        parts = []
+        for term, topics in self._term_topics.items():
+            chars = np.frombuffer(term.encode("utf-32-le"), dtype=np.uint32)
+            at = np.flatnonzero(codes[:max(len(codes) - len(chars) + 1, 0)] == chars[0])
+            for i in range(1, len(chars)):
+                at = at[codes[at + i] == chars[i]]
+            if not len(at):
+                continue
+            rows = np.searchsorted(seps, at)
+            parts += [pd.DataFrame({"row": rows, "term": term, "topic": topic}) for topic in topics]
+        if not parts:
+            return pd.DataFrame({"row": pd.Series(dtype="int64"), "term": pd.Series(dtype=object),
+                                 "topic": pd.Series(dtype=object)})
+        return pd.concat(parts, ignore_index=True)
+
+    def post_hits(self, df, columns=TEXT_COLUMNS):
+        # 여러 텍스트 컬럼을 행마다 이어 붙여 게시글 단위로 한 번에 매칭
+        columns = [c for c in columns if c in df.columns]
+        texts = df[columns[0]].astype("string").fillna("")
+        if len(columns) > 1:
+            texts = texts.str.cat([df[c].astype("string").fillna("") for c in columns[1:]], sep="\n")
+        return self._match(_strip_joined(_joined(texts)))
+
+    def count(self, df, columns=TEXT_COLUMNS):
+        counter = TopicCounter(self, columns)
+        counter.update(df)
+        return counter.totals()
+
+    def daily(self, df, columns=TEXT_COLUMNS, date_col="postdate"):
+        counter = TopicCounter(self, columns, date_col)
+        counter.update(df)
+        return counter.daily()
+
+
+class TopicCounter:
+    # 청크를 받아 토픽별 출현 수/게시글 수와 일자별 게시글 수를 누적
+    def __init__(self, matcher, columns=TEXT_COLUMNS, date_col="postdate", dedupe_col="link"):
+        self.matcher = matcher
+        self.columns = columns
+        self.date_col = date_col
+        self.dedupe_col = dedupe_col
+        self._seen = set()
+        self.posts = 0
+        self._mentions = pd.Series(0, index=matcher.topics, dtype="int64")
+        self._posts = pd.Series(0, index=matcher.topics, dtype="int64")
+        self._daily = []
+
+    def update(self, df):
+        if df is None or df.empty:
+            return
+        if self.dedupe_col in df.columns:
+            # 수집 실행마다 같은 글이 반복 저장되므로 link 기준으로 한 번만 센다
+            links = df[self.dedupe_col].astype("string")
+            keep = ~links.duplicated() & ~links.isin(self._seen)
+            self._seen.update(links[keep].dropna())
+            df = df[keep.to_numpy()]
+        self.posts += len(df)
+        hits = self.matcher.post_hits(df, self.columns)
+        if hits.empty:
+            return
+        self._mentions = self._mentions.add(hits["topic"].value_counts(), fill_value=0).astype("int64")
+        per_post = hits[["row", "topic"]].drop_duplicates()
+        self._posts = self._posts.add(per_post["topic"].value_counts(), fill_value=0).astype("int64")
+        if self.date_col in df.columns:
+            dates = post_dates(df[self.date_col].reset_index(drop=True))
+            per_post = per_post.assign(date=dates.to_numpy()[per_post["row"].to_numpy()])
+            self._daily.append(per_post.groupby(["date", "topic"]).size())
+
+    def totals(self):
+        return pd.DataFrame({"topic": self.matcher.topics,
+                             "mentions": self._mentions.reindex(self.matcher.topics).to_numpy(),
+                             "posts": self._posts.reindex(self.matcher.topics).to_numpy()})
+
+    def daily(self):
+        # 일자 x 토픽 게시글 수 (빈 날짜는 0으로 채움)
+        if not self._daily:
+            return pd.DataFrame(columns=self.matcher.topics, dtype="int64")
+        counts = pd.concat(self._daily).groupby(level=[0, 1]).sum().unstack(fill_value=0)
+        counts = counts.reindex(columns=self.matcher.topics, fill_value=0)
+        full = pd.date_range(counts.index.min(), counts.index.max(), freq="D")
+        return counts.reindex(full, fill_value=0).rename_axis("date")
+
+
+def count_store(matcher=None, keywords=None, batch_rows=BATCH_ROWS):
+    # 저장소의 블로그 이력 전체를 배치 단위로 스트리밍하며 집계
+    matcher = matcher or TopicMatcher()
+    counter = TopicCounter(matcher)
+    data = storage.open_dataset("blog")
+    if data is None:
+        return counter
+    expr = ds.field("keyword").isin(keywords) if keywords else None
+    columns = list(TEXT_COLUMNS) + ["postdate", "link"]
+    for batch in data.to_batches(columns=columns, filter=expr, batch_size=batch_rows):
+        counter.update(batch.to_pandas(date_as_object=False))
+    return counter
+
+
+def _naive(df, terms):
+    # 기존 app.py 방식: 제목을 하나로 합쳐 단어마다 전체를 다시 훑음
+    titles = " ".join(df["title"].tolist())
+    return {k: titles.count(k) for k in terms}
+
+
+def benchmark(rows=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["두바이", "쫀득쿠키", "<b>두쫀쿠</b>", "만들기", "레시피", "리뷰", "내돈내산", "선물",
+             "편의점", "맛집", "후기", "카다이프", "피스타치오", "&quot;추천&quot;", "오늘"]
+    vocab = np.array(words, dtype=object)
+    df = pd.DataFrame({
+        "title": [" ".join(x) for x in vocab[rng.integers(0, len(vocab), size=(rows, 6))]],
+        "description": [" ".join(x) for x in vocab[rng.integers(0, len(vocab), size=(rows, 12))]],
+        "postdate": (20250101 + rng.integers(0, 28, size=rows)).astype(str),
+        "link": [f"https://blog.example/{i}" for i in range(rows)],
+    })
+    print(f"rows={rows:,}")
+    results = {}
+    # 기본 7개 단어와, 사용자 사전을 흉내 낸 큰 사전(단어별 변형 30개씩)
+    large = {f"{k}{i}": [f"{k}{i}"] for k in DEFAULT_TOPICS for i in range(30)}
+    for name, lexicon in [("default", DEFAULT_TOPICS), ("large", dict(DEFAULT_TOPICS, **large))]:
+        terms = [t for terms in lexicon.values() for t in terms]
+        started = time.perf_counter()
+        naive = _naive(df, terms)
+        naive_s = time.perf_counter() - started
+
+        matcher = TopicMatcher(lexicon)
+        started = time.perf_counter()
+        title_counts = matcher.count(df, columns=("title",)).set_index("topic")["mentions"]
+        matcher_s = time.perf_counter() - started
+        mismatched = [t for t in terms if naive[t] != title_counts[t]]
+        print(f"[{name}: {len(terms)} terms] join + str.count {naive_s:6.3f}s | "
+              f"TopicMatcher {matcher_s:6.3f}s (titles only, mismatches={mismatched})")
+        results[name] = {"naive_s": naive_s, "matcher_s": matcher_s}
+
+    started = time.perf_counter()
+    counter = TopicCounter(TopicMatcher())
+    for start in range(0, rows, BATCH_ROWS):
+        counter.update(df.iloc[start:start + BATCH_ROWS])
+    daily = counter.daily()
+    results["stream_s"] = time.perf_counter() - started
+    print(f"TopicCounter streamed (title + description + daily): {results['stream_s']:6.3f}s, {daily.shape[0]} days")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="블로그 토픽 키워드 집계")
+    parser.add_argument("command", choices=["store", "bench"])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--lexicon", help="토픽 사전 파일 (줄마다 '토픽: 단어1, 단어2')")
+    args = parser.parse_args()
+    if args.command == "bench":
+        benchmark(args.rows)
+    else:
+        lexicon = None
+        if args.lexicon:
+            with open(args.lexicon, encoding="utf-8") as f:
+                lexicon = parse_lexicon(f.read())
+        counter = count_store(TopicMatcher(lexicon))
+        print(f"{counter.posts:,} posts")
+        print(counter.totals().to_string(index=False))
@@ -0,0 +1,427 @@
+import time
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# 검색 트렌드(date, keyword_group, ratio) 분석
+# 그룹별: 정점, 상승 시작(정점의 20% 도달), 상승/하락 변곡점(평활 곡선 기울기 최대/최소), 기간 증가율
+# 그룹 쌍별: 교차 일자(평활 곡선 차이의 부호 변화), 상호상관이 최대가 되는 시차(선행/후행 일수)
+# - 모든 계산은 그룹 x 일자 행렬에 대한 NumPy 연산 (상호상관은 FFT로 한 그룹 대 전체를 한 번에)
+# - 그룹 데이터 지문(행 해시 합)을 키로 결과를 캐시해, 새로 들어오거나 바뀐 그룹과 그 그룹이 낀 쌍만 다시 계산
+
+SMOOTH_DAYS = 7
+GROWTH_DAYS = 28
+ONSET_LEVEL = 0.2
+MAX_LAG_DAYS = 180
+MIN_OVERLAP_DAYS = 60
+CROSS_GAP = 1.0
+GROWTH_FLOOR = 1.0
+MAX_CACHED = 20_000
+MAX_CACHED_PAIRS = 1_000_000
+
+DAY = np.timedelta64(1, "D")
+
+
+def _fingerprints(df, date_col, group_col, value_col):
+    # 그룹별 (행 수, 행 해시 합). 행 순서와 무관
+    codes, names = pd.factorize(df[group_col], sort=False)
+    hashes = pd.util.hash_pandas_object(df[[date_col, value_col]], index=False).to_numpy()
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(names))
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    sums = np.add.reduceat(hashes[order], starts) if len(order) else np.zeros(0, dtype=np.uint64)
+    return [str(n) for n in names], [(int(c), int(s)) for c, s in zip(counts, sums)], codes
+
+
+def smooth(matrix, window):
+    # NaN을 건너뛰는 중앙 이동평균 (행 = 그룹, 열 = 일자). 각 행의 첫/마지막 관측일 밖은 NaN으로 둠
+    valid = ~np.isnan(matrix)
+    n = matrix.shape[1]
+    sums = np.cumsum(np.pad(np.where(valid, matrix, 0.0), ((0, 0), (1, 0))), axis=1)
+    counts = np.cumsum(np.pad(valid, ((0, 0), (1, 0))).astype(np.int64), axis=1)
+    half = window // 2
+    lo = np.clip(np.arange(n) - half, 0, n)
+    hi = np.clip(np.arange(n) + window - half, 0, n)
+    cnt = counts[:, hi] - counts[:, lo]
+    out = np.where(cnt > 0, (sums[:, hi] - sums[:, lo]) / np.maximum(cnt, 1), np.nan)
+    first = valid.argmax(axis=1)
+    last = n - 1 - valid[:, ::-1].argmax(axis=1)
+    cols = np.arange(n)
+    out[(cols < first[:, None]) | (cols > last[:, None])] = np.nan
+    return out
+
+
+def _masked_arg(values, mask, largest=True):
+    # 행별 mask 안에서 최대(최소) 위치. 후보가 없으면 -1
+    fill = -np.inf if largest else np.inf
+    v = np.where(mask & ~np.isnan(values), values, fill)
+    idx = v.argmax(axis=1) if largest else v.argmin(axis=1)
+    ok = np.isfinite(v[np.arange(len(v)), idx])
+    return np.where(ok, idx, -1)
+
+
+def group_stats(smoothed, growth_days=GROWTH_DAYS, onset_level=ONSET_LEVEL):
+    # 평활 행렬(그룹 x 일자)에서 행별 지표 인덱스/값
+    rows = np.arange(len(smoothed))
+    cols = np.arange(smoothed.shape[1])
+    has = ~np.isnan(smoothed)
+    peak_idx = _masked_arg(smoothed, has)
+    peak = np.where(peak_idx >= 0, smoothed[rows, np.maximum(peak_idx, 0)], np.nan)
+    slope = np.diff(smoothed, axis=1)
+    before = cols[:-1][None, :] < peak_idx[:, None]
+    rise_idx = _masked_arg(slope, before)
+    rise_idx = np.where((rise_idx >= 0) & (slope[rows, np.maximum(rise_idx, 0)] > 0), rise_idx + 1, -1)
+    fall_idx = _masked_arg(slope, ~before, largest=False)
+    fall_idx = np.where((fall_idx >= 0) & (slope[rows, np.maximum(fall_idx, 0)] < 0), fall_idx + 1, -1)
+    reached = has & (smoothed >= onset_level * peak[:, None]) & (cols[None, :] <= peak_idx[:, None])
+    onset_idx = np.where(reached.any(axis=1), reached.argmax(axis=1), -1)
+    # 기간 증가율: growth_days 전 대비 (바닥값으로 0 근처 폭주 방지)
+    growth = np.full(smoothed.shape, np.nan)
+    if smoothed.shape[1] > growth_days:
+        growth[:, growth_days:] = smoothed[:, growth_days:] / np.maximum(smoothed[:, :-growth_days], GROWTH_FLOOR) - 1
+    growth_max_idx = _masked_arg(growth, ~np.isnan(growth))
+    last_idx = np.where((~np.isnan(growth)).any(axis=1),
+                        growth.shape[1] - 1 - (~np.isnan(growth))[:, ::-1].argmax(axis=1), -1)
+    return {"peak_idx": peak_idx, "peak": peak, "onset_idx": onset_idx, "rise_idx": rise_idx,
+            "fall_idx": fall_idx, "growth_max_idx": growth_max_idx, "growth_last_idx": last_idx,
+            "growth": growth}
+
+
+def _at(values, idx):
+    return np.where(idx >= 0, values[np.arange(len(values)), np.maximum(idx, 0)], np.nan)
+
+
+def _overlap_sums(x, first, last, i, js, lags):
+    # 관측 구간이 끊기지 않은 행끼리: 시차별 겹침 구간이 연속이므로 누적합으로 개수/합/제곱합을 구함
+    csum = np.pad(np.cumsum(x, axis=1), ((0, 0), (1, 0)))
+    csq = np.pad(np.cumsum(x * x, axis=1), ((0, 0), (1, 0)))
+    k = lags[None, :]
+    # target의 t + k와 other의 t가 겹치는 t 구간 [lo, hi]
+    lo = np.maximum(first[js][:, None], first[i] - k)
+    hi = np.minimum(last[js][:, None], last[i] - k)
+    count = np.maximum(hi - lo + 1, 0)
+    lo_c, hi_c = np.where(count > 0, lo, 0), np.where(count > 0, hi + 1, 0)
+    shift = np.where(count > 0, k, 0)
+    rows = np.asarray(js)[:, None]
+    sa = csum[i][hi_c + shift] - csum[i][lo_c + shift]
+    saa = csq[i][hi_c + shift] - csq[i][lo_c + shift]
+    sb = csum[rows, hi_c] - csum[rows, lo_c]
+    sbb = csq[rows, hi_c] - csq[rows, lo_c]
+    return count.astype(float), sa, sb, saa, sbb
+
+
+def cross_correlation(smoothed, targets, others, max_lag, min_overlap=MIN_OVERLAP_DAYS):
+    # targets[k] 그룹 대 others[k] 그룹들의 시차별 피어슨 상관(겹치는 관측일만)이 최대인 시차
+    # 곱의 합은 FFT 상호상관으로 한 번에 구하고, 겹침 구간의 개수/합/제곱합은 누적합(끊긴 구간이 있으면 FFT)으로 구함
+    # 반환 lag > 0: target의 움직임이 other보다 lag일 늦음 (other가 선행)
+    valid = ~np.isnan(smoothed)
+    x = np.where(valid, smoothed, 0.0)
+    n = x.shape[1]
+    size = 1 << int(np.ceil(np.log2(max(2, 2 * n))))
+    first = valid.argmax(axis=1)
+    last = n - 1 - valid[:, ::-1].argmax(axis=1)
+    contiguous = bool((valid.sum(axis=1) == last - first + 1).all())
+    fx = np.fft.rfft(x, size, axis=1)
+    if not contiguous:
+        fm, fxx = np.fft.rfft(valid.astype(float), size, axis=1), np.fft.rfft(x * x, size, axis=1)
+    max_lag = min(max_lag, n - 1)
+    lags = np.arange(-max_lag, max_lag + 1)
+    min_overlap = min(min_overlap, max(2, n // 2))
+    results = []
+    for i, js in zip(targets, others):
+        if not len(js):
+            results.append((np.zeros(0, dtype=int), np.zeros(0)))
+            continue
+
+        def xc(fa, fb):
+            # xc[k] = sum_t a_i[t + k] * b_j[t]
+            return np.fft.irfft(fa[i][None, :] * np.conj(fb[js]), size, axis=1)[:, lags % size]
+        sab = xc(fx, fx)
+        if contiguous:
+            count, sa, sb, saa, sbb = _overlap_sums(x, first, last, i, js, lags)
+        else:
+            count = np.rint(xc(fm, fm))
+            sa, sb = xc(fx, fm), xc(fm, fx)
+            saa, sbb = xc(fxx, fm), xc(fm, fxx)
+        var = (count * saa - sa ** 2) * (count * sbb - sb ** 2)
+        ok = (count >= min_overlap) & (var > 1e-9)
+        corr = np.where(ok, (count * sab - sa * sb) / np.sqrt(np.where(ok, var, 1.0)), -np.inf)
+        best = corr.argmax(axis=1)
+        value = corr[np.arange(len(js)), best]
+        results.append((np.where(np.isfinite(value), lags[best], 0), np.where(np.isfinite(value), value, np.nan)))
+    return results
+
+
+def crossings(smoothed, i, js, gap=CROSS_GAP):
+    # i 그룹과 js 그룹들의 평활 곡선 교차. 차이가 gap 이하인 구간은 직전 우위를 유지한 것으로 봄
+    # 반환: 그룹별 (교차 인덱스 배열, 방향 배열: +1 = i가 앞지름)
+    diff = smoothed[i][None, :] - smoothed[js]
+    sign = np.where(np.abs(diff) > gap, np.sign(diff), 0.0)
+    sign = np.nan_to_num(sign, nan=0.0)
+    cols = np.arange(sign.shape[1])
+    last = np.maximum.accumulate(np.where(sign != 0, cols, 0), axis=1)
+    held = np.take_along_axis(sign, last, axis=1)
+    flip = (held[:, 1:] * held[:, :-1]) < 0
+    rows, at = np.nonzero(flip)
+    direction = held[rows, at + 1]
+    split = np.searchsorted(rows, np.arange(1, len(js)))
+    return list(zip(np.split(at + 1, split), np.split(direction.astype(int), split)))
+
+
+class TrendReport:
+    # 한 번의 update() 결과 (요청한 데이터의 그룹/쌍만)
+    def __init__(self, groups, pairs, crossings, series):
+        self.groups = groups
+        self.pairs = pairs
+        self._crossings = crossings
+        self._series = series
+
+    def pair(self, a, b):
+        rows = self.pairs[((self.pairs['a'] == a) & (self.pairs['b'] == b)) |
+                          ((self.pairs['a'] == b) & (self.pairs['b'] == a))]
+        if rows.empty:
+            return None
+        row = rows.iloc[0].to_dict()
+        if row['a'] != a:
+            row.update(a=a, b=b, lead_days=-row['lead_days'])
+        return row
+
+    def crossovers(self, a, b):
+        # 교차 일자와 그 날 앞선 그룹
+        if (a, b) in self._crossings:
+            dates, direction = self._crossings[(a, b)]
+        elif (b, a) in self._crossings:
+            dates, direction = self._crossings[(b, a)]
+            direction = -direction
+        else:
+            return pd.DataFrame(columns=['date', 'leader'])
+        return pd.DataFrame({'date': pd.to_datetime(dates), 'leader': np.where(direction > 0, a, b)})
+
+    def series(self, name):
+        # 평활 곡선과 기간 증가율
+        start, smoothed, growth = self._series[name]
+        dates = pd.date_range(pd.Timestamp(start), periods=len(smoothed), freq="D")
+        return pd.DataFrame({'date': dates, 'smoothed': smoothed, 'growth': growth})
+
+
+class TrendAnalyzer:
+    # 프로세스에서 하나를 공유 (캐시 키가 데이터 지문이라 세션마다 데이터가 달라도 서로 덮어쓰지 않음)
+    def __init__(self, smooth_days=SMOOTH_DAYS, growth_days=GROWTH_DAYS, max_lag=MAX_LAG_DAYS,
+                 gap=CROSS_GAP, max_cached=MAX_CACHED):
+        self.smooth_days = smooth_days
+        self.growth_days = growth_days
+        self.max_lag = max_lag
+        self.gap = gap
+        self.max_cached = max_cached
+        self._groups = OrderedDict()
+        self._pairs = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_recomputed = ([], 0)
+
+    def _put(self, cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def update(self, df, date_col="date", group_col="keyword_group", value_col="ratio"):
+        names, fps, codes = _fingerprints(df, date_col, group_col, value_col)
+        with self._lock:
+            changed = [k for k, fp in enumerate(fps) if fp not in self._groups]
+            if changed:
+                self._compute_groups(df, date_col, value_col, codes, changed, fps)
+            entries = [self._groups[fp] for fp in fps]
+            for fp in fps:
+                self._groups.move_to_end(fp)
+            found, n_pairs = self._compute_pairs(entries, fps)
+            self.last_recomputed = ([names[k] for k in changed], n_pairs)
+            return self._report(names, entries, found)
+
+    def _compute_groups(self, df, date_col, value_col, codes, changed, fps):
+        # 바뀐 그룹만 공통 일자 축 행렬로 올려 한 번에 계산
+        mask = np.isin(codes, changed)
+        dates = pd.to_datetime(df[date_col]).to_numpy()[mask].astype("datetime64[D]")
+        values = df[value_col].to_numpy(float)[mask]
+        row_of = np.full(codes.max() + 1, -1)
+        row_of[changed] = np.arange(len(changed))
+        rows = row_of[codes[mask]]
+        start = dates.min()
+        n = int((dates.max() - start) / DAY) + 1
+        raw = np.full((len(changed), n), np.nan)
+        raw[rows, ((dates - start) / DAY).astype(int)] = values
+        smoothed = smooth(raw, self.smooth_days)
+        stats = group_stats(smoothed, self.growth_days)
+        first = (~np.isnan(raw)).argmax(axis=1)
+        last = n - 1 - (~np.isnan(raw))[:, ::-1].argmax(axis=1)
+        for r, k in enumerate(changed):
+            lo, hi = first[r], last[r] + 1
+
+            def day(idx):
+                return start + int(idx) * DAY if idx >= 0 else np.datetime64("NaT")
+            entry = {
+                "start": start + int(lo) * DAY, "end": start + int(last[r]) * DAY,
+                "smoothed": smoothed[r, lo:hi], "growth": stats["growth"][r, lo:hi],
+                "peak_date": day(stats["peak_idx"][r]), "peak": stats["peak"][r],
+                "onset_date": day(stats["onset_idx"][r]), "rise_date": day(stats["rise_idx"][r]),
+                "fall_date": day(stats["fall_idx"][r]),
+                "growth_max_date": day(stats["growth_max_idx"][r]),
+                "growth_max": _at(stats["growth"], stats["growth_max_idx"])[r],
+                "growth_last": _at(stats["growth"], stats["growth_last_idx"])[r],
+            }
+            self._put(self._groups, fps[k], entry, self.max_cached)
+
+    def _compute_pairs(self, entries, fps):
+        # 캐시에 없는 쌍만 (바뀐 그룹 하나 대 나머지 전체를 한 번에)
+        # 반환: ({(i, j): (결과, 앞뒤가 바뀌어 저장됐는지)} (i < j), 새로 계산한 쌍 수)
+        g = len(entries)
+        found, todo = {}, {}
+        for i in range(g):
+            for j in range(i + 1, g):
+                p = self._pairs.get((fps[i], fps[j]))
+                if p is not None:
+                    found[(i, j)] = (p, False)
+                    continue
+                p = self._pairs.get((fps[j], fps[i]))
+                if p is not None:
+                    found[(i, j)] = (p, True)
+                else:
+                    todo.setdefault(i, []).append(j)
+        if not todo:
+            return found, 0
+        start = min(e["start"] for e in entries)
+        n = int((max(e["end"] for e in entries) - start) / DAY) + 1
+        smoothed = np.full((g, n), np.nan)
+        for k, e in enumerate(entries):
+            off = int((e["start"] - start) / DAY)
+            smoothed[k, off:off + len(e["smoothed"])] = e["smoothed"]
+        targets = list(todo)
+        others = [np.array(todo[i]) for i in targets]
+        lags = cross_correlation(smoothed, targets, others, self.max_lag)
+        count = 0
+        for i, js, (lag, corr) in zip(targets, others, lags):
+            for j, (at, direction), l, c in zip(js, crossings(smoothed, i, js, self.gap), lag, corr):
+                p = {"lag": int(l), "corr": float(c), "cross": start + at * DAY, "dir": direction}
+                self._put(self._pairs, (fps[i], fps[j]), p, MAX_CACHED_PAIRS)
+                found[(i, j)] = (p, False)
+                count += 1
+        return found, count
+
+    def _report(self, names, entries, found):
+        groups = pd.DataFrame([{
+            'group': name, 'start': e["start"], 'end': e["end"], 'peak_date': e["peak_date"], 'peak': e["peak"],
+            'onset_date': e["onset_date"], 'rise_date': e["rise_date"], 'fall_date': e["fall_date"],
+            'growth_last': e["growth_last"], 'growth_max': e["growth_max"], 'growth_max_date': e["growth_max_date"],
+        } for name, e in zip(names, entries)])
+        pairs, cross = [], {}
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                p, flip = found[(i, j)]
+                # lag > 0: 앞 그룹이 뒤 그룹보다 lag일 늦음 -> lead_days는 a가 b보다 앞선 일수
+                lead = p["lag"] if flip else -p["lag"]
+                direction = -p["dir"] if flip else p["dir"]
+                cross[(names[i], names[j])] = (p["cross"], direction)
+                pairs.append({'a': names[i], 'b': names[j], 'lead_days': lead, 'corr': p["corr"],
+                              'leader': names[i] if lead > 0 else names[j] if lead < 0 else None,
+                              'crossovers': len(p["cross"]),
+                              'last_cross': p["cross"][-1] if len(p["cross"]) else np.datetime64("NaT")})
+        columns = ['a', 'b', 'lead_days', 'corr', 'leader', 'crossovers', 'last_cross']
+        series = {name: (e["start"], e["smoothed"], e["growth"]) for name, e in zip(names, entries)}
+        return TrendReport(groups, pd.DataFrame(pairs, columns=columns), cross, series)
+
+
+def _fmt(date):
+    return pd.Timestamp(date).strftime("%Y-%m-%d") if not pd.isna(date) else "-"
+
+
+def pair_insights(report, a, b, labels=None):
+    # a(먼저 유행한 쪽으로 예상)와 b의 교차/변곡점/시차 설명 문장 (마크다운 목록 항목)
+    labels = labels or {}
+    la, lb = f"**{labels.get(a, a)}**", f"**{labels.get(b, b)}**"
+    groups = report.groups.set_index('group')
+    if a not in groups.index or b not in groups.index:
+        return []
+    ga, gb = groups.loc[a], groups.loc[b]
+    lines = []
+    cross = report.crossovers(a, b)
+    overtakes = cross[cross['leader'] == b]
+    if len(overtakes):
+        when = overtakes['date'].iloc[0]
+        after = (when - pd.Timestamp(ga['peak_date'])).days if not pd.isna(ga['peak_date']) else None
+        tail = f" ({la} 정점 {_fmt(ga['peak_date'])} 기준 {after:+d}일)" if after is not None else ""
+        lines.append(f"- **트렌드 교차**: {_fmt(when)}에 {lb}의 검색량이 {la}를 앞질렀습니다{tail}. "
+                     f"기간 중 교차 {len(cross)}회")
+    elif len(cross):
+        lines.append(f"- **트렌드 교차**: 교차 {len(cross)}회, 마지막 교차 {_fmt(cross['date'].iloc[-1])}"
+                     f"({labels.get(cross['leader'].iloc[-1], cross['leader'].iloc[-1])} 우위)")
+    else:
+        leader = la if ga['peak'] >= gb['peak'] else lb
+        lines.append(f"- **트렌드 교차**: 기간 중 교차가 없습니다 ({leader} 우위 유지)")
+    lines.append(f"- **변곡점**: {la} 급증 {_fmt(ga['rise_date'])} → 정점 {_fmt(ga['peak_date'])}, "
+                 f"{lb} 급증 {_fmt(gb['rise_date'])} → 정점 {_fmt(gb['peak_date'])}")
+    pair = report.pair(a, b)
+    if pair is not None and pair['lead_days']:
+        first, second = (la, lb) if pair['lead_days'] > 0 else (lb, la)
+        days = abs(pair['lead_days'])
+        lines.append(f"- **시차**: {first}의 흐름이 {second}보다 약 {days}일(≈{days / 30:.1f}개월) 앞섭니다 "
+                     f"(상호상관 {pair['corr']:.2f})")
+    elif pair is not None:
+        lines.append(f"- **시차**: 두 흐름이 같은 시기에 움직입니다 (상호상관 {pair['corr']:.2f})")
+    lines.append(f"- **최근 {GROWTH_DAYS}일 증가율**: {la} {ga['growth_last']:+.0%}, {lb} {gb['growth_last']:+.0%}")
+    return lines
+
+
+def selftest():
+    # 정답을 아는 곡선: b는 a보다 60일 늦은 같은 모양, 두 곡선은 정확히 한 번 교차
+    days = pd.date_range("2025-01-01", periods=365, freq="D")
+    t = np.arange(365)
+    a = 100 * np.exp(-((t - 120) / 30.0) ** 2)
+    b = 80 * np.exp(-((t - 180) / 30.0) ** 2)
+    df = pd.DataFrame({'date': np.tile(days, 2), 'keyword_group': np.repeat(["a", "b"], 365), 'ratio': np.r_[a, b]})
+    report = TrendAnalyzer().update(df)
+    pair = report.pair("a", "b")
+    cross = report.crossovers("a", "b")
+    groups = report.groups.set_index('group')
+    assert pair['lead_days'] == 60, pair
+    assert len(cross) == 1 and cross['leader'].iloc[0] == "b", cross
+    assert groups.loc["a", "peak_date"] == pd.Timestamp("2025-05-01"), groups
+    assert groups.loc["a", "rise_date"] < groups.loc["a", "peak_date"] < groups.loc["a", "fall_date"]
+    print("selftest ok:", " ".join(pair_insights(report, "a", "b")).replace("\n", " "))
+
+
+def benchmark(groups=300, days=365, repeat=3):
+    # 전체 계산 / 변경 없음 / 한 그룹만 바뀐 경우
+    from synthetic_data import trend_frame, keyword_list
+    df = trend_frame(groups * days, keyword_list(groups))
+    print(f"trend rows={len(df):,} groups={df['keyword_group'].nunique()} pairs={groups * (groups - 1) // 2:,}")
+    for label, prepare in [("cold", lambda: (TrendAnalyzer(), df)), ("unchanged", None), ("one group", None)]:
+        timings = []
+        for _ in range(repeat):
+            if label == "cold":
+                analyzer, data = prepare()
+            elif label == "unchanged":
+                data = df
+            else:
+                data = df.copy()
+                first = data['keyword_group'] == data['keyword_group'].iloc[0]
+                data.loc[first, 'ratio'] = data.loc[first, 'ratio'] * np.random.uniform(0.9, 1.1)
+            started = time.perf_counter()
+            report = analyzer.update(data)
+            timings.append(time.perf_counter() - started)
+        changed, pairs = analyzer.last_recomputed
+        print(f"[{label}] median {sorted(timings)[len(timings) // 2] * 1000:.0f}ms | recomputed groups "
+              f"{len(changed)}, pairs {pairs:,} | report pairs {len(report.pairs):,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="트렌드 교차/변곡점/시차 분석")
+    parser.add_argument("command", choices=["selftest", "bench"])
+    parser.add_argument("--groups", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    if args.command == "selftest":
+        selftest()
+    else:
+        benchmark(args.groups, args.days)